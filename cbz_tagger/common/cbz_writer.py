@@ -0,0 +1,200 @@
+import os
+import shutil
+import struct
+import sys
+import threading
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_STORED
+from zipfile import BadZipFile
+from zipfile import ZipFile
+from zipfile import ZipInfo
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif")
+
+
+def get_compress_type(name: str) -> int:
+    """Images are stored as is, deflating them barely saves space and costs a pass on every write and read."""
+    if name.lower().endswith(IMAGE_EXTENSIONS):
+        return ZIP_STORED
+    return ZIP_DEFLATED
+
+
+COPY_CHUNK_SIZE = 1024 * 1024
+LOCAL_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+DATA_DESCRIPTOR_FLAG = 0x08
+ZIP64_LIMIT = (1 << 31) - 1
+# zipfile has no public API for writing compressed bytes as they are, the raw copy uses these private ZipFile
+# attributes and is only enabled on the Python versions it was checked against
+RAW_COPY_VERSIONS = ((3, 11), (3, 13))
+RAW_COPY_ATTRIBUTES = ("_lock", "_didModify", "fp", "start_dir", "filelist", "NameToInfo")
+
+
+def supports_raw_copy(*zip_files: ZipFile) -> bool:
+    if not RAW_COPY_VERSIONS[0] <= sys.version_info[:2] <= RAW_COPY_VERSIONS[1]:
+        return False
+    if not hasattr(ZipInfo, "FileHeader"):
+        return False
+    return all(hasattr(zip_file, name) for zip_file in zip_files for name in RAW_COPY_ATTRIBUTES)
+
+
+def copy_member(zip_read: ZipFile, item: ZipInfo, zip_write: ZipFile) -> None:
+    """Copy a member into zip_write, moving its compressed bytes as they are when the zipfile module allows it.
+
+    Otherwise the member is inflated and deflated again through the public API, which gives the same archive
+    contents at the cost of the extra pass.
+    """
+    copied = ZipInfo(item.filename, item.date_time)
+    copied.compress_type = item.compress_type
+    copied.comment = item.comment
+    copied.create_system = item.create_system
+    copied.external_attr = item.external_attr
+
+    if not supports_raw_copy(zip_read, zip_write):
+        copied.file_size = item.file_size
+        with zip_read.open(item) as source, zip_write.open(copied, "w") as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        return
+
+    copied.CRC = item.CRC
+    copied.compress_size = item.compress_size
+    copied.file_size = item.file_size
+    # The sizes are known up front, so they go in the local header instead of a trailing data descriptor
+    copied.flag_bits = item.flag_bits & ~DATA_DESCRIPTOR_FLAG
+    _copy_raw_member(zip_read, item, zip_write, copied)
+
+
+def _copy_raw_member(zip_read: ZipFile, item: ZipInfo, zip_write: ZipFile, copied: ZipInfo) -> None:
+    """The only place that touches zipfile internals, see RAW_COPY_ATTRIBUTES."""
+    zip64 = item.file_size > ZIP64_LIMIT or item.compress_size > ZIP64_LIMIT
+    with zip_read._lock, zip_write._lock:  # type: ignore[attr-defined]
+        source = zip_read.fp
+        target = zip_write.fp
+        if source is None or target is None:
+            raise ValueError("Attempt to copy a member of a closed archive")
+
+        source.seek(item.header_offset)
+        header = LOCAL_FILE_HEADER.unpack(source.read(LOCAL_FILE_HEADER.size))
+        if header[0] != LOCAL_FILE_HEADER_SIGNATURE:
+            raise BadZipFile(f"Bad local file header for {item.filename}")
+        # Skip the file name and extra field, the last two fields of the header are their lengths
+        source.seek(header[-2] + header[-1], os.SEEK_CUR)
+
+        target.seek(zip_write.start_dir)
+        copied.header_offset = target.tell()
+        target.write(copied.FileHeader(zip64))
+        remaining = item.compress_size
+        while remaining > 0:
+            chunk = source.read(min(remaining, COPY_CHUNK_SIZE))
+            if not chunk:
+                raise BadZipFile(f"Truncated data for {item.filename}")
+            target.write(chunk)
+            remaining -= len(chunk)
+
+        zip_write.start_dir = target.tell()
+        zip_write.filelist.append(copied)
+        zip_write.NameToInfo[copied.filename] = copied
+        zip_write._didModify = True  # type: ignore[attr-defined]
+
+
+def replace_members(filepath: str, members: dict[str, bytes | str]) -> None:
+    """Replace members of an existing CBZ without inflating the members that are kept.
+
+    The kept members are copied raw into a temporary archive next to the original, followed by the new members,
+    and the temporary archive is synced and moved over the original. An interrupted update leaves the original
+    archive as it was.
+    """
+    temp_path = f"{filepath}{CbzWriter.temp_suffix}"
+    try:
+        with ZipFile(filepath, "r") as zip_read:
+            with open(temp_path, "wb") as temp_file:
+                with ZipFile(temp_file, "w", ZIP_DEFLATED) as zip_write:
+                    for item in zip_read.infolist():
+                        if item.filename not in members:
+                            copy_member(zip_read, item, zip_write)
+                    for name, data in members.items():
+                        zip_write.writestr(name, data, compress_type=get_compress_type(name))
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        os.replace(temp_path, filepath)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class CbzWriter:
+    """Streams members into a CBZ as they are produced, without staging them in a directory first.
+
+    The archive is written next to its destination with a .part suffix and renamed into place by commit(), so a
+    reader never sees a half written CBZ. Pages can be added from several threads in any order, they are written
+    to the archive in page order as soon as every earlier page has arrived. Other members are held until commit()
+    and written after the pages, so the metadata sits at the end of the archive.
+    """
+
+    temp_suffix = ".part"
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.temp_path = f"{filepath}{self.temp_suffix}"
+        self._lock = threading.Lock()
+        self._zip: ZipFile | None = None
+        self._pending_pages: dict[int, bytes] = {}
+        self._next_page = 0
+        self._members: list[tuple[str, bytes | str | None, str | None]] = []
+
+    @staticmethod
+    def page_name(index: int) -> str:
+        return f"{index + 1:03}.jpg"
+
+    @property
+    def page_count(self) -> int:
+        return self._next_page
+
+    def _get_zip(self) -> ZipFile:
+        if self._zip is None:
+            self._zip = ZipFile(self.temp_path, "w", ZIP_DEFLATED)
+        return self._zip
+
+    def write(self, name: str, data: bytes | str) -> None:
+        with self._lock:
+            self._members.append((name, data, None))
+
+    def write_file(self, path: str, name: str) -> None:
+        with self._lock:
+            self._members.append((name, None, path))
+
+    def add_page(self, index: int, data: bytes) -> None:
+        with self._lock:
+            self._pending_pages[index] = data
+            zip_write = self._get_zip()
+            while self._next_page in self._pending_pages:
+                page_name = self.page_name(self._next_page)
+                zip_write.writestr(page_name, self._pending_pages.pop(self._next_page), compress_type=ZIP_STORED)
+                self._next_page += 1
+
+    def commit(self) -> None:
+        """Finish the archive and move it into place."""
+        with self._lock:
+            if self._pending_pages:
+                raise EnvironmentError(f"Missing page {self._next_page + 1} for {self.filepath}")
+            zip_write = self._get_zip()
+            for name, data, path in self._members:
+                if path is not None:
+                    zip_write.write(path, name, compress_type=get_compress_type(name))
+                else:
+                    zip_write.writestr(name, data or b"", compress_type=get_compress_type(name))
+            self._members.clear()
+            zip_write.close()
+            self._zip = None
+            os.replace(self.temp_path, self.filepath)
+
+    def discard(self) -> None:
+        """Drop a partially written archive, a committed archive is left alone."""
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+            self._pending_pages.clear()
+            self._members.clear()
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
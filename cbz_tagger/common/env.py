@@ -29,6 +29,12 @@ class AppEnv:
     TIMER_DELAY: int = int(os.getenv("TIMER_DELAY", 6000))
     PROXY_URL: str | None = os.getenv("PROXY_URL", None)
     DELAY_PER_REQUEST: float = float(os.getenv("DELAY_PER_REQUEST", 0.5))
+    RATE_LIMITS: str | None = os.getenv("RATE_LIMITS", None)
+    TRANSCODE_WORKERS: int = int(os.getenv("TRANSCODE_WORKERS") or os.cpu_count() or 1)
+    SCAN_WORKERS: int = int(os.getenv("SCAN_WORKERS") or 4)
+    WATCH_SCAN_PATH: bool = os.getenv("WATCH_SCAN_PATH", "true").lower() == "true"
+    WATCH_POLL_INTERVAL: int = int(os.getenv("WATCH_POLL_INTERVAL", 60))
+    DATABASE_BACKEND: str = str(os.getenv("DATABASE_BACKEND", "json")).lower()
 
     if os.getenv("LOG_LEVEL") is None:
         LOG_LEVEL = logging.INFO
@@ -0,0 +1,76 @@
+import os
+import struct
+import time
+
+END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2LH")
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = b"PK\x05\x06"
+MAX_ZIP_COMMENT = 65535
+ZIP64_MARKER = 0xFFFFFFFF
+
+
+def has_end_of_central_directory(path: str) -> bool:
+    """A zip is only complete once the end of central directory record is written after everything else.
+
+    The record has to point at a central directory that fits in front of it, so a partial copy of an archive
+    with a record somewhere in its last bytes is not mistaken for a finished one.
+    """
+    with open(path, "rb") as file:
+        size = file.seek(0, os.SEEK_END)
+        tail_size = min(size, END_OF_CENTRAL_DIRECTORY.size + MAX_ZIP_COMMENT)
+        file.seek(size - tail_size)
+        tail = file.read(tail_size)
+
+    position = tail.rfind(END_OF_CENTRAL_DIRECTORY_SIGNATURE)
+    if position < 0 or len(tail) - position < END_OF_CENTRAL_DIRECTORY.size:
+        return False
+    *_, directory_size, directory_offset, comment_length = END_OF_CENTRAL_DIRECTORY.unpack_from(tail, position)
+    if position + END_OF_CENTRAL_DIRECTORY.size + comment_length > len(tail):
+        return False
+    if directory_size == ZIP64_MARKER or directory_offset == ZIP64_MARKER:
+        # The real values live in the zip64 records, zipfile validates those when the archive is opened
+        return True
+    return directory_offset + directory_size <= size - tail_size + position
+
+
+class FileState:
+    READY: str = "ready"
+    PENDING: str = "pending"
+    INVALID: str = "invalid"
+
+
+class FileReadiness:
+    """Decides per file whether an archive in the scan path has finished being written.
+
+    A file is ready once its size and modification time have stopped changing for settle_time seconds and it ends
+    with a valid end of central directory record. A file that has been left alone for abandon_time seconds and is
+    still not a valid archive is invalid, it is a broken copy rather than one in progress.
+    """
+
+    settle_time = 5.0
+    abandon_time = 300.0
+
+    def __init__(self):
+        self._signatures: dict[str, tuple[int, int]] = {}
+
+    def check(self, path: str) -> str:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._signatures.pop(path, None)
+            return FileState.PENDING
+
+        signature = (stat.st_size, stat.st_mtime_ns)
+        previous = self._signatures.get(path)
+        self._signatures[path] = signature
+        if previous is not None and previous != signature:
+            return FileState.PENDING
+
+        idle = time.time() - stat.st_mtime
+        if idle < self.settle_time:
+            return FileState.PENDING
+        if has_end_of_central_directory(path):
+            return FileState.READY
+        return FileState.INVALID if idle >= self.abandon_time else FileState.PENDING
+
+    def forget(self, path: str) -> None:
+        self._signatures.pop(path, None)
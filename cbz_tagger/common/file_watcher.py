@@ -0,0 +1,200 @@
+"""Watching the scan path for new CBZ files.
+
+On Linux the kernel reports finished writes and moves through inotify, so a new file is picked up within moments of
+landing and the tree is only walked once at startup. Where inotify is unavailable (another OS, or the watch limit
+is exhausted) the tree is polled instead, which still only reports files that are new or changed since the last
+poll.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import time
+
+logger = logging.getLogger()
+
+CBZ_EXTENSION = ".cbz"
+
+
+def is_cbz_file(filename: str) -> bool:
+    return os.path.splitext(filename)[-1] == CBZ_EXTENSION
+
+
+def walk_cbz_files(path: str) -> list[str]:
+    return [
+        os.path.join(root, filename)
+        for root, _, filenames in os.walk(path)
+        for filename in filenames
+        if is_cbz_file(filename)
+    ]
+
+
+class InotifyWatcher:
+    """Recursive inotify watch reporting CBZ files once they are closed after writing or moved into the tree."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    watch_mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    event_header = struct.Struct("iIII")
+    read_size = 64 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watches: dict[int, str] = {}
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            # Files already in the tree are reported by the first read
+            self._backlog = self.add_tree(path)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, directory: str) -> None:
+        watch = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.watch_mask)
+        if watch < 0:
+            raise OSError(ctypes.get_errno(), f"Unable to watch {directory}")
+        self.watches[watch] = directory
+
+    def add_tree(self, directory: str) -> list[str]:
+        """Watch a directory and everything below it, returning the CBZ files already inside it."""
+        cbz_files = []
+        for root, _, filenames in os.walk(directory):
+            self.add_watch(root)
+            cbz_files.extend(os.path.join(root, filename) for filename in filenames if is_cbz_file(filename))
+        return cbz_files
+
+    def read(self, timeout: float) -> list[str]:
+        """Wait up to timeout seconds for events and return the absolute paths of new CBZ files."""
+        if self._backlog:
+            backlog, self._backlog = self._backlog, []
+            return backlog
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self._fd, self.read_size)
+        except BlockingIOError:
+            return []
+
+        cbz_files = []
+        offset = 0
+        while offset < len(buffer):
+            watch, mask, _, name_length = self.event_header.unpack_from(buffer, offset)
+            offset += self.event_header.size
+            name = os.fsdecode(buffer[offset : offset + name_length].rstrip(b"\0"))
+            offset += name_length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped by the kernel, fall back to everything in the tree
+                logger.warning("Scan path watch overflowed, rescanning %s", self.path)
+                cbz_files.extend(walk_cbz_files(self.path))
+                continue
+            if mask & self.IN_IGNORED:
+                self.watches.pop(watch, None)
+                continue
+
+            directory = self.watches.get(watch)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Files can land in a new folder before its watch exists, pick them up from the folder itself
+                    try:
+                        cbz_files.extend(self.add_tree(path))
+                    except OSError as err:
+                        logger.warning("Unable to watch %s: %s", path, err)
+            elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO) and is_cbz_file(name):
+                cbz_files.append(path)
+        return cbz_files
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Fallback for platforms without inotify, walks the tree and reports new or changed CBZ files."""
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self._seen: dict[str, tuple[int, float]] = {}
+        self._last_poll = 0.0
+
+    def read(self, timeout: float) -> list[str]:
+        wait = self._last_poll + self.interval - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._last_poll = time.monotonic()
+
+        current = {}
+        for path in walk_cbz_files(self.path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            current[path] = (stat.st_size, stat.st_mtime)
+        cbz_files = [path for path, signature in current.items() if self._seen.get(path) != signature]
+        self._seen = current
+        return cbz_files
+
+    def close(self) -> None:
+        self._seen.clear()
+
+
+class FileWatcher:
+    """Collects new CBZ files under the scan path, as paths relative to it.
+
+    read() returns a batch once files have stopped arriving for quiet_period seconds, so a series copied in one
+    go is processed together rather than file by file.
+    """
+
+    quiet_period = 2.0
+
+    def __init__(self, path: str, poll_interval: float = 60.0):
+        self.path = path
+        try:
+            self.watcher: InotifyWatcher | PollingWatcher = InotifyWatcher(path)
+            logger.info("Watching %s for new files", path)
+        except (OSError, AttributeError) as err:
+            logger.warning("Unable to watch %s, polling every %ss instead: %s", path, poll_interval, err)
+            self.watcher = PollingWatcher(path, poll_interval)
+        self._pending: set[str] = set()
+
+    def read(self, timeout: float) -> list[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not self._pending:
+                return []
+            cbz_files = self.watcher.read(self.quiet_period if self._pending else max(remaining, 0))
+            if cbz_files:
+                self._pending.update(cbz_files)
+            elif self._pending:
+                pending, self._pending = self._pending, set()
+                return sorted(os.path.relpath(path, self.path) for path in pending)
+
+    def close(self) -> None:
+        self.watcher.close()
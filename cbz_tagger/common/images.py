@@ -0,0 +1,109 @@
+"""Storing downloaded page and cover images as JPEG.
+
+Sources that already serve JPEG are kept byte for byte, decoding and re-encoding them would only cost CPU and
+quality. Everything else is converted to RGB and saved as JPEG, for chapter pages on a pool of worker processes.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+from PIL import ImageFile
+from PIL import UnidentifiedImageError
+
+logger = logging.getLogger()
+
+JPEG_START_OF_IMAGE = b"\xff\xd8\xff"
+JPEG_END_OF_IMAGE = b"\xff\xd9"
+
+
+def is_complete_jpeg(image: bytes) -> bool:
+    """Cheap validation that the bytes are a whole JPEG, without decoding the image data."""
+    if not image.startswith(JPEG_START_OF_IMAGE):
+        return False
+    # Some servers pad the file after the end of image marker, a truncated download has no marker at all
+    if not image.rstrip(b"\x00\r\n ").endswith(JPEG_END_OF_IMAGE):
+        return False
+    try:
+        # Opening only parses the headers, which catches corrupt files before they are stored as is
+        with Image.open(BytesIO(image)) as header:
+            return header.format == "JPEG" and header.width > 0 and header.height > 0
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        return False
+
+
+def _open_for_jpeg(image: bytes) -> Image.Image:
+    in_memory_image = Image.open(BytesIO(image))
+    if in_memory_image.format != "JPEG":
+        in_memory_image = in_memory_image.convert("RGB")
+    return in_memory_image
+
+
+def _save_jpeg(in_memory_image: Image.Image, target: str | BytesIO, **params) -> None:
+    try:
+        in_memory_image.save(target, quality=95, optimize=True, **params)
+    except OSError:
+        ImageFile.LOAD_TRUNCATED_IMAGES = True  # type: ignore[misc]
+        if isinstance(target, BytesIO):
+            target.seek(0)
+            target.truncate()
+        in_memory_image.save(target, quality=95, optimize=True, **params)
+
+
+def convert_to_jpeg(image: bytes, image_path: str) -> None:
+    _save_jpeg(_open_for_jpeg(image), image_path)
+
+
+def encode_jpeg(image: bytes) -> bytes:
+    buffer = BytesIO()
+    _save_jpeg(_open_for_jpeg(image), buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def write_jpeg(image: bytes, image_path: str) -> None:
+    """Write an image to image_path as JPEG, passing JPEG sources through unchanged."""
+    if is_complete_jpeg(image):
+        with open(image_path, "wb") as image_file:
+            image_file.write(image)
+        return
+    convert_to_jpeg(image, image_path)
+
+
+class ImageTranscoder:
+    """Converts non-JPEG pages on a pool of worker processes.
+
+    PNG decoding and JPEG encoding hold the GIL, so converting on the download threads keeps a chapter of tall
+    webtoon strips on a single core. The pool is started on first use and shared by every download thread, with 0
+    workers the conversion runs on the calling thread instead.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that is running download threads can deadlock the children, spawn them instead
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def to_jpeg(self, image: bytes) -> bytes:
+        """JPEG bytes for an image, JPEG sources are returned unchanged and others converted on the process pool."""
+        if is_complete_jpeg(image):
+            return image
+        if self.workers <= 0:
+            return encode_jpeg(image)
+        return self.get_executor().submit(encode_jpeg, image).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from cbz_tagger.common.enums import Urls
+from cbz_tagger.common.env import AppEnv
+
+logger = logging.getLogger()
+
+
+class HostLimit:
+    """Request budget for a host: sustained requests per second, burst size and concurrent requests.
+
+    A rate or concurrency of 0 leaves that dimension unlimited.
+    """
+
+    __slots__ = ("rate", "burst", "concurrency")
+
+    def __init__(self, rate: float, burst: int = 1, concurrency: int = 0):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.concurrency = concurrency
+
+    @classmethod
+    def from_delay(cls, delay: float) -> "HostLimit":
+        return cls(rate=1 / delay if delay > 0 else 0, burst=1, concurrency=2)
+
+
+class TokenBucket:
+    """Thread-safe token bucket with an optional cap on in-flight requests."""
+
+    def __init__(self, limit: HostLimit):
+        self.limit = limit
+        self._tokens = float(limit.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(limit.concurrency) if limit.concurrency > 0 else None
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller has to wait before using it."""
+        if self.limit.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.limit.burst, self._tokens + (now - self._updated) * self.limit.rate)
+            self._updated = now
+            # Tokens can go negative, each waiting caller then owns a slot further in the future
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.limit.rate
+
+    @contextmanager
+    def acquire(self) -> Iterator[None]:
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            wait = self.reserve()
+            if wait > 0:
+                time.sleep(wait)
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+
+class RateLimiter:
+    """Per-host token buckets shared by every thread making requests.
+
+    Hosts without an explicit limit fall back to the default limit, which is derived from DELAY_PER_REQUEST.
+    """
+
+    host_limits: dict[str, HostLimit] = {
+        # Documented limit of 5 requests per second for the api
+        f"api.{Urls.MDX}": HostLimit(rate=5, burst=5, concurrency=4),
+        # Covers and chapter pages are served by the CDN, which has no documented limit
+        f"uploads.{Urls.MDX}": HostLimit(rate=20, burst=20, concurrency=8),
+    }
+
+    def __init__(self, limits: dict[str, HostLimit] | None = None, default_limit: HostLimit | None = None):
+        self.limits = dict(self.host_limits if limits is None else limits)
+        self.default_limit = default_limit if default_limit is not None else HostLimit.from_delay(0.5)
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        limits = dict(cls.host_limits)
+        limits.update(cls.parse_limits(AppEnv.RATE_LIMITS))
+        return cls(limits, HostLimit.from_delay(AppEnv.DELAY_PER_REQUEST))
+
+    @staticmethod
+    def parse_limits(value: str | None) -> dict[str, HostLimit]:
+        """Parse "host=rate:burst:concurrency" entries separated by commas, burst and concurrency are optional."""
+        limits: dict[str, HostLimit] = {}
+        for entry in (value or "").split(","):
+            if not entry.strip():
+                continue
+            try:
+                host, settings = entry.split("=", 1)
+                parts = settings.split(":")
+                rate = float(parts[0])
+                burst = int(parts[1]) if len(parts) > 1 and parts[1] else 1
+                concurrency = int(parts[2]) if len(parts) > 2 and parts[2] else 0
+            except ValueError:
+                logger.warning("Ignoring invalid rate limit entry: %s", entry)
+                continue
+            limits[host.strip().lower()] = HostLimit(rate=rate, burst=burst, concurrency=concurrency)
+        return limits
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.limits.get(host, self.default_limit))
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url: str):
+        """Context manager that waits for the host's budget and holds a concurrency slot for the request."""
+        return self.get_bucket(url).acquire()
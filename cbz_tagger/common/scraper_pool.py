@@ -0,0 +1,64 @@
+import threading
+from urllib.parse import urlsplit
+
+import cloudscraper
+
+
+class ScraperPool:
+    """Long-lived cloudscraper sessions, one per host and browser configuration.
+
+    Reusing a session keeps its connections alive and its Cloudflare challenge state between requests, instead of
+    paying for a new TLS handshake and challenge on every page image. Each session's connection pool is bounded so
+    concurrent downloads against one host can't open an unbounded number of sockets.
+    """
+
+    pool_maxsize: int = 10
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._scrapers: dict[tuple[str, str, str], cloudscraper.CloudScraper] = {}
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _create_scraper(self, browser: str, platform: str) -> cloudscraper.CloudScraper:
+        scraper = cloudscraper.create_scraper(
+            browser={"browser": browser, "platform": platform, "mobile": False},
+            delay=10,  # Add delay between challenge solving attempts
+        )
+        for adapter in scraper.adapters.values():
+            adapter.init_poolmanager(1, self.pool_maxsize, block=True)  # type: ignore[attr-defined]
+        return scraper
+
+    def get(self, url: str, browser: str, platform: str) -> cloudscraper.CloudScraper:
+        key = (self.get_host(url), browser, platform)
+        with self._lock:
+            scraper = self._scrapers.get(key)
+            if scraper is None:
+                scraper = self._create_scraper(browser, platform)
+                self._scrapers[key] = scraper
+            return scraper
+
+    def discard(self, url: str, browser: str, platform: str, scraper: cloudscraper.CloudScraper | None = None) -> None:
+        """Drop a session so the next request starts with fresh connections and challenge state.
+
+        The session is only removed from the pool, not closed, other threads may still be using it. It is closed
+        when the last of them lets go of it. When scraper is given it is only dropped if it is still the pooled
+        session, so a late failure doesn't throw away a session that has already been replaced.
+        """
+        key = (self.get_host(url), browser, platform)
+        with self._lock:
+            if scraper is None or self._scrapers.get(key) is scraper:
+                self._scrapers.pop(key, None)
+
+    def close(self) -> None:
+        with self._lock:
+            scrapers = list(self._scrapers.values())
+            self._scrapers.clear()
+        for scraper in scrapers:
+            scraper.close()
+
+    def __len__(self) -> int:
+        return len(self._scrapers)
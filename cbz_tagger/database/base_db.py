@@ -1,9 +1,12 @@
 import hashlib
 import json
+from collections.abc import MutableMapping
+from typing import Any
 from typing import Generic
 from typing import TypeVar
 from typing import Union
 
+from cbz_tagger.database.lazy_entity_dict import LazyEntityDict
 from cbz_tagger.entities.base_entity import BaseEntity
 from cbz_tagger.entities.base_entity import BaseEntityObject
 
@@ -12,7 +15,7 @@ T = TypeVar("T")
 
 class BaseEntityDB(BaseEntityObject, Generic[T]):
     entity_class: type[BaseEntity]
-    database: dict[str, T]
+    database: MutableMapping[str, T]
     query_param_field = "ids[]"
 
     def __init__(self, database=None):
@@ -28,22 +31,75 @@ class BaseEntityDB(BaseEntityObject, Generic[T]):
     def keys(self):
         return self.database.keys()
 
-    def to_json(self):
+    def entity_to_json(self, entity_id: str) -> str | list[str]:
+        if isinstance(self.database, LazyEntityDict):
+            raw = self.database.raw(entity_id)
+            if raw is not None:
+                # Never decoded, so the stored json is still current
+                return raw
+        value = self.database[entity_id]
+        if isinstance(value, list):
+            return [v.to_json() for v in value]  # type: ignore
+        return value.to_json()  # type: ignore
+
+    def to_content(self) -> dict[str, str | list[str]]:
         content = {}
-        for key, value in self.database.items():
-            if isinstance(value, list):
-                content[key] = [v.to_json() for v in value]  # type: ignore
+        for key in self.database:
+            content[key] = self.entity_to_json(key)
+        return content
+
+    def to_json(self):
+        return json.dumps(self.to_content())
+
+    def snapshot(self) -> dict[str, Any]:
+        """Shallow copy of the database used to find the entries that were replaced since it was taken."""
+        if isinstance(self.database, LazyEntityDict):
+            return self.database.snapshot()
+        return dict(self.database)
+
+    def is_unchanged(self, entity_id: str, previous: Any) -> bool:
+        if isinstance(self.database, LazyEntityDict):
+            return self.database.is_unchanged(entity_id, previous)
+        return previous is not None and self.database[entity_id] is previous
+
+    def to_changes(self, snapshot: dict[str, Any]) -> dict[str, Any]:
+        """
+        Returns the entries that were added, replaced or removed since the snapshot was taken.
+        Updates always replace the stored value, so an identity check is enough to find the changed entries
+        without serializing the rest of the database.
+        """
+        updated = {
+            key: self.entity_to_json(key) for key in self.database if not self.is_unchanged(key, snapshot.get(key))
+        }
+        deleted = [key for key in snapshot if key not in self.database]
+        if len(updated) == 0 and len(deleted) == 0:
+            return {}
+        return {"updated": updated, "deleted": deleted}
+
+    def apply_changes(self, changes: dict[str, Any]) -> None:
+        for key, value in changes.get("updated", {}).items():
+            if isinstance(self.database, LazyEntityDict):
+                self.database.set_raw(key, value)
             else:
-                content[key] = value.to_json()  # type: ignore
-        return json.dumps(content)
+                self.database[key] = self.decode_entity(value)
+        for key in changes.get("deleted", []):
+            self.database.pop(key, None)
+
+    @classmethod
+    def decode_entity(cls, content: str | list[str]) -> T:
+        return cls.entity_class.from_json(content)  # type: ignore
+
+    @classmethod
+    def from_content(cls, database_contents: dict[str, str | list[str] | None], reader=None):
+        """Entities are only decoded from the stored json when they are first accessed.
+
+        Entities with None for their json are read with reader(entity_id) at that point instead.
+        """
+        return cls(database=LazyEntityDict(cls.decode_entity, database_contents, reader))
 
     @classmethod
     def from_json(cls, json_str):
-        database_contents = json.loads(json_str)
-        database = {}
-        for key, value in database_contents.items():
-            database[key] = cls.entity_class.from_json(value)
-        return cls(database=database)
+        return cls.from_content(json.loads(json_str))
 
     def to_hash(self, entity_id: str) -> str:
         """
@@ -79,10 +135,14 @@ class BaseEntityDB(BaseEntityObject, Generic[T]):
                 if skip_on_exist and entity_id in self.database:
                     return
 
-                content = self.entity_class.from_server_url(
-                    query_params={self.query_param_field: [entity_id]}, **kwargs
-                )
-                self.database[entity_id] = self.format_content_for_entity(content, entity_id)
+                self.store(entity_id, self.fetch(entity_id, **kwargs))
+
+    def fetch(self, entity_id: str, **kwargs) -> list[Any]:
+        """Request the content of one entity without storing it, so it can run on a worker thread."""
+        return self.entity_class.from_server_url(query_params={self.query_param_field: [entity_id]}, **kwargs)
+
+    def store(self, entity_id: str, content: list[Any]) -> None:
+        self.database[entity_id] = self.format_content_for_entity(content, entity_id)
 
     def format_content_for_entity(self, content, entity_id: str):
         _ = entity_id
@@ -0,0 +1,136 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import TYPE_CHECKING
+from typing import Any
+
+from cbz_tagger.common.cbz_writer import CbzWriter
+from cbz_tagger.common.plugins import Plugins
+
+if TYPE_CHECKING:
+    from cbz_tagger.database.entity_db import EntityDB
+
+logger = logging.getLogger()
+
+
+class ChapterDownload:
+    """A missing chapter moving through the download pipeline."""
+
+    __slots__ = ("entity_id", "chapter_item", "manga_name", "cbz_writer")
+
+    def __init__(self, entity_id: str, chapter_item: Any, manga_name: str, cbz_writer: CbzWriter):
+        self.entity_id = entity_id
+        self.chapter_item = chapter_item
+        self.manga_name = manga_name
+        self.cbz_writer = cbz_writer
+
+
+class ChapterDownloadScheduler:
+    """Downloads missing chapters as a pipeline instead of one chapter at a time.
+
+    Page downloads run on a pool per plugin, sized by the plugin's chapter_workers, so every source is limited on
+    its own while chapters from different sources and series download together. Pages are streamed into each
+    chapter's CBZ as they arrive and finished archives are committed on a separate pool. The database is only used
+    from the calling thread, the chapter metadata is built before a chapter is submitted and the database is
+    written as chapters complete.
+    """
+
+    build_workers = 2
+
+    def __init__(self, entity_db: "EntityDB", storage_path: str):
+        self.entity_db = entity_db
+        self.storage_path = storage_path
+        self._fetch_executors: dict[str, ThreadPoolExecutor] = {}
+        self._build_executor: ThreadPoolExecutor | None = None
+
+    def get_fetch_executor(self, plugin_type: str) -> ThreadPoolExecutor:
+        executor = self._fetch_executors.get(plugin_type)
+        if executor is None:
+            try:
+                workers = Plugins.get_plugin(plugin_type).chapter_workers
+            except KeyError:
+                workers = 1
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"chapter-{plugin_type}")
+            self._fetch_executors[plugin_type] = executor
+        return executor
+
+    def get_build_executor(self) -> ThreadPoolExecutor:
+        if self._build_executor is None:
+            self._build_executor = ThreadPoolExecutor(max_workers=self.build_workers, thread_name_prefix="chapter-cbz")
+        return self._build_executor
+
+    def prepare(self, download: ChapterDownload) -> None:
+        """Build the chapter metadata from the database, on the calling thread before the pages are fetched."""
+        self.entity_db.build_chapter_metadata(download.manga_name, download.chapter_item, download.cbz_writer)
+
+    def fetch(self, download: ChapterDownload) -> None:
+        logger.info("Downloading %s...", os.path.basename(download.cbz_writer.filepath))
+        self.entity_db.fetch_chapter_pages(download.chapter_item, download.cbz_writer)
+
+    def build(self, download: ChapterDownload) -> None:
+        self.entity_db.build_chapter_cbz(download.cbz_writer)
+
+    def complete(self, download: ChapterDownload) -> None:
+        self.entity_db.complete_chapter_download(
+            download.entity_id,
+            download.chapter_item,
+            self.storage_path,
+            download.manga_name,
+            download.cbz_writer.filepath,
+        )
+
+    def run(self, missing_chapters: list[tuple[str, Any]]) -> None:
+        pending: dict[Future, tuple[str, ChapterDownload]] = {}
+        try:
+            for entity_id, chapter_item in missing_chapters:
+                if (entity_id, chapter_item.entity_id) in self.entity_db.entity_downloads:
+                    continue
+                manga_name, chapter_filepath = self.entity_db.get_chapter_filepath(
+                    entity_id, chapter_item, self.storage_path
+                )
+                download = ChapterDownload(entity_id, chapter_item, manga_name, CbzWriter(f"{chapter_filepath}.cbz"))
+                try:
+                    self.prepare(download)
+                except EnvironmentError as err:
+                    self.entity_db.abort_chapter_download(entity_id, chapter_item, download.cbz_writer.filepath, err)
+                    self.cleanup(download)
+                    continue
+                executor = self.get_fetch_executor(chapter_item.entity_type)
+                pending[executor.submit(self.fetch, download)] = ("fetch", download)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, download = pending.pop(future)
+                    try:
+                        future.result()
+                        if stage == "fetch":
+                            pending[self.get_build_executor().submit(self.build, download)] = ("build", download)
+                            continue
+                        self.complete(download)
+                    except EnvironmentError as err:
+                        self.entity_db.abort_chapter_download(
+                            download.entity_id, download.chapter_item, download.cbz_writer.filepath, err
+                        )
+                    except BaseException:
+                        self.cleanup(download)
+                        raise
+                    self.cleanup(download)
+        finally:
+            self.shutdown()
+            # Anything still pending was interrupted by an unexpected error
+            for _, download in pending.values():
+                self.cleanup(download)
+
+    @staticmethod
+    def cleanup(download: ChapterDownload) -> None:
+        download.cbz_writer.discard()
+
+    def shutdown(self) -> None:
+        for executor in self._fetch_executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+        if self._build_executor is not None:
+            self._build_executor.shutdown(wait=True, cancel_futures=True)
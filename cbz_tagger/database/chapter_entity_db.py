@@ -1,13 +1,29 @@
+import math
+from collections import Counter
 from collections import defaultdict
+from collections.abc import MutableMapping
+from typing import Any
 
+from cbz_tagger.common.cbz_writer import CbzWriter
+from cbz_tagger.common.plugins import Plugins
 from cbz_tagger.database.base_db import BaseEntityDB
+from cbz_tagger.database.chapter_table import ChapterTable
 from cbz_tagger.entities.chapter_entity import ChapterEntity
 
 
-class ChapterEntityDB(BaseEntityDB[list[ChapterEntity]]):
-    database: dict[str, list[ChapterEntity]]
+class ChapterEntityDB(BaseEntityDB[ChapterTable]):
+    database: MutableMapping[str, ChapterTable]
     entity_class = ChapterEntity
 
+    @classmethod
+    def decode_entity(cls, content: str | list[str]) -> ChapterTable:
+        return ChapterTable.from_json(content)
+
+    def entity_to_json(self, entity_id: str) -> str | list[str]:
+        # Stored as a one item list so list storage (the sqlite chapters table) keeps working for tables
+        json_content = super().entity_to_json(entity_id)
+        return json_content if isinstance(json_content, list) else [json_content]
+
     @staticmethod
     def group_chapters(list_of_chapters):
         scanlation_groups = []
@@ -16,43 +32,50 @@ class ChapterEntityDB(BaseEntityDB[list[ChapterEntity]]):
             if chapter.translated_language != "en":
                 continue
             # Some chapters are not numbered, these are errors in the databases
-            if chapter.chapter_number is None:
+            chapter_number = chapter.chapter_number
+            if chapter_number is None:
                 continue
-            grouped_chapters[chapter.chapter_number].append(chapter)
+            grouped_chapters[chapter_number].append(chapter)
             scanlation_groups.append(chapter.scanlation_group)
         return grouped_chapters, scanlation_groups
 
     @staticmethod
     def get_priority_scanlation_groups(scanlation_groups):
         """For groups with same frequency they are sorted in descending alphabetic order"""
-        scanlation_group_frequency = {group: scanlation_groups.count(group) for group in scanlation_groups}
+        scanlation_group_frequency = Counter(scanlation_groups)
         priority_groups = [
             group
-            for _, group in sorted(
-                [(value, group) for group, value in scanlation_group_frequency.items()], reverse=True
+            for group, _ in sorted(
+                scanlation_group_frequency.items(), key=lambda item: (item[1], item[0]), reverse=True
             )
         ]
-        if "official" in priority_groups:
-            priority_groups.insert(0, priority_groups.pop(priority_groups.index("official")))
+        if "official" in scanlation_group_frequency:
+            priority_groups.remove("official")
+            priority_groups.insert(0, "official")
         return priority_groups
 
+    @staticmethod
+    def select_priority_entry(entries, group_ranks: dict[str, int]):
+        """The entry from the highest ranked group, between entries of the same group the first one wins."""
+        if len(entries) == 1:
+            return entries[0]
+        selected = None
+        selected_rank = len(group_ranks)
+        for entry in entries:
+            rank = group_ranks.get(entry.scanlation_group, selected_rank)
+            if rank < selected_rank:
+                selected, selected_rank = entry, rank
+        return selected
+
     @staticmethod
     def filter_chapters_by_priority_scanlation_groups(grouped_chapters, priority_groups):
+        group_ranks = {group: rank for rank, group in enumerate(priority_groups)}
         filtered_chapters = []
         for key in sorted(grouped_chapters.keys()):
-            entries = grouped_chapters[key]
-            if len(entries) == 1:
-                filtered_chapters.append(entries[0])
-            else:
-                for group in priority_groups:
-                    entry = next((entry for entry in entries if entry.scanlation_group == group), None)
-                    if entry is not None:
-                        filtered_chapters.append(entry)
-                        break
-
-        if len(filtered_chapters) != len(grouped_chapters.keys()):
-            raise ValueError("Chapter entries are not being filtered correctly")
-
+            entry = ChapterEntityDB.select_priority_entry(grouped_chapters[key], group_ranks)
+            if entry is None:
+                raise ValueError("Chapter entries are not being filtered correctly")
+            filtered_chapters.append(entry)
         return filtered_chapters
 
     @staticmethod
@@ -65,46 +88,96 @@ class ChapterEntityDB(BaseEntityDB[list[ChapterEntity]]):
 
         return filtered_chapters
 
+    @staticmethod
+    def merge_chapters(existing_chapters: ChapterTable, list_of_chapters) -> ChapterTable:
+        """Merge newly fetched chapters into a stored table.
+
+        Only the chapter numbers that received new entries are decided again, the other stored rows are copied across
+        without building their entities. Group priority still counts the stored chapters along with the new ones and
+        new entries come first, so the result matches deduplicating the new chapters followed by the stored ones.
+        """
+        grouped_chapters, scanlation_groups = ChapterEntityDB.group_chapters(list_of_chapters)
+        existing_rows = defaultdict(list)
+        for position, chapter_number in enumerate(existing_chapters.numbers):
+            if math.isnan(chapter_number) or existing_chapters.labels[existing_chapters.languages[position]] != "en":
+                continue
+            existing_rows[chapter_number].append(position)
+            scanlation_groups.append(existing_chapters.scanlation_group(position))
+        priority_groups = ChapterEntityDB.get_priority_scanlation_groups(scanlation_groups)
+        group_ranks = {group: rank for rank, group in enumerate(priority_groups)}
+
+        merged_chapters = ChapterTable()
+        for key in sorted(grouped_chapters.keys() | existing_rows.keys()):
+            positions = existing_rows.get(key, [])
+            if key not in grouped_chapters and len(positions) == 1:
+                merged_chapters.append_row(existing_chapters, positions[0])
+                continue
+            entries = grouped_chapters.get(key, []) + [existing_chapters.chapter(position) for position in positions]
+            entry = ChapterEntityDB.select_priority_entry(entries, group_ranks)
+            if entry is None:
+                raise ValueError("Chapter entries are not being filtered correctly")
+            merged_chapters.append(entry)
+        return merged_chapters
+
+    def fetch(self, entity_id: str, **kwargs) -> list[Any]:
+        """Fetch the chapters of an entity from where its stored table left off.
+
+        The stored chapters give the cursor, the latest update date from the plugin in use and the known chapter ids,
+        so only new or changed chapters are fetched, store() then merges them into the table.
+        """
+        chapters = self.database.get(entity_id)
+        if chapters is not None:
+            plugin_type = kwargs.get("plugin_type", Plugins.DEFAULT)
+            kwargs["updated_since"] = chapters.last_updated(plugin_type)
+            kwargs["known_ids"] = frozenset(chapters.ids)
+        return super().fetch(entity_id, **kwargs)
+
     def format_content_for_entity(self, content, entity_id: str):
         existing_chapters = self.database.get(entity_id)
         if existing_chapters is not None:
-            content.extend(existing_chapters)
-        filtered_content = self.remove_chapter_duplicate_entries(content)
-        return filtered_content
+            return self.merge_chapters(existing_chapters, content)
+        return ChapterTable.from_entities(self.remove_chapter_duplicate_entries(content))
 
-    def download(self, entity_id: str, chapter_id: str, filepath: str):
+    def download(self, entity_id: str, chapter_id: str, cbz_writer: CbzWriter):
         chapters = self[entity_id]
         if chapters is None:
             raise EnvironmentError(f"No chapters found for entity {entity_id}")
 
-        chapter = next(iter(c for c in chapters if c.entity_id == chapter_id), None)
-        if chapter is not None:
-            return chapter.download_chapter(filepath)
+        position = chapters.position_of(chapter_id)
+        if position is not None:
+            return chapters.chapter(position).download_chapter(cbz_writer)
 
         raise EnvironmentError(f"Chapter {chapter_id} not found for {entity_id}")
 
     def get_latest_chapter(self, entity_id) -> ChapterEntity | None:
         chapters = self.database.get(entity_id)
-        if chapters is None:
+        if chapters is None or len(chapters) == 0:
             return None
 
-        latest_chapter = None
-        for chapter in chapters:
-            if latest_chapter is None or (
-                chapter.chapter_number is not None
-                and latest_chapter.chapter_number is not None
-                and chapter.chapter_number > latest_chapter.chapter_number
-            ):
-                latest_chapter = chapter
-        return latest_chapter
+        # The first chapter is kept unless a later numbered chapter is higher, NaN comparisons are always False
+        latest_position = 0
+        for position, chapter_number in enumerate(chapters.numbers):
+            if chapter_number > chapters.numbers[latest_position]:
+                latest_position = position
+        return chapters.chapter(latest_position)
 
     def get_max_chapter_number(self, entity_id) -> float:
         chapters = self.database.get(entity_id)
         if chapters is None:
             return 0.0
+        return max([0.0] + [number for number in chapters.numbers if not math.isnan(number)])
 
-        max_chapter_number = 0.0
-        for chapter in chapters:
-            if chapter.chapter_number is not None and chapter.chapter_number > max_chapter_number:
-                max_chapter_number = chapter.chapter_number
-        return max_chapter_number
+    def get_chapter_ids(self, entity_id) -> list[str | None]:
+        chapters = self.database.get(entity_id)
+        return [] if chapters is None else list(chapters.ids)
+
+    def get_missing_chapters(self, entity_id, entity_downloads) -> list[ChapterEntity]:
+        """Build the chapters missing from entity_downloads, without building the downloaded ones."""
+        chapters = self.database.get(entity_id)
+        if chapters is None:
+            return []
+        return [
+            chapters.chapter(position)
+            for position, chapter_id in enumerate(chapters.ids)
+            if (entity_id, chapter_id) not in entity_downloads
+        ]
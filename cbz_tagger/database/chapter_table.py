@@ -0,0 +1,252 @@
+"""Columnar storage for the chapters of a series.
+
+Series can list thousands of chapters, and keeping each one as the full API response made the chapter section the
+bulk of the database in memory and on disk. A ChapterTable keeps only the fields tagging and downloading use, one
+column per field, with the repeated strings (plugin type, language, scanlation group) interned per table. A
+ChapterEntity is only built when a chapter is actually needed, for example to download it.
+"""
+
+import hashlib
+import json
+import math
+from array import array
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+
+from cbz_tagger.entities.chapter_entity import ChapterEntity
+
+CHAPTER_TABLE_VERSION = 1
+# Sentinels for values missing from a chapter, array columns can't hold None
+MISSING_PAGES = -(2**31)
+MISSING_TIMESTAMP = -(2**63)
+NAIVE_OFFSET = -(2**15)
+
+
+def to_chapter_text(number: float) -> str:
+    if math.isnan(number):
+        return "none"
+    if number.is_integer():
+        return f"{int(number)}"
+    return repr(number)
+
+
+def to_timestamp(updated: datetime | None) -> tuple[int, int]:
+    """Seconds since the epoch and the UTC offset in minutes, so the original date can be rebuilt."""
+    if updated is None:
+        return MISSING_TIMESTAMP, NAIVE_OFFSET
+    offset = updated.utcoffset()
+    if offset is None:
+        return int(updated.replace(tzinfo=timezone.utc).timestamp()), NAIVE_OFFSET
+    return int(updated.timestamp()), int(offset.total_seconds() // 60)
+
+
+def from_timestamp(timestamp: int, offset: int) -> datetime | None:
+    if timestamp == MISSING_TIMESTAMP:
+        return None
+    if offset == NAIVE_OFFSET:
+        return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+    return datetime.fromtimestamp(timestamp, timezone(timedelta(minutes=offset)))
+
+
+class ChapterTable(Sequence[ChapterEntity]):
+    """The chapters of one series stored column by column, indexing or iterating it builds ChapterEntity objects."""
+
+    __slots__ = (
+        "labels",
+        "label_index",
+        "ids",
+        "types",
+        "numbers",
+        "volumes",
+        "languages",
+        "groups",
+        "pages",
+        "updated",
+        "offsets",
+        "urls",
+    )
+
+    def __init__(self):
+        # Distinct plugin types, languages and scanlation groups, the label columns hold positions in this list
+        self.labels: list[str | None] = []
+        self.label_index: dict[str | None, int] = {}
+        self.ids: list[str | None] = []
+        self.types = array("I")
+        self.numbers = array("d")
+        self.volumes: list[str | None] = []
+        self.languages = array("I")
+        self.groups = array("I")
+        self.pages = array("l")
+        self.updated = array("q")
+        self.offsets = array("h")
+        self.urls: list[str | None] = []
+
+    def intern(self, label: str | None) -> int:
+        position = self.label_index.get(label)
+        if position is None:
+            position = len(self.labels)
+            self.labels.append(label)
+            self.label_index[label] = position
+        return position
+
+    def append(self, chapter: ChapterEntity) -> None:
+        attributes = chapter.attributes
+        chapter_number = chapter.chapter_number
+        pages = attributes.get("pages")
+        try:
+            updated = chapter.updated_date
+        except ValueError:
+            updated = None
+        timestamp, offset = to_timestamp(updated)
+
+        self.ids.append(chapter.entity_id)
+        self.types.append(self.intern(chapter.entity_type))
+        self.numbers.append(math.nan if chapter_number is None else chapter_number)
+        self.volumes.append(attributes.get("volume"))
+        self.languages.append(self.intern(chapter.translated_language))
+        self.groups.append(self.intern(chapter.scanlation_group))
+        self.pages.append(MISSING_PAGES if pages is None else int(pages))
+        self.updated.append(timestamp)
+        self.offsets.append(offset)
+        self.urls.append(attributes.get("url"))
+
+    @classmethod
+    def from_entities(cls, chapters: Iterable[ChapterEntity]) -> "ChapterTable":
+        table = cls()
+        for chapter in chapters:
+            table.append(chapter)
+        return table
+
+    def append_row(self, table: "ChapterTable", position: int) -> None:
+        """Copy a row from another table without building its ChapterEntity."""
+        self.ids.append(table.ids[position])
+        self.types.append(self.intern(table.labels[table.types[position]]))
+        self.numbers.append(table.numbers[position])
+        self.volumes.append(table.volumes[position])
+        self.languages.append(self.intern(table.labels[table.languages[position]]))
+        self.groups.append(self.intern(table.labels[table.groups[position]]))
+        self.pages.append(table.pages[position])
+        self.updated.append(table.updated[position])
+        self.offsets.append(table.offsets[position])
+        self.urls.append(table.urls[position])
+
+    def take(self, positions: Iterable[int]) -> "ChapterTable":
+        table = ChapterTable()
+        for position in positions:
+            table.append_row(self, position)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, position):  # type: ignore[override]
+        if isinstance(position, slice):
+            return self.take(range(len(self))[position])
+        return self.chapter(range(len(self))[position])
+
+    def __iter__(self) -> Iterator[ChapterEntity]:
+        return (self.chapter(position) for position in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} chapters)"
+
+    def chapter(self, position: int) -> ChapterEntity:
+        """Build the ChapterEntity for one row."""
+        pages = self.pages[position]
+        updated = from_timestamp(self.updated[position], self.offsets[position])
+        attributes: dict[str, Any] = {
+            "chapter": to_chapter_text(self.numbers[position]),
+            "volume": self.volumes[position],
+            "translatedLanguage": self.labels[self.languages[position]],
+            "pages": None if pages == MISSING_PAGES else pages,
+            "updatedAt": None if updated is None else updated.isoformat(),
+        }
+        if self.urls[position] is not None:
+            attributes["url"] = self.urls[position]
+        return ChapterEntity(
+            {
+                "id": self.ids[position],
+                "type": self.labels[self.types[position]],
+                "attributes": attributes,
+                "relationships": [{"type": "scanlation_group", "id": self.labels[self.groups[position]]}],
+            }
+        )
+
+    def position_of(self, chapter_id: str) -> int | None:
+        try:
+            return self.ids.index(chapter_id)
+        except ValueError:
+            return None
+
+    def last_updated(self, plugin_type: str) -> datetime | None:
+        """The latest update date of the stored chapters from a plugin, the point its feed can be read again from."""
+        label = self.label_index.get(plugin_type)
+        if label is None:
+            return None
+        timestamps = [
+            timestamp
+            for timestamp, chapter_type in zip(self.updated, self.types, strict=True)
+            if chapter_type == label and timestamp != MISSING_TIMESTAMP
+        ]
+        return datetime.fromtimestamp(max(timestamps), timezone.utc) if timestamps else None
+
+    def scanlation_group(self, position: int) -> str:
+        return self.labels[self.groups[position]]  # type: ignore[return-value]
+
+    def to_content(self) -> dict[str, Any]:
+        return {
+            "version": CHAPTER_TABLE_VERSION,
+            "labels": self.labels,
+            "ids": self.ids,
+            "types": self.types.tolist(),
+            "numbers": [None if math.isnan(number) else number for number in self.numbers],
+            "volumes": self.volumes,
+            "languages": self.languages.tolist(),
+            "groups": self.groups.tolist(),
+            "pages": [None if pages == MISSING_PAGES else pages for pages in self.pages],
+            "updated": [None if timestamp == MISSING_TIMESTAMP else timestamp for timestamp in self.updated],
+            "offsets": [None if offset == NAIVE_OFFSET else offset for offset in self.offsets],
+            "urls": self.urls,
+        }
+
+    @classmethod
+    def from_content(cls, content: dict[str, Any]) -> "ChapterTable":
+        table = cls()
+        table.labels = content["labels"]
+        table.label_index = {label: position for position, label in enumerate(table.labels)}
+        table.ids = content["ids"]
+        table.types = array("I", content["types"])
+        table.numbers = array("d", (math.nan if number is None else number for number in content["numbers"]))
+        table.volumes = content["volumes"]
+        table.languages = array("I", content["languages"])
+        table.groups = array("I", content["groups"])
+        table.pages = array("l", (MISSING_PAGES if pages is None else pages for pages in content["pages"]))
+        table.updated = array(
+            "q", (MISSING_TIMESTAMP if timestamp is None else timestamp for timestamp in content["updated"])
+        )
+        table.offsets = array("h", (NAIVE_OFFSET if offset is None else offset for offset in content["offsets"]))
+        table.urls = content["urls"]
+        return table
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_content(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, json_str: str | list[str]) -> "ChapterTable":
+        """Load a stored table, or a list of chapter responses saved before chapters were stored as tables."""
+        items = json_str if isinstance(json_str, list) else [json_str]
+        if len(items) == 1:
+            content = json.loads(items[0])
+            if isinstance(content, dict) and "ids" in content:
+                return cls.from_content(content)
+        return cls.from_entities(ChapterEntity.from_json(item) for item in items)
+
+    def to_hash(self) -> str:
+        sha_1 = hashlib.sha1()
+        sha_1.update(self.to_json().encode("utf-8"))
+        return sha_1.hexdigest()
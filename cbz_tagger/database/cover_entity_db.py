@@ -1,10 +1,9 @@
 import logging
 import os
-from io import BytesIO
+from collections.abc import MutableMapping
 from os import path
 
-from PIL import Image
-
+from cbz_tagger.common.images import write_jpeg
 from cbz_tagger.database.base_db import BaseEntityDB
 from cbz_tagger.entities.cover_entity import CoverEntity
 
@@ -13,7 +12,7 @@ logger = logging.getLogger()
 
 class CoverEntityDB(BaseEntityDB[list[CoverEntity]]):
     entity_class = CoverEntity
-    database: dict[str, list[CoverEntity]]
+    database: MutableMapping[str, list[CoverEntity]]
     query_param_field: str = "manga[]"
 
     def get_indexed_covers(self) -> list[tuple[str, str]]:
@@ -84,10 +83,7 @@ class CoverEntityDB(BaseEntityDB[list[CoverEntity]]):
             if not path.exists(image_path):
                 logger.info("Downloading: %s", cover.cover_url)
                 image = cover.download_file(cover.cover_url)
-                in_memory_image = Image.open(BytesIO(image))
-                if in_memory_image.format != "JPEG":
-                    in_memory_image = in_memory_image.convert("RGB")
-                in_memory_image.save(image_path, quality=95, optimize=True)
+                write_jpeg(image, image_path)
 
     def get_cover_for_volume(self, entity_id, volume, default_cover_art_id):
         covers = self[entity_id]
@@ -1,30 +1,60 @@
+import copy
+import functools
 import json
 import logging
 import os
 import re
-import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Any
-from xml.dom import minidom
-from xml.etree import ElementTree
-from zipfile import ZIP_DEFLATED
+from zipfile import BadZipFile
 from zipfile import ZipFile
 
+from cbz_tagger.common.cbz_writer import CbzWriter
+from cbz_tagger.common.cbz_writer import replace_members
 from cbz_tagger.common.enums import Urls
+from cbz_tagger.common.env import AppEnv
 from cbz_tagger.common.input import InputEntity
 from cbz_tagger.common.input import console_selector
 from cbz_tagger.common.permissions import make_directory_with_ownership
 from cbz_tagger.common.permissions import set_file_ownership
 from cbz_tagger.common.plugins import Plugins
 from cbz_tagger.database.author_entity_db import AuthorEntityDB
+from cbz_tagger.database.chapter_download_scheduler import ChapterDownloadScheduler
 from cbz_tagger.database.chapter_entity_db import ChapterEntityDB
 from cbz_tagger.database.cover_entity_db import CoverEntityDB
+from cbz_tagger.database.entity_journal import EntityJournal
+from cbz_tagger.database.entity_sqlite import EntitySqliteStore
 from cbz_tagger.database.metadata_entity_db import MetadataEntityDB
 from cbz_tagger.database.volume_entity_db import VolumeEntityDB
+from cbz_tagger.entities.cbz_entity import CbzEntity
 
 logger = logging.getLogger()
 
+COMIC_INFO_HEADER = (
+    '<?xml version="1.0" ?>\n'
+    '<ComicInfo xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">\n'
+)
+COMIC_INFO_FOOTER = "</ComicInfo>\n"
+
+
+def to_xml_element(tag: str, value) -> str:
+    """One indented ComicInfo.xml element, written the way minidom pretty prints a text only element."""
+    if value is None:
+        return ""
+    # An XML parser normalizes line endings, so they never reached the pretty printer
+    text = f"{value}".replace("\r\n", "\n").replace("\r", "\n")
+    if not text:
+        return f"\t<{tag}/>\n"
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return f"\t<{tag}>{text}</{tag}>\n"
+
 
 class EntityDB:
+    entity_sections = ("metadata", "covers", "authors", "volumes", "chapters")
+    prefetch_workers = 4
+
     def __init__(
         self,
         root_path: str,
@@ -53,6 +83,17 @@ class EntityDB:
         self.volumes: VolumeEntityDB = VolumeEntityDB() if volumes is None else volumes
         self.chapters: ChapterEntityDB = ChapterEntityDB() if volumes is None else chapters
 
+        self.storage = self.get_storage(root_path)
+        # State as of the last save or load, None until the database has been synced with the files on disk
+        self._persisted: dict[str, Any] | None = None
+        # Version of the files on disk this instance last loaded or wrote
+        self.storage_version: tuple | None = None
+        # save() calls made inside deferred_saves() are collapsed into one save when the outermost block exits
+        self._deferred_saves = 0
+        self._save_pending = False
+        # ComicInfo.xml templates per entity id, keyed by the hashes of the metadata and authors they were built from
+        self.xml_templates: dict[str, tuple[tuple[str, str, str], tuple[str, str]]] = {}
+
     def __getitem__(self, manga_name) -> str | None:
         return self.entity_map.get(manga_name)
 
@@ -70,41 +111,190 @@ class EntityDB:
     def has_tracked_entities(self) -> bool:
         return len(self.entity_tracked) > 0
 
+    @staticmethod
+    def get_storage(root_path: str) -> EntityJournal | EntitySqliteStore:
+        if AppEnv.DATABASE_BACKEND == "sqlite":
+            return EntitySqliteStore(root_path)
+        return EntityJournal(root_path)
+
     def save(self) -> None:
-        entity_db_path = os.path.join(self.root_path, "entity_db.json")
-        entity_database_json = self.to_json()
+        """Write the changes since the last save to storage, rewriting the whole database only when needed."""
+        if self._deferred_saves > 0:
+            self._save_pending = True
+            return
+        if self._persisted is None or self.storage.should_compact():
+            self.compact()
+            return
 
-        os.makedirs(self.root_path, exist_ok=True)
-        with open(entity_db_path, "w", encoding="UTF-8") as write_file:
-            write_file.write(entity_database_json)
+        record = self.to_journal_record(self._persisted)
+        if record:
+            self.storage.append(record)
+            self.storage_version = self.storage.version()
+        self._persisted = self.to_snapshot()
 
-    def to_json(self):
+    @contextmanager
+    def deferred_saves(self):
+        """Batch the saves of a run of updates into a single write when the block exits."""
+        self._deferred_saves += 1
+        try:
+            yield self
+        finally:
+            self._deferred_saves -= 1
+            if self._deferred_saves == 0 and self._save_pending:
+                self._save_pending = False
+                self.save()
+
+    def compact(self) -> None:
+        """Rewrite storage with the full database and clear any pending journal records."""
+        self.storage.write_snapshot(self)
+        self.storage_version = self.storage.version()
+        self._persisted = self.to_snapshot()
+
+    @property
+    def is_stale(self) -> bool:
+        """True when the files on disk were changed by something other than this instance."""
+        return self.storage.version() != self.storage_version
+
+    def to_snapshot(self) -> dict[str, Any]:
+        snapshot: dict[str, Any] = {
+            "entity_map": dict(self.entity_map),
+            "entity_names": dict(self.entity_names),
+            "entity_downloads": set(self.entity_downloads),
+            "entity_tracked": set(self.entity_tracked),
+            "entity_chapter_plugin": copy.deepcopy(self.entity_chapter_plugin),
+        }
+        for section in self.entity_sections:
+            snapshot[section] = getattr(self, section).snapshot()
+        return snapshot
+
+    @staticmethod
+    def _dict_changes(previous: dict, current: dict) -> dict[str, Any]:
+        updated = {key: value for key, value in current.items() if key not in previous or previous[key] != value}
+        deleted = [key for key in previous if key not in current]
+        if len(updated) == 0 and len(deleted) == 0:
+            return {}
+        return {"updated": updated, "deleted": deleted}
+
+    @staticmethod
+    def _set_changes(previous: set, current: set) -> dict[str, Any]:
+        added = sorted(current - previous)
+        removed = sorted(previous - current)
+        if len(added) == 0 and len(removed) == 0:
+            return {}
+        return {"added": added, "removed": removed}
+
+    def to_journal_record(self, snapshot: dict[str, Any]) -> dict[str, Any]:
+        changes = {
+            "entity_map": self._dict_changes(snapshot["entity_map"], self.entity_map),
+            "entity_names": self._dict_changes(snapshot["entity_names"], self.entity_names),
+            "entity_downloads": self._set_changes(snapshot["entity_downloads"], self.entity_downloads),
+            "entity_tracked": self._set_changes(snapshot["entity_tracked"], self.entity_tracked),
+            "entity_chapter_plugin": self._dict_changes(snapshot["entity_chapter_plugin"], self.entity_chapter_plugin),
+        }
+        for section in self.entity_sections:
+            changes[section] = getattr(self, section).to_changes(snapshot[section])
+        return {key: value for key, value in changes.items() if value}
+
+    def apply_journal_record(self, record: dict[str, Any]) -> None:
+        for key in ("entity_map", "entity_names", "entity_chapter_plugin"):
+            content = getattr(self, key)
+            content.update(record.get(key, {}).get("updated", {}))
+            for deleted_key in record.get(key, {}).get("deleted", []):
+                content.pop(deleted_key, None)
+
+        downloads = record.get("entity_downloads", {})
+        self.entity_downloads.update(tuple(item) for item in downloads.get("added", []))
+        self.entity_downloads.difference_update(tuple(item) for item in downloads.get("removed", []))
+
+        tracked = record.get("entity_tracked", {})
+        self.entity_tracked.update(tracked.get("added", []))
+        self.entity_tracked.difference_update(tracked.get("removed", []))
+
+        for section in self.entity_sections:
+            if section in record:
+                getattr(self, section).apply_changes(record[section])
+
+    def to_content(self) -> dict[str, Any]:
         content = {
             "entity_map": self.entity_map,
             "entity_names": self.entity_names,
             "entity_downloads": list(self.entity_downloads),
             "entity_tracked": list(self.entity_tracked),
             "entity_chapter_plugin": self.entity_chapter_plugin,
-            "metadata": self.metadata.to_json(),
-            "covers": self.covers.to_json(),
-            "authors": self.authors.to_json(),
-            "volumes": self.volumes.to_json(),
-            "chapters": self.chapters.to_json(),
         }
+        for section in self.entity_sections:
+            content[section] = getattr(self, section).to_content()
+        return content
+
+    def to_json(self):
+        content = self.to_content()
+        # Each entity section is stored as a nested json string for backwards compatibility
+        for section in self.entity_sections:
+            content[section] = json.dumps(content[section])
         return json.dumps(content)
 
     @classmethod
-    def load(cls, root_path) -> "EntityDB":
-        entity_db_path = os.path.join(root_path, "entity_db.json")
-        if os.path.exists(entity_db_path):
-            with open(entity_db_path, "r", encoding="UTF-8") as read_file:
-                json_data = read_file.read()
-            return EntityDB.from_json(root_path, json_data)
-        return EntityDB(root_path)
+    def load(cls, root_path, read_only=False) -> "EntityDB":
+        """Load the database, a read_only copy never writes to storage and must not be saved."""
+        storage = cls.get_storage(root_path)
+        if isinstance(storage, EntitySqliteStore) and not storage.exists() and EntityJournal(root_path).exists():
+            if read_only:
+                return cls.load_from_storage(root_path, EntityJournal(root_path), read_only=True)
+            return cls.migrate_to_sqlite(root_path)
+        return cls.load_from_storage(root_path, storage, read_only=read_only)
+
+    @classmethod
+    def load_from_storage(cls, root_path, storage: EntityJournal | EntitySqliteStore, read_only=False) -> "EntityDB":
+        # Taken before reading so a write that lands while loading marks this instance as stale
+        storage_version = storage.version()
+        if isinstance(storage, EntitySqliteStore):
+            # Each series is read from the database the first time it is used, not all of them up front
+            content = storage.read_content(deferred=True)
+            reader = storage.read_entity
+        else:
+            content = storage.read_content()
+            reader = None
+        if content is None:
+            entity_db = EntityDB(root_path)
+            entity_db.storage_version = storage_version
+            return entity_db
+
+        entity_db = EntityDB.from_content(root_path, content, reader=reader)
+        entity_db.storage = storage
+        entity_db.storage_version = storage_version
+        for record in storage.read_records(truncate=not read_only):
+            entity_db.apply_journal_record(record)
+        entity_db._persisted = entity_db.to_snapshot()
+        return entity_db
+
+    @classmethod
+    def migrate_to_sqlite(cls, root_path) -> "EntityDB":
+        """One-shot migration of entity_db.json and its journal into entity_db.sqlite.
+
+        The json files are left untouched so the previous backend can still be used as a fallback.
+        """
+        logger.info("Migrating entity database in %s to sqlite...", root_path)
+        entity_db = cls.load_from_storage(root_path, EntityJournal(root_path))
+        entity_db.storage = EntitySqliteStore(root_path)
+        entity_db.compact()
+        logger.info("Migrated %s entities to sqlite.", len(entity_db))
+        return entity_db
 
     @classmethod
     def from_json(cls, root_path, json_data):
-        content = json.loads(json_data)
+        return cls.from_content(root_path, json.loads(json_data))
+
+    @classmethod
+    def from_content(cls, root_path, content, reader=None):
+        """Build the database from stored content, entities stored as None are read with reader(section, entity_id)."""
+
+        def load_section(entity_db_class, section):
+            section_content = content.get(section, {})
+            if isinstance(section_content, str):
+                section_content = json.loads(section_content)
+            section_reader = None if reader is None else functools.partial(reader, section)
+            return entity_db_class.from_content(section_content, reader=section_reader)
+
         return cls(
             root_path=root_path,
             entity_map=content["entity_map"],
@@ -112,11 +302,11 @@ class EntityDB:
             entity_downloads=set(tuple(item) for item in content.get("entity_downloads", [])),
             entity_tracked=set(content.get("entity_tracked", [])),
             entity_chapter_plugin=content.get("entity_chapter_plugin", {}),
-            metadata=MetadataEntityDB.from_json(content["metadata"]),
-            covers=CoverEntityDB.from_json(content["covers"]),
-            authors=AuthorEntityDB.from_json(content["authors"]),
-            volumes=VolumeEntityDB.from_json(content["volumes"]),
-            chapters=ChapterEntityDB.from_json(content.get("chapters", "{}")),
+            metadata=load_section(MetadataEntityDB, "metadata"),
+            covers=load_section(CoverEntityDB, "covers"),
+            authors=load_section(AuthorEntityDB, "authors"),
+            volumes=load_section(VolumeEntityDB, "volumes"),
+            chapters=load_section(ChapterEntityDB, "chapters"),
         )
 
     def to_state(self):
@@ -198,9 +388,9 @@ class EntityDB:
             self.entity_tracked.add(entity_id)
             if mark_as_tracked:
                 logger.info("Marking all chapters as downloaded. %s (%s)", entity_name, entity_id)
-                chapters = self.chapters[entity_id]
-                if chapters is not None:
-                    self.entity_downloads.update((entity_id, chapter.entity_id) for chapter in chapters)
+                self.entity_downloads.update(
+                    (entity_id, chapter_id) for chapter_id in self.chapters.get_chapter_ids(entity_id)
+                )
             else:
                 logger.info("No chapters marked as downloaded. %s (%s)", entity_name, entity_id)
 
@@ -274,7 +464,7 @@ class EntityDB:
 
     def set_downloaded_chapters(self, entity_id, downloaded_chapter_ids):
         """Reconcile the downloaded chapters for an entity to match the given set in a single save()."""
-        known = {c.entity_id for c in (self.chapters[entity_id] or [])}
+        known = set(self.chapters.get_chapter_ids(entity_id))
         desired = set(downloaded_chapter_ids) & known
         current = {c for (e, c) in self.entity_downloads if e == entity_id}
         to_add = desired - current
@@ -332,24 +522,11 @@ class EntityDB:
         manga_name = self.entity_names.get(entity_id)
         if entity_id is not None:
             try:
-                chapter_plugin = self.entity_chapter_plugin.get(entity_id, {})
                 logger.debug("Checking for updates %s: %s", manga_name, entity_id)
 
                 if update_metadata:
                     self.metadata.update(entity_id)
-                    self.chapters.update(entity_id, **chapter_plugin)
-
-                # Update the collections
-                logger.info("Updating %s: %s", manga_name, entity_id)
-                self.volumes.update(entity_id)
-                self.covers.update(entity_id)
-
-                metadata = self.metadata[entity_id]
-                if metadata is not None:
-                    self.authors.update(metadata.author_entities)
-
-                # Update missing covers
-                self.covers.download(entity_id, self.image_db_path)
+                self.update_manga_entity_id_collections(entity_id, update_chapters=update_metadata)
 
                 # Save database on successful update, this makes each call slightly slower, but more reliable
                 # since the APIs are prone to crashing
@@ -358,6 +535,97 @@ class EntityDB:
             except EnvironmentError as err:
                 logger.info("API Down >> Unable to update %s metadata. %s", manga_name, err)
 
+    def update_manga_entity_id_collections(self, entity_id, update_chapters=True):
+        """Update everything but the metadata of an entity, without saving."""
+        manga_name = self.entity_names.get(entity_id)
+        if update_chapters:
+            chapter_plugin = self.entity_chapter_plugin.get(entity_id, {})
+            self.chapters.update(entity_id, **chapter_plugin)
+
+        # Update the collections
+        logger.info("Updating %s: %s", manga_name, entity_id)
+        self.volumes.update(entity_id)
+        self.covers.update(entity_id)
+
+        metadata = self.metadata[entity_id]
+        if metadata is not None:
+            self.authors.update(metadata.author_entities)
+
+        # Update missing covers
+        self.covers.download(entity_id, self.image_db_path)
+
+    def fetch_manga_entity_id_collections(self, entity_id) -> dict[str, list[Any]]:
+        """Request the chapters, volumes and covers of an entity without storing them, safe on a worker thread."""
+        chapter_plugin = self.entity_chapter_plugin.get(entity_id, {})
+        return {
+            "chapters": self.chapters.fetch(entity_id, **chapter_plugin),
+            "volumes": self.volumes.fetch(entity_id),
+            "covers": self.covers.fetch(entity_id),
+        }
+
+    def store_manga_entity_id_collections(self, entity_id, collections: dict[str, list[Any]]) -> None:
+        self.chapters.store(entity_id, collections["chapters"])
+        self.volumes.store(entity_id, collections["volumes"])
+        self.covers.store(entity_id, collections["covers"])
+
+    def prefetch_manga_names(self, manga_names, batch_size: int = 50) -> list[str]:
+        """Update every known series among manga_names in one pass, returning the names that were updated.
+
+        Metadata for all of them is fetched with batched requests. The remaining requests run concurrently, but
+        only this thread stores what they return, and the database is saved once at the end.
+        """
+        entity_ids = {
+            manga_name: self.entity_map[manga_name] for manga_name in manga_names if manga_name in self.entity_map
+        }
+        if not entity_ids:
+            return []
+
+        unique_entity_ids = sorted(set(entity_ids.values()))
+        logger.info("Prefetching metadata for %s series...", len(unique_entity_ids))
+        try:
+            for i in range(0, len(unique_entity_ids), batch_size):
+                self.metadata.update(unique_entity_ids[i : i + batch_size], batch_response=True)
+        except EnvironmentError as err:
+            logger.info("API Down >> Unable to prefetch metadata. %s", err)
+            return []
+
+        def attempt(request, item_id):
+            try:
+                return True, request(item_id)
+            except EnvironmentError as err:
+                logger.info("API Down >> Unable to update %s. %s", self.entity_names.get(item_id, item_id), err)
+                return False, None
+
+        with ThreadPoolExecutor(max_workers=self.prefetch_workers) as executor:
+
+            def run(request, item_ids):
+                return dict(zip(item_ids, executor.map(functools.partial(attempt, request), item_ids), strict=True))
+
+            updated = []
+            for entity_id, (success, collections) in run(
+                self.fetch_manga_entity_id_collections, unique_entity_ids
+            ).items():
+                if success:
+                    self.store_manga_entity_id_collections(entity_id, collections)
+                    updated.append(entity_id)
+
+            # Series often share authors, each one is only requested once
+            author_ids = {}
+            for entity_id in updated:
+                metadata = self.metadata[entity_id]
+                author_ids[entity_id] = set(metadata.author_entities) if metadata is not None else set()
+            authors = run(self.authors.fetch, sorted(set().union(*author_ids.values())))
+            for author_id, (success, content) in authors.items():
+                if success:
+                    self.authors.store(author_id, content)
+            updated = [entity_id for entity_id in updated if all(authors[a][0] for a in author_ids[entity_id])]
+
+            # Cover images only go to disk, the database is just read while they download
+            covers = run(functools.partial(self.covers.download, filepath=self.image_db_path), updated)
+            updated_ids = {entity_id for entity_id, (success, _) in covers.items() if success}
+        self.save()
+        return [manga_name for manga_name, entity_id in entity_ids.items() if entity_id in updated_ids]
+
     def refresh(self, storage_path):
         logger.info("Refreshing database...")
         entity_ids = sorted(self.metadata.keys())
@@ -366,10 +634,83 @@ class EntityDB:
             self.update_manga_entity_id(entity_id, update_metadata=False)
         self.download_missing_covers()
         self.remove_orphaned_covers()
+        if updated_entity_ids:
+            logger.debug("Retagging updated chapters...")
+            self.retag_chapters(storage_path, updated_entity_ids)
         logger.debug("Downloading missing chapters...")
         self.download_missing_chapters(storage_path)
         logger.info("Refresh complete.")
 
+    def retag_chapters(self, storage_path, entity_ids=None) -> int:
+        """Bring the ComicInfo.xml and cover of chapters already in storage in line with the current metadata.
+
+        Only archives whose tags actually changed are rewritten, and each series folder is visited once even when
+        several manga names map to the same entity. Returns the number of retagged archives.
+        """
+        entity_ids = set(self.entity_map.values()) if entity_ids is None else set(entity_ids)
+        # Downloads are stored under the manga name and scanned files under the entity name
+        series_paths: dict[str, str] = {}
+        for manga_name, entity_id in sorted(self.entity_map.items()):
+            if entity_id not in entity_ids:
+                continue
+            for series_name in (manga_name, self.entity_names.get(entity_id, manga_name)):
+                series_paths.setdefault(os.path.join(storage_path, series_name), manga_name)
+
+        retagged = 0
+        for series_path, manga_name in sorted(series_paths.items()):
+            if not os.path.isdir(series_path):
+                continue
+            for filename in sorted(os.listdir(series_path)):
+                if os.path.splitext(filename)[-1] != ".cbz":
+                    continue
+                try:
+                    if self.retag_chapter(manga_name, os.path.join(series_path, filename)):
+                        retagged += 1
+                except (BadZipFile, EnvironmentError, ValueError) as err:
+                    logger.error("Unable to retag %s: %s", filename, err)
+            self.update_mylar_series_json(manga_name, os.path.join(series_path, "series.json"))
+        logger.info("Retagged %s chapters.", retagged)
+        return retagged
+
+    def update_mylar_series_json(self, manga_name, mylar_series_json_path) -> bool:
+        """Write series.json only when its contents changed, returns True when it was written."""
+        mylar_series_json = self.to_mylar_series_json(manga_name)
+        if os.path.exists(mylar_series_json_path):
+            with open(mylar_series_json_path, "r", encoding="utf-8") as json_file:
+                if json_file.read() == mylar_series_json:
+                    return False
+        with open(mylar_series_json_path, "w", encoding="utf-8") as json_file:
+            json_file.write(mylar_series_json)
+        set_file_ownership(mylar_series_json_path)
+        return True
+
+    def retag_chapter(self, manga_name, cbz_filepath) -> bool:
+        cbz_entity = CbzEntity(os.path.join(manga_name, os.path.basename(cbz_filepath)))
+        chapter_number = cbz_entity.chapter_number
+        chapter_is_volume = cbz_entity.chapter_is_volume
+        entity_xml = self.to_xml_string(manga_name, chapter_number, chapter_is_volume).encode("utf-8")
+        cover_path = self.to_local_image_file(manga_name, chapter_number, chapter_is_volume)
+        cover_image = None
+        if cover_path is not None and os.path.exists(os.path.join(self.image_db_path, cover_path)):
+            with open(os.path.join(self.image_db_path, cover_path), "rb") as image_file:
+                cover_image = image_file.read()
+
+        members: dict[str, bytes | str] = {}
+        with ZipFile(cbz_filepath, "r") as zip_read:
+            current = {item.filename: item for item in zip_read.infolist()}
+            if "ComicInfo.xml" not in current or zip_read.read("ComicInfo.xml") != entity_xml:
+                members["ComicInfo.xml"] = entity_xml
+            if cover_image is not None and (
+                "000_cover.jpg" not in current or current["000_cover.jpg"].CRC != zlib.crc32(cover_image)
+            ):
+                members["000_cover.jpg"] = cover_image
+        if not members:
+            return False
+
+        logger.info("Retagging %s...", os.path.basename(cbz_filepath))
+        replace_members(cbz_filepath, members)
+        return True
+
     def remove_orphaned_covers(self):
         logger.debug("Cleaning orphaned covers...")
         self.covers.remove_orphaned_covers(self.image_db_path)
@@ -378,73 +719,83 @@ class EntityDB:
         logger.debug("Downloading missing covers...")
         self.covers.download_missing_covers(self.image_db_path)
 
+    def get_chapter_filepath(self, entity_id, chapter_item, storage_path) -> tuple[str, str]:
+        manga_name = next(iter(name for name, id in self.entity_map.items() if id == entity_id))
+        chapter_name = f"{manga_name} - Chapter {chapter_item.padded_chapter_string}"
+        return manga_name, os.path.join(storage_path, manga_name, chapter_name)
+
     def download_chapter(self, entity_id, chapter_item, storage_path):
         if (entity_id, chapter_item.entity_id) in self.entity_downloads:
             return
 
-        manga_name = next(iter(name for name, id in self.entity_map.items() if id == entity_id))
-        chapter_name = f"{manga_name} - Chapter {chapter_item.padded_chapter_string}"
-
-        chapter_filepath = os.path.join(storage_path, manga_name, chapter_name)
-        logger.info("Downloading %s...", chapter_name)
+        manga_name, chapter_filepath = self.get_chapter_filepath(entity_id, chapter_item, storage_path)
+        cbz_writer = CbzWriter(f"{chapter_filepath}.cbz")
+        logger.info("Downloading %s...", os.path.basename(chapter_filepath))
         try:
-            make_directory_with_ownership(chapter_filepath)
-            # Build the chapter metadata files
-            self.build_chapter_metadata(manga_name, chapter_item, chapter_filepath)
+            self.fetch_chapter_files(entity_id, chapter_item, manga_name, cbz_writer)
 
-            # Download the chapter images and write them to the folder
-            self.chapters.download(entity_id, chapter_item.entity_id, chapter_filepath)
+            # Move the finished chapter CBZ file into place
+            self.build_chapter_cbz(cbz_writer)
 
-            # Build the chapter CBZ file
-            self.build_chapter_cbz(chapter_filepath)
+            self.complete_chapter_download(entity_id, chapter_item, storage_path, manga_name, cbz_writer.filepath)
+        except EnvironmentError as err:
+            self.abort_chapter_download(entity_id, chapter_item, cbz_writer.filepath, err)
+        finally:
+            # Cleanup a partially written CBZ
+            cbz_writer.discard()
 
-            # Mark cbz creation as successful and save the database
-            self.entity_downloads.add((entity_id, chapter_item.entity_id))
-            self.save()
+    def fetch_chapter_files(self, entity_id, chapter_item, manga_name, cbz_writer: CbzWriter):
+        make_directory_with_ownership(os.path.dirname(cbz_writer.filepath))
+        # Build the chapter metadata files
+        self.build_chapter_metadata(manga_name, chapter_item, cbz_writer)
 
-            # Set the ownership of the file
-            set_file_ownership(f"{chapter_filepath}.cbz")
+        # Download the chapter images and write them to the CBZ
+        self.chapters.download(entity_id, chapter_item.entity_id, cbz_writer)
 
-            # Update the mylar series.json file
-            mylar_series_json = self.to_mylar_series_json(manga_name)
-            mylar_series_json_path = os.path.join(storage_path, manga_name, "series.json")
-            with open(mylar_series_json_path, "w", encoding="utf-8") as json_file:
-                json_file.write(mylar_series_json)
-            set_file_ownership(mylar_series_json_path)
+    @staticmethod
+    def fetch_chapter_pages(chapter_item, cbz_writer: CbzWriter):
+        """Download the pages of a chapter into its CBZ, only chapter_item is used so it is safe on a worker thread."""
+        make_directory_with_ownership(os.path.dirname(cbz_writer.filepath))
+        chapter_item.download_chapter(cbz_writer)
+
+    def complete_chapter_download(self, entity_id, chapter_item, storage_path, manga_name, cbz_filepath):
+        # Mark cbz creation as successful and save the database
+        self.entity_downloads.add((entity_id, chapter_item.entity_id))
+        self.save()
 
-        except EnvironmentError as err:
-            logger.error("Could not download chapter: %s, %s, %s", entity_id, chapter_item.entity_id, err)
-            if os.path.exists(f"{chapter_filepath}.cbz"):
-                logger.error("Removing CBZ: %s, %s", entity_id, chapter_item.entity_id)
-                os.remove(f"{chapter_filepath}.cbz")
-            if (entity_id, chapter_item.entity_id) in self.entity_downloads:
-                logger.error("Removing download record: %s, %s", entity_id, chapter_item.entity_id)
-                self.entity_downloads.discard((entity_id, chapter_item.entity_id))
-                self.save()
-        finally:
-            # Cleanup excess
-            shutil.rmtree(chapter_filepath)
+        # Set the ownership of the file
+        set_file_ownership(cbz_filepath)
+
+        # Update the mylar series.json file
+        mylar_series_json = self.to_mylar_series_json(manga_name)
+        mylar_series_json_path = os.path.join(storage_path, manga_name, "series.json")
+        with open(mylar_series_json_path, "w", encoding="utf-8") as json_file:
+            json_file.write(mylar_series_json)
+        set_file_ownership(mylar_series_json_path)
+
+    def abort_chapter_download(self, entity_id, chapter_item, cbz_filepath, err):
+        logger.error("Could not download chapter: %s, %s, %s", entity_id, chapter_item.entity_id, err)
+        if os.path.exists(cbz_filepath):
+            logger.error("Removing CBZ: %s, %s", entity_id, chapter_item.entity_id)
+            os.remove(cbz_filepath)
+        if (entity_id, chapter_item.entity_id) in self.entity_downloads:
+            logger.error("Removing download record: %s, %s", entity_id, chapter_item.entity_id)
+            self.entity_downloads.discard((entity_id, chapter_item.entity_id))
+            self.save()
 
-    def build_chapter_metadata(self, manga_name, chapter_item, chapter_filepath):
+    def build_chapter_metadata(self, manga_name, chapter_item, cbz_writer: CbzWriter):
         # Write the comicinfo.xml file
         entity_xml = self.to_xml_string(manga_name, chapter_item.chapter_string)
-        with open(os.path.join(chapter_filepath, "ComicInfo.xml"), "w", encoding="UTF-8") as write_file:
-            write_file.write(entity_xml)
+        cbz_writer.write("ComicInfo.xml", entity_xml)
 
         # Write the cover image
         cover_path = self.to_local_image_file(manga_name, chapter_item.chapter_string)
         entity_image_path = os.path.join(str(self.image_db_path), str(cover_path))
-        with open(os.path.join(chapter_filepath, "000_cover.jpg"), "wb") as write_file:
-            with open(entity_image_path, "rb") as read_file:
-                write_file.write(read_file.read())
-
-    def build_chapter_cbz(self, chapter_filepath):
-        cbz_files = sorted(f for f in os.listdir(chapter_filepath) if os.path.splitext(f)[-1] in (".jpg", ".xml"))
-        with ZipFile(f"{chapter_filepath}.cbz", "w", ZIP_DEFLATED) as zip_write:
-            for cbz_file in cbz_files:
-                if not os.path.exists(os.path.join(chapter_filepath, cbz_file)):
-                    raise EnvironmentError(f"Could not find file to add to CBZ: {cbz_file}")
-                zip_write.write(os.path.join(chapter_filepath, cbz_file), cbz_file)
+        cbz_writer.write_file(entity_image_path, "000_cover.jpg")
+
+    @staticmethod
+    def build_chapter_cbz(cbz_writer: CbzWriter):
+        cbz_writer.commit()
 
     @staticmethod
     def clean_entity_name(entity_name):
@@ -482,19 +833,14 @@ class EntityDB:
         cover_entity = self.covers.get_cover_for_volume(entity_id, volume, metadata.cover_art_id)
         return cover_entity.local_filename if cover_entity else None
 
-    def to_xml_tree(self, manga_name, chapter_number, chapter_is_volume=False) -> ElementTree.Element:
-        entity_id = self.entity_map.get(manga_name)
-        if entity_id is None:
-            raise ValueError(f"Could not find an entity for {manga_name}")
-
-        metadata = self.metadata[entity_id]
-        if metadata is None:
-            raise ValueError(f"Could not find metadata for entity {entity_id}")
-
-        # build a tree structure
-        root = ElementTree.Element("ComicInfo")
-        root.attrib["xmlns:xsi"] = "http://www.w3.org/2001/XMLSchema-instance"
-        root.attrib["xmlns:xsd"] = "http://www.w3.org/2001/XMLSchema"
+    def to_xml_template(self, entity_id, metadata) -> tuple[str, str]:
+        """ComicInfo.xml before and after the chapter specific fields, reused until the series metadata changes."""
+        author_hash = self.authors.to_hash(metadata.author_id)
+        artist_hash = self.authors.to_hash(metadata.artist_id)
+        key = (self.metadata.to_hash(entity_id), author_hash, artist_hash)
+        cached = self.xml_templates.get(entity_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
 
         # Lookup the authors
         author = self.authors[metadata.author_id]
@@ -503,15 +849,47 @@ class EntityDB:
         author_name = author.name if author else None
         artist_name = artist.name if artist else author_name
 
+        head = [
+            COMIC_INFO_HEADER,
+            to_xml_element("Series", metadata.title),
+            to_xml_element("LocalizedSeries", metadata.alt_title),
+        ]
+        tail = [
+            to_xml_element("Summary", metadata.description),
+            to_xml_element("Year", metadata.created_at.year),
+            to_xml_element("Month", metadata.created_at.month),
+            to_xml_element("Day", metadata.created_at.day),
+            to_xml_element("Writer", author_name),
+            to_xml_element("Penciller", artist_name),
+            to_xml_element("Inker", artist_name),
+            to_xml_element("Colorist", artist_name),
+            to_xml_element("Letterer", artist_name),
+            to_xml_element("CoverArtist", artist_name),
+            to_xml_element("LanguageISO", metadata.language),
+            to_xml_element("Manga", "Yes"),
+            to_xml_element("Genre", ",".join(metadata.genres)),
+            to_xml_element("AgeRating", metadata.age_rating),
+            to_xml_element("Web", f"https://{Urls.MDX}/title/{entity_id}"),
+            COMIC_INFO_FOOTER,
+        ]
+        template = ("".join(head), "".join(tail))
+        self.xml_templates[entity_id] = (key, template)
+        return template
+
+    def to_xml_string(self, manga_name, chapter_number, chapter_is_volume=False) -> str:
+        entity_id = self.entity_map.get(manga_name)
+        if entity_id is None:
+            raise ValueError(f"Could not find an entity for {manga_name}")
+
+        metadata = self.metadata[entity_id]
+        if metadata is None:
+            raise ValueError(f"Could not find metadata for entity {entity_id}")
+
         # Lookup volumes
         volume_entity = self.volumes[entity_id]
         if volume_entity is None:
             raise ValueError(f"Could not find volume data for entity {entity_id}")
 
-        def assign(cix_entry, md_entry):
-            if md_entry is not None:
-                ElementTree.SubElement(root, cix_entry).text = f"{md_entry}"
-
         if chapter_is_volume:
             volume = str(int(chapter_number))
             count = volume_entity.last_volume
@@ -521,32 +899,17 @@ class EntityDB:
             if metadata.completed:
                 count = metadata.last_chapter
 
-        assign("Series", metadata.title)
-        assign("LocalizedSeries", metadata.alt_title)
-        assign("Number", chapter_number)
-        assign("Count", count)
-        assign("Volume", volume)
-        assign("Summary", metadata.description)
-        assign("Year", metadata.created_at.year)
-        assign("Month", metadata.created_at.month)
-        assign("Day", metadata.created_at.day)
-        assign("Writer", author_name)
-        assign("Penciller", artist_name)
-        assign("Inker", artist_name)
-        assign("Colorist", artist_name)
-        assign("Letterer", artist_name)
-        assign("CoverArtist", artist_name)
-        assign("LanguageISO", metadata.language)
-        assign("Manga", "Yes")
-        assign("Genre", ",".join(metadata.genres))
-        assign("AgeRating", metadata.age_rating)
-        assign("Web", f"https://{Urls.MDX}/title/{entity_id}")
-        return root
-
-    def to_xml_string(self, manga_name, chapter_number, chapter_is_volume=False) -> str:
-        root = self.to_xml_tree(manga_name, chapter_number, chapter_is_volume)
-        xmlstr = minidom.parseString(ElementTree.tostring(root)).toprettyxml()
-        return xmlstr
+        # Only the chapter number, count and volume differ between the chapters of a series
+        head, tail = self.to_xml_template(entity_id, metadata)
+        return "".join(
+            (
+                head,
+                to_xml_element("Number", chapter_number),
+                to_xml_element("Count", count),
+                to_xml_element("Volume", volume),
+                tail,
+            )
+        )
 
     def to_mylar_series_json(self, manga_name) -> str:
         """Construct a Komga compatible series.json file"""
@@ -596,20 +959,14 @@ class EntityDB:
 
     def get_missing_chapters(self):
         missing_chapters = []
-        for entity_id, chapter_items in self.chapters.database.items():
+        for entity_id in self.chapters.keys():
             if entity_id not in self.entity_tracked:
                 continue
-            for chapter_item in chapter_items:
-                key = (entity_id, chapter_item.entity_id)
-                if key not in self.entity_downloads:
-                    missing_chapters.append((entity_id, chapter_item))
+            for chapter_item in self.chapters.get_missing_chapters(entity_id, self.entity_downloads):
+                missing_chapters.append((entity_id, chapter_item))
         return missing_chapters
 
     def download_missing_chapters(self, storage_path):
         missing_chapters = self.get_missing_chapters()
-        for entity_id, chapter_item in missing_chapters:
-            try:
-                self.download_chapter(entity_id, chapter_item, storage_path)
-            except EnvironmentError as err:
-                logger.error("Error occurred in chapter: %s, %s, %s", entity_id, chapter_item.entity_id, err)
+        ChapterDownloadScheduler(self, storage_path).run(missing_chapters)
         return missing_chapters
@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+from typing import TYPE_CHECKING
+from typing import Any
+
+if TYPE_CHECKING:
+    from cbz_tagger.database.entity_db import EntityDB
+
+logger = logging.getLogger()
+
+
+def file_version(filepath: str) -> tuple[int, int, int] | None:
+    """Identify the current state of a file by inode, modification time and size."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class EntityJournal:
+    """Append-only change log that sits next to entity_db.json.
+
+    Each save appends a single JSON line describing what changed since the previous save, so the cost of a save
+    grows with the size of the change rather than the size of the library. The journal is folded back into the
+    snapshot file by compaction once it has grown past the size of the snapshot itself.
+    """
+
+    snapshot_filename = "entity_db.json"
+    journal_filename = "entity_db.journal"
+    # Compact once the journal is larger than this fraction of the snapshot
+    compaction_ratio: float = 1.0
+    # Never compact tiny journals, replaying a few kilobytes on load is cheaper than rewriting the snapshot
+    compaction_min_bytes: int = 64 * 1024
+
+    def __init__(self, root_path: str) -> None:
+        self.root_path = root_path
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.root_path, self.snapshot_filename)
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.root_path, self.journal_filename)
+
+    @staticmethod
+    def _file_size(filepath: str) -> int:
+        try:
+            return os.path.getsize(filepath)
+        except OSError:
+            return 0
+
+    def should_compact(self) -> bool:
+        if not self.exists():
+            return True
+        journal_size = self._file_size(self.journal_path)
+        if journal_size < self.compaction_min_bytes:
+            return False
+        return journal_size > self._file_size(self.snapshot_path) * self.compaction_ratio
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path)
+
+    def version(self) -> tuple:
+        """Changes whenever the snapshot is replaced or a record is appended to the journal."""
+        return file_version(self.snapshot_path), file_version(self.journal_path)
+
+    def read_content(self) -> dict[str, Any] | None:
+        if not self.exists():
+            return None
+        with open(self.snapshot_path, "r", encoding="UTF-8") as read_file:
+            return json.loads(read_file.read())
+
+    def write_snapshot(self, entity_db: "EntityDB") -> None:
+        """Atomically replace the snapshot and drop the journal entries it now contains."""
+        os.makedirs(self.root_path, exist_ok=True)
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "w", encoding="UTF-8") as write_file:
+            write_file.write(entity_db.to_json())
+            write_file.flush()
+            os.fsync(write_file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # Records are idempotent, so a crash between the replace and the truncate only replays changes that are
+        # already present in the new snapshot
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def append(self, record: dict) -> None:
+        """Append a record, it is only acknowledged once it has been flushed to disk with its trailing newline."""
+        os.makedirs(self.root_path, exist_ok=True)
+        with open(self.journal_path, "ab") as write_file:
+            write_file.write(json.dumps(record).encode("UTF-8") + b"\n")
+            write_file.flush()
+            os.fsync(write_file.fileno())
+
+    def read_records(self, truncate: bool = True) -> list[dict]:
+        """Read the journal, cutting off a record left incomplete by an interrupted save.
+
+        The journal is truncated at the end of the last complete record, otherwise the next append would be written
+        onto the end of the partial line and be lost along with it. Readers that never write to the journal pass
+        truncate=False, the partial record they see may still be in the middle of being written.
+        """
+        if not os.path.exists(self.journal_path):
+            return []
+
+        records = []
+        valid_size = 0
+        with open(self.journal_path, "rb") as read_file:
+            for line_number, line in enumerate(read_file, start=1):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Record is missing its trailing newline")
+                    if line.strip():
+                        records.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Dropping corrupt journal record at line %s of %s", line_number, self.journal_path)
+                    break
+                valid_size += len(line)
+
+        if truncate and valid_size < self._file_size(self.journal_path):
+            os.truncate(self.journal_path, valid_size)
+        return records
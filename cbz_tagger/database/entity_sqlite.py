@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import TYPE_CHECKING
+from typing import Any
+
+from cbz_tagger.database.entity_journal import file_version
+
+if TYPE_CHECKING:
+    from cbz_tagger.database.entity_db import EntityDB
+
+logger = logging.getLogger()
+
+
+class EntitySqliteStore:
+    """Embedded SQLite storage for the entity database.
+
+    Every section of the database gets its own table keyed by entity_id, list sections (covers and chapters) keep one
+    row per item with an (entity_id, item_id) index. Saves are applied as row level upserts and deletes in a single
+    transaction, so only the rows belonging to the changed series are touched.
+    """
+
+    filename = "entity_db.sqlite"
+    entity_tables = ("metadata", "authors", "volumes")
+    entity_list_tables = ("covers", "chapters")
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS entity_map (manga_name TEXT PRIMARY KEY, entity_id TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_entity_map_entity_id ON entity_map (entity_id)",
+        "CREATE TABLE IF NOT EXISTS entity_names (entity_id TEXT PRIMARY KEY, name TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS entity_chapter_plugin (entity_id TEXT PRIMARY KEY, content TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS entity_tracked (entity_id TEXT PRIMARY KEY)",
+        "CREATE TABLE IF NOT EXISTS entity_downloads ("
+        "entity_id TEXT NOT NULL, chapter_id TEXT NOT NULL, PRIMARY KEY (entity_id, chapter_id)) WITHOUT ROWID",
+        *(
+            f"CREATE TABLE IF NOT EXISTS {table} (entity_id TEXT PRIMARY KEY, content TEXT NOT NULL)"
+            for table in entity_tables
+        ),
+        *(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "entity_id TEXT NOT NULL, position INTEGER NOT NULL, item_id TEXT, content TEXT NOT NULL, "
+            "PRIMARY KEY (entity_id, position))"
+            for table in entity_list_tables
+        ),
+        *(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_item_id ON {table} (entity_id, item_id)"
+            for table in entity_list_tables
+        ),
+    )
+
+    # Database files whose schema has been created by this process
+    _schema_lock = threading.Lock()
+    _schema_ready: set[str] = set()
+
+    def __init__(self, root_path: str) -> None:
+        self.root_path = root_path
+
+    @property
+    def database_path(self) -> str:
+        return os.path.join(self.root_path, self.filename)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.database_path)
+
+    def version(self) -> tuple:
+        """Changes whenever a transaction is committed to the database or its write-ahead log."""
+        return file_version(self.database_path), file_version(f"{self.database_path}-wal")
+
+    def connect(self) -> sqlite3.Connection:
+        # A connection per operation keeps the store safe to use from the executor threads the web api runs on
+        os.makedirs(self.root_path, exist_ok=True)
+        create_schema = self.database_path not in self._schema_ready or not self.exists()
+        connection = sqlite3.connect(self.database_path)
+        if create_schema:
+            # WAL mode is stored in the database file, like the schema it only has to be set up once
+            with self._schema_lock:
+                connection.execute("PRAGMA journal_mode=WAL")
+                for statement in self.schema:
+                    connection.execute(statement)
+                connection.commit()
+                self._schema_ready.add(self.database_path)
+        return connection
+
+    def should_compact(self) -> bool:
+        # Changes are written in place, a full rewrite is only needed to create the database
+        return not self.exists()
+
+    def read_records(self, truncate: bool = True) -> list[dict]:
+        _ = truncate
+        return []
+
+    def read_content(self, deferred: bool = False) -> dict[str, Any] | None:
+        """Read the whole database, with deferred the entities are left as None to be read with read_entity."""
+        if not self.exists():
+            return None
+
+        with closing(self.connect()) as connection:
+            content: dict[str, Any] = {
+                "entity_map": dict(connection.execute("SELECT manga_name, entity_id FROM entity_map")),
+                "entity_names": dict(connection.execute("SELECT entity_id, name FROM entity_names")),
+                "entity_downloads": list(connection.execute("SELECT entity_id, chapter_id FROM entity_downloads")),
+                "entity_tracked": [row[0] for row in connection.execute("SELECT entity_id FROM entity_tracked")],
+                "entity_chapter_plugin": {
+                    entity_id: json.loads(plugin)
+                    for entity_id, plugin in connection.execute("SELECT entity_id, content FROM entity_chapter_plugin")
+                },
+            }
+            if deferred:
+                for table in self.entity_tables + self.entity_list_tables:
+                    rows = connection.execute(f"SELECT DISTINCT entity_id FROM {table} ORDER BY entity_id")
+                    content[table] = {entity_id: None for (entity_id,) in rows}
+                return content
+            for table in self.entity_tables:
+                content[table] = dict(connection.execute(f"SELECT entity_id, content FROM {table}"))
+            for table in self.entity_list_tables:
+                section: dict[str, list[str]] = {}
+                rows = connection.execute(f"SELECT entity_id, content FROM {table} ORDER BY entity_id, position")
+                for entity_id, item in rows:
+                    section.setdefault(entity_id, []).append(item)
+                content[table] = section
+        return content
+
+    def read_entity(self, table: str, entity_id: str) -> str | list[str] | None:
+        """Read a single stored entity without loading the rest of the database."""
+        if table not in self.entity_tables + self.entity_list_tables or not self.exists():
+            return None
+
+        with closing(self.connect()) as connection:
+            if table in self.entity_tables:
+                row = connection.execute(f"SELECT content FROM {table} WHERE entity_id = ?", (entity_id,)).fetchone()
+                return row[0] if row else None
+            rows = connection.execute(
+                f"SELECT content FROM {table} WHERE entity_id = ? ORDER BY position", (entity_id,)
+            ).fetchall()
+            return [row[0] for row in rows] if rows else None
+
+    def write_snapshot(self, entity_db: "EntityDB") -> None:
+        """Replace the contents of every table with the full database."""
+        content = entity_db.to_content()
+        record: dict[str, Any] = {
+            "entity_map": {"updated": content["entity_map"]},
+            "entity_names": {"updated": content["entity_names"]},
+            "entity_chapter_plugin": {"updated": content["entity_chapter_plugin"]},
+            "entity_downloads": {"added": content["entity_downloads"]},
+            "entity_tracked": {"added": content["entity_tracked"]},
+        }
+        for table in self.entity_tables + self.entity_list_tables:
+            record[table] = {"updated": content[table]}
+
+        with closing(self.connect()) as connection, connection:
+            for table in ("entity_map", "entity_names", "entity_chapter_plugin", "entity_downloads", "entity_tracked"):
+                connection.execute(f"DELETE FROM {table}")
+            for table in self.entity_tables + self.entity_list_tables:
+                connection.execute(f"DELETE FROM {table}")
+            self._apply(connection, record)
+
+    def append(self, record: dict[str, Any]) -> None:
+        with closing(self.connect()) as connection, connection:
+            self._apply(connection, record)
+
+    @staticmethod
+    def _item_id(item: str) -> str | None:
+        try:
+            return json.loads(item).get("id")
+        except (json.JSONDecodeError, AttributeError):
+            return None
+
+    def _apply(self, connection: sqlite3.Connection, record: dict[str, Any]) -> None:
+        entity_map = record.get("entity_map", {})
+        connection.executemany(
+            "INSERT OR REPLACE INTO entity_map (manga_name, entity_id) VALUES (?, ?)",
+            entity_map.get("updated", {}).items(),
+        )
+        connection.executemany(
+            "DELETE FROM entity_map WHERE manga_name = ?", ((key,) for key in entity_map.get("deleted", []))
+        )
+
+        entity_names = record.get("entity_names", {})
+        connection.executemany(
+            "INSERT OR REPLACE INTO entity_names (entity_id, name) VALUES (?, ?)",
+            entity_names.get("updated", {}).items(),
+        )
+        connection.executemany(
+            "DELETE FROM entity_names WHERE entity_id = ?", ((key,) for key in entity_names.get("deleted", []))
+        )
+
+        plugins = record.get("entity_chapter_plugin", {})
+        connection.executemany(
+            "INSERT OR REPLACE INTO entity_chapter_plugin (entity_id, content) VALUES (?, ?)",
+            ((key, json.dumps(value)) for key, value in plugins.get("updated", {}).items()),
+        )
+        connection.executemany(
+            "DELETE FROM entity_chapter_plugin WHERE entity_id = ?", ((key,) for key in plugins.get("deleted", []))
+        )
+
+        downloads = record.get("entity_downloads", {})
+        connection.executemany(
+            "INSERT OR IGNORE INTO entity_downloads (entity_id, chapter_id) VALUES (?, ?)",
+            (tuple(item) for item in downloads.get("added", [])),
+        )
+        connection.executemany(
+            "DELETE FROM entity_downloads WHERE entity_id = ? AND chapter_id = ?",
+            (tuple(item) for item in downloads.get("removed", [])),
+        )
+
+        tracked = record.get("entity_tracked", {})
+        connection.executemany(
+            "INSERT OR IGNORE INTO entity_tracked (entity_id) VALUES (?)", ((key,) for key in tracked.get("added", []))
+        )
+        connection.executemany(
+            "DELETE FROM entity_tracked WHERE entity_id = ?", ((key,) for key in tracked.get("removed", []))
+        )
+
+        for table in self.entity_tables:
+            changes = record.get(table, {})
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {table} (entity_id, content) VALUES (?, ?)", changes.get("updated", {}).items()
+            )
+            connection.executemany(
+                f"DELETE FROM {table} WHERE entity_id = ?", ((key,) for key in changes.get("deleted", []))
+            )
+
+        for table in self.entity_list_tables:
+            changes = record.get(table, {})
+            updated = changes.get("updated", {})
+            connection.executemany(
+                f"DELETE FROM {table} WHERE entity_id = ?",
+                ((key,) for key in list(updated.keys()) + list(changes.get("deleted", []))),
+            )
+            connection.executemany(
+                f"INSERT INTO {table} (entity_id, position, item_id, content) VALUES (?, ?, ?, ?)",
+                (
+                    (entity_id, position, self._item_id(item), item)
+                    for entity_id, items in updated.items()
+                    for position, item in enumerate(items if isinstance(items, list) else [items])
+                ),
+            )
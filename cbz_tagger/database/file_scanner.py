@@ -1,10 +1,14 @@
 import logging
 import os
-import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from zipfile import BadZipFile
 
+from cbz_tagger.common.env import AppEnv
+from cbz_tagger.common.file_readiness import FileReadiness
+from cbz_tagger.common.file_readiness import FileState
 from cbz_tagger.database.entity_db import EntityDB
 from cbz_tagger.entities.cbz_entity import CbzEntity
 
@@ -12,59 +16,125 @@ logger = logging.getLogger()
 
 
 class FileScanner:
+    retry_delay = 10
+    max_retries = 30
+    scan_workers = AppEnv.SCAN_WORKERS
+
     def __init__(self, config_path, scan_path, storage_path, add_missing=True) -> None:
         self.config_path = config_path
         self.scan_path = scan_path
         self.storage_path = storage_path
 
         self.add_missing = add_missing
+        # Held by every operation that uses entity_database, it is only ever replaced while holding this
+        self.lock = threading.RLock()
         self.entity_database = EntityDB.load(root_path=self.config_path)
         self.recently_updated = []
+        self.readiness = FileReadiness()
+        # Read only copy of the saved database that requests which only read are served from
+        self._read_lock = threading.Lock()
+        self._read_database: EntityDB | None = None
 
     def reload_scanner(self):
-        self.entity_database = EntityDB.load(root_path=self.config_path)
+        with self.lock:
+            self.entity_database = EntityDB.load(root_path=self.config_path)
+
+    def reload_scanner_if_stale(self):
+        """Reload the entity database only if the files on disk were changed outside of this scanner."""
+        with self.lock:
+            if self.entity_database.is_stale:
+                self.reload_scanner()
+
+    def read_database(self) -> EntityDB:
+        """The database as last saved, without waiting for or touching the one operations are changing.
+
+        The copy is reloaded whenever storage has changed since it was loaded, and is never modified afterwards, so
+        a request can keep reading it while a newer copy replaces it.
+        """
+        with self._read_lock:
+            if self._read_database is None or self._read_database.is_stale:
+                self._read_database = EntityDB.load(root_path=self.config_path, read_only=True)
+            return self._read_database
 
     def to_state(self):
-        return self.entity_database.to_state()
+        return self.read_database().to_state()
 
     def run(self):
-        logger.info("File scanner started. %s", datetime.now())
-        # Reload the entity database at the start of a run to make sure it is up to date
-        self.entity_database = EntityDB.load(root_path=self.config_path)
-        self.run_scan()
+        with self.lock:
+            logger.info("File scanner started. %s", datetime.now())
+            # Reload the entity database at the start of a run to make sure it is up to date
+            self.entity_database = EntityDB.load(root_path=self.config_path)
+            self.run_scan()
 
-        # If we have tracked entities, refresh the database to scan for new downloads and manga updates
-        if self.entity_database.has_tracked_entities:
-            self.entity_database.refresh(self.storage_path)
+            # If we have tracked entities, refresh the database to scan for new downloads and manga updates
+            if self.entity_database.has_tracked_entities:
+                self.entity_database.refresh(self.storage_path)
 
     def run_scan(self):
-        self.entity_database = EntityDB.load(root_path=self.config_path)
-        self.recently_updated = []
-        while True:
-            completed = self.scan()
-            if not completed:
-                logger.info("Scan not completed. Sleeping 120s")
-                time.sleep(120)
-                logger.info("Initiating rescan...")
-            else:
-                logger.info("Scan completed.")
-                return
-
-    def scan(self):
+        with self.lock:
+            self.entity_database = EntityDB.load(root_path=self.config_path)
+            self.recently_updated = []
+            self.scan_until_ready()
+
+    def run_watch(self, filepaths):
+        """Process the files reported by the scan path watcher, without walking the scan path."""
+        with self.lock:
+            self.reload_scanner_if_stale()
+            self.recently_updated = []
+            self.scan_until_ready(filepaths)
+
+    def scan_until_ready(self, filepaths=None):
+        """Scan, then retry only the files that were still being written until they settle."""
+        deferred = self.scan(filepaths)
+        retries = 0
+        while deferred and retries < self.max_retries:
+            logger.info("%s files still being written. Retrying in %ss", len(deferred), self.retry_delay)
+            time.sleep(self.retry_delay)
+            deferred = self.scan(deferred)
+            retries += 1
+
+        if deferred:
+            logger.warning("Files not ready, leaving them for the next scan: %s", ", ".join(deferred))
+        else:
+            logger.info("Scan completed.")
+
+    def scan(self, filepaths=None) -> list[str]:
+        """Process every file that is ready, returning the files that are still being written."""
         logger.info("Starting scan....")
-        for filepath in self.get_cbz_files():
-            try:
-                self.process(filepath)
-            except BadZipFile:
-                logger.error("Unable to read file... files are either in use or corrupted.")
-                return False
-
-        # Remove empty directories
-        folders = [f[0] for f in list(os.walk(self.scan_path))[1:]]
-        for folder in folders:
-            if len(os.listdir(folder)) == 0:
-                shutil.rmtree(folder)
-        return True
+        if filepaths is None:
+            filepaths = self.get_cbz_files()
+
+        deferred = []
+        ready = []
+        for filepath in filepaths:
+            path = os.path.join(self.scan_path, filepath)
+            # A watched file can be moved or processed by an earlier scan before its turn comes
+            if not os.path.exists(path):
+                continue
+
+            state = self.readiness.check(path)
+            if state == FileState.PENDING:
+                deferred.append(filepath)
+                continue
+            self.readiness.forget(path)
+            if state == FileState.INVALID:
+                logger.error("Unable to read %s... the file is incomplete or corrupted.", filepath)
+                continue
+            ready.append(filepath)
+
+        if ready:
+            self.process_files(ready)
+        self.remove_empty_directories(filepaths)
+        return deferred
+
+    def remove_empty_directories(self, filepaths):
+        """Remove the series folders left empty by processing, instead of walking the whole scan path again."""
+        folders = {os.path.dirname(os.path.join(self.scan_path, filepath)) for filepath in filepaths}
+        scan_path = os.path.normpath(self.scan_path)
+        for folder in sorted(folders, key=len, reverse=True):
+            while os.path.normpath(folder) != scan_path and os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)
+                folder = os.path.dirname(folder)
 
     def get_files(self):
         return [(root, filenames) for (root, _, filenames) in os.walk(self.scan_path)]
@@ -79,11 +149,57 @@ class FileScanner:
         filepaths = sorted([os.path.relpath(item, self.scan_path) for items in filepaths for item in items])
         return filepaths
 
-    def process(self, filepath):
-        cbz_entity = CbzEntity(filepath, self.config_path, self.scan_path, self.storage_path)
-        entity_name, entity_xml, entity_image_path, mylar_series_json = self.get_cbz_comicinfo_and_image(cbz_entity)
-        if entity_name:
-            cbz_entity.build(entity_name, entity_xml, entity_image_path, mylar_series_json)
+    def process_files(self, filepaths):
+        """Tag files on a pool of workers, the archives are written concurrently.
+
+        Metadata is prepared on this thread, once per series and in file order, while the archives of earlier
+        series are still being written. Database saves made along the way are batched into one, and series.json
+        is written once per series after its archives are done.
+        """
+        series_files: dict[str, list[str]] = {}
+        for filepath in filepaths:
+            series_files.setdefault(CbzEntity(filepath).manga_name, []).append(filepath)
+
+        # Bring every known series up to date before any archive is written, rather than one by one as reached
+        prefetch = [manga_name for manga_name in series_files if manga_name not in self.recently_updated]
+        self.recently_updated.extend(self.entity_database.prefetch_manga_names(prefetch))
+
+        with ThreadPoolExecutor(max_workers=max(self.scan_workers, 1)) as executor:
+            series_builds = []
+            claimed = set()
+            with self.entity_database.deferred_saves():
+                for manga_name, series_filepaths in series_files.items():
+                    logger.debug("Preparing %s files for %s", len(series_filepaths), manga_name)
+                    builds = {}
+                    mylar_series_json = None
+                    for filepath in series_filepaths:
+                        cbz_entity = CbzEntity(filepath, self.config_path, self.scan_path, self.storage_path)
+                        entity_name, entity_xml, entity_image_path, mylar_series_json = (
+                            self.get_cbz_comicinfo_and_image(cbz_entity)
+                        )
+                        if not entity_name:
+                            continue
+                        # Two scanned files for the same chapter would race for one destination
+                        write_path = cbz_entity.get_entity_write_path(entity_name, cbz_entity.chapter_number)
+                        if write_path in claimed:
+                            logger.error("ERROR >> Destination file already present!")
+                            continue
+                        claimed.add(write_path)
+                        future = executor.submit(cbz_entity.build_archive, entity_name, entity_xml, entity_image_path)
+                        builds[future] = (filepath, cbz_entity, entity_name)
+                    series_builds.append((builds, mylar_series_json))
+
+            for builds, mylar_series_json in series_builds:
+                built = None
+                for future, (filepath, cbz_entity, entity_name) in builds.items():
+                    try:
+                        if future.result():
+                            built = (cbz_entity, entity_name)
+                    except BadZipFile:
+                        logger.error("Unable to read %s... the file is corrupted.", filepath)
+                if built is not None:
+                    cbz_entity, entity_name = built
+                    cbz_entity.write_mylar_series_json(entity_name, mylar_series_json)
 
     def get_cbz_comicinfo_and_image(self, cbz_entity: CbzEntity):
         manga_name, chapter_number = cbz_entity.get_name_and_chapter()
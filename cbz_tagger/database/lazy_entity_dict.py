@@ -0,0 +1,105 @@
+from collections.abc import Callable
+from collections.abc import Iterator
+from collections.abc import MutableMapping
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class _RawEntity:
+    """Stored json for an entity that has not been decoded yet, None when it has not been read from storage yet."""
+
+    __slots__ = ("content",)
+
+    def __init__(self, content: str | list[str] | None):
+        self.content = content
+
+
+class LazyEntityDict(MutableMapping[str, T], Generic[T]):
+    """Mapping of entity ids to entities that keeps the stored json and decodes an entity on first access.
+
+    Loading a database then only pays for the entities that are actually used. Entries that were never decoded can
+    be written back out using their original json without being rebuilt. With a reader, entries loaded as None are
+    only read from storage when they are first needed.
+    """
+
+    def __init__(
+        self,
+        decoder: Callable[[Any], T],
+        raw_content: dict[str, str | list[str] | None] | None = None,
+        reader: Callable[[str], str | list[str] | None] | None = None,
+    ):
+        self._decoder = decoder
+        self._reader = reader
+        self._data: dict[str, Any] = {key: _RawEntity(value) for key, value in (raw_content or {}).items()}
+        # The raw entry each decoded entity came from, so decoding alone doesn't count as a change
+        self._decoded_from: dict[str, _RawEntity] = {}
+
+    def _read(self, key: str, value: _RawEntity) -> str | list[str]:
+        if value.content is None:
+            if self._reader is None:
+                raise KeyError(key)
+            content = self._reader(key)
+            if content is None:
+                raise KeyError(key)
+            # Kept on the entry, it is still the stored json for writing back out
+            value.content = content
+        return value.content
+
+    def __getitem__(self, key: str) -> T:
+        value = self._data[key]
+        if isinstance(value, _RawEntity):
+            decoded = self._decoder(self._read(key, value))
+            # Replacing the value of an existing key is safe while the mapping is being iterated
+            self._data[key] = decoded
+            self._decoded_from[key] = value
+            return decoded
+        return value
+
+    def __setitem__(self, key: str, value: T) -> None:
+        self._data[key] = value
+        self._decoded_from.pop(key, None)
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+        self._decoded_from.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self._data)} entities, {self.decoded_count} decoded)"
+
+    @property
+    def decoded_count(self) -> int:
+        return sum(1 for value in self._data.values() if not isinstance(value, _RawEntity))
+
+    def set_raw(self, key: str, content: str | list[str]) -> None:
+        """Store the json for an entity, it is decoded the first time it is accessed."""
+        self._data[key] = _RawEntity(content)
+        self._decoded_from.pop(key, None)
+
+    def raw(self, key: str) -> str | list[str] | None:
+        """The stored json for an entity, or None if it has been decoded or replaced since loading."""
+        value = self._data.get(key)
+        if isinstance(value, _RawEntity):
+            return self._read(key, value)
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Copy of the stored values without decoding anything."""
+        return dict(self._data)
+
+    def is_unchanged(self, key: str, previous: Any) -> bool:
+        """Check an entry against a value from snapshot(), treating a decoded but not replaced entry as unchanged."""
+        if previous is None:
+            return False
+        return self._data.get(key) is previous or self._decoded_from.get(key) is previous
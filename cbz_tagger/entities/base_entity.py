@@ -1,16 +1,16 @@
 import hashlib
 import json
 import logging
-import random
 import time
 from json import JSONDecodeError
 from typing import Any
 
-import cloudscraper
 import requests
 
 from cbz_tagger.common.enums import Urls
 from cbz_tagger.common.env import AppEnv
+from cbz_tagger.common.rate_limiter import RateLimiter
+from cbz_tagger.common.scraper_pool import ScraperPool
 
 logger = logging.getLogger()
 
@@ -22,6 +22,8 @@ class BaseEntityObject:
 class BaseEntity(BaseEntityObject):
     entity_url: str
     paginated: bool = False
+    scraper_pool = ScraperPool()
+    rate_limiter = RateLimiter.from_env()
 
     def __init__(self, content):
         self.content = content
@@ -135,52 +137,51 @@ class BaseEntity(BaseEntityObject):
         configs = cls._get_request_configs()
 
         for attempt in range(retries):
+            # Rotate through different browser configurations
+            config = configs[attempt % len(configs)]
+            scraper = None
             try:
-                # Rotate through different browser configurations
-                config = configs[attempt % len(configs)]
-
-                with cloudscraper.create_scraper(
-                    browser={"browser": config["browser"], "platform": config["platform"], "mobile": False},
-                    delay=10,  # Add delay between challenge solving attempts
-                ) as scraper:
-                    request_parameters = {
-                        "url": url,
-                        "params": params,
-                        "timeout": timeout,
-                        "headers": config["headers"],
-                    }
-
-                    if env.PROXY_URL is not None:
-                        request_parameters["proxies"] = {"http": env.PROXY_URL, "https": env.PROXY_URL}
-
-                    # Add random jitter to appear more human-like
-                    time.sleep(random.uniform(0.5, 2.0))
-
+                # Sessions are pooled per host and browser so connections and challenge state are reused
+                scraper = cls.scraper_pool.get(url, config["browser"], config["platform"])
+                request_parameters = {
+                    "url": url,
+                    "params": params,
+                    "timeout": timeout,
+                    "headers": config["headers"],
+                }
+
+                if env.PROXY_URL is not None:
+                    request_parameters["proxies"] = {"http": env.PROXY_URL, "https": env.PROXY_URL}
+
+                # Waits for the host's request budget instead of a fixed sleep per request
+                with cls.rate_limiter.acquire(url):
                     response = scraper.get(**request_parameters)
 
-                    if response.status_code == 200:
-                        time.sleep(AppEnv.DELAY_PER_REQUEST)
-                        return response
-                    elif response.status_code == 403:
-                        logger.warning(
-                            "403 Forbidden on %s - switching browser config (attempt %s/%s)",
-                            url,
-                            attempt + 1,
-                            retries,
-                        )
-                        # Longer backoff for 403s to let rate limits reset
-                        time.sleep(15 * (attempt + 1))
-                    else:
-                        logger.error(
-                            "Error downloading %s: %s. Attempt: %s/%s", url, response.status_code, attempt + 1, retries
-                        )
-                        time.sleep(10 * (attempt + 1))
+                if response.status_code == 200:
+                    return response
+                elif response.status_code == 403:
+                    logger.warning(
+                        "403 Forbidden on %s - switching browser config (attempt %s/%s)",
+                        url,
+                        attempt + 1,
+                        retries,
+                    )
+                    # Start this browser config over with a fresh session the next time it is used
+                    cls.scraper_pool.discard(url, config["browser"], config["platform"], scraper)
+                    # Longer backoff for 403s to let rate limits reset
+                    time.sleep(15 * (attempt + 1))
+                else:
+                    logger.error(
+                        "Error downloading %s: %s. Attempt: %s/%s", url, response.status_code, attempt + 1, retries
+                    )
+                    time.sleep(10 * (attempt + 1))
 
             except requests.exceptions.Timeout:
                 logger.error("Timeout downloading %s. Attempt: %s/%s", url, attempt + 1, retries)
                 time.sleep(10 * (attempt + 1))
             except Exception as e:
                 logger.error("Unexpected error downloading %s: %s. Attempt: %s/%s", url, str(e), attempt + 1, retries)
+                cls.scraper_pool.discard(url, config["browser"], config["platform"], scraper)
                 time.sleep(10 * (attempt + 1))
 
         raise EnvironmentError(f"Failed to receive response from {url} after {retries} attempts")
@@ -232,8 +233,5 @@ class BaseEntity(BaseEntityObject):
                         response_content = deduplicated_content
 
                     return response_content
-
-                # Only make 2 queries per second
-                time.sleep(AppEnv.DELAY_PER_REQUEST)
         except JSONDecodeError as err:
             raise EnvironmentError("API is down! Please try again later!") from err
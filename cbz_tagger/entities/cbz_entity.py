@@ -1,14 +1,115 @@
+import functools
 import logging
 import os
 import re
 from zipfile import ZIP_DEFLATED
 from zipfile import ZipFile
 
+from cbz_tagger.common.cbz_writer import copy_member
+from cbz_tagger.common.cbz_writer import get_compress_type
 from cbz_tagger.common.permissions import make_directory_with_ownership
 from cbz_tagger.common.permissions import set_file_ownership
 
 logger = logging.getLogger()
 
+REPEATED_DOTS = re.compile(r"\.\.+")
+BRACKETS = re.compile(r"\(.*\)")
+VOLUME_PREFIX = re.compile(r"volume \d+ ")
+VOLUME = re.compile(r"volume (\d+)")
+PART = re.compile(r"part (\d+)")
+NON_NUMERIC = re.compile(r"[^0-9.]")
+
+
+class ChapterFilename:
+    """The parts of a scanned chapter filename, as parsed by parse_chapter_filename."""
+
+    __slots__ = ("series", "chapter", "volume", "part", "decimal", "is_volume")
+
+    def __init__(
+        self,
+        series: str,
+        chapter: str | None,
+        volume: str | None,
+        part: str | None,
+        decimal: str | None,
+        is_volume: bool,
+    ):
+        self.series = series
+        self.chapter = chapter
+        self.volume = volume
+        self.part = part
+        self.decimal = decimal
+        self.is_volume = is_volume
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+def convert_to_number(value: str) -> str | None:
+    try:
+        float(value)
+        return value
+    except ValueError:
+        # If the chapter number starts with a "." we should skip this first period
+        if value[0] == ".":
+            try:
+                float(value[1:])
+                return value[1:]
+            except ValueError:
+                return None
+        return None
+
+
+def parse_chapter_number(filename: str) -> str | None:
+    # Check if formatting with chapter title, if so remove the word title
+    if filename.find("-") != filename.rfind("-") and filename.find("-") != -1 and filename.rfind("-") != -1:
+        chapter_pos = filename.find("ch")
+        if filename.find("-") < chapter_pos < filename.rfind("-"):
+            filename = filename[: filename.rfind("-")]
+
+    filename = REPEATED_DOTS.sub("", filename)
+    filename = BRACKETS.sub("", filename)
+    filename = VOLUME_PREFIX.sub("", filename)
+    filename = PART.sub("", filename)
+    valid_parts = [convert_to_number(p) for p in NON_NUMERIC.sub(" ", filename).split(" ") if len(p) > 0]
+    valid_parts = [p for p in valid_parts if p is not None]
+    if len(valid_parts) == 0:
+        return None
+    valid_number = valid_parts[-1]
+    # If the chapter number starts with a "." we should skip this first period
+    if valid_number[0] == ".":
+        valid_number = valid_number[1:]
+
+    try:
+        chapter_number = float(valid_number)
+        if chapter_number.is_integer():
+            return str(int(chapter_number))
+        return str(chapter_number)
+    except ValueError:
+        return valid_number
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_chapter_filename(filepath: str) -> ChapterFilename:
+    """Parse a "Series Name/Chapter Name.cbz" path once, later lookups for the same path are served from cache."""
+    series, chapter_name = os.path.split(filepath)
+    filename = chapter_name.replace(".cbz", "").lower()
+
+    volume = VOLUME.search(filename)
+    part = PART.search(filename)
+    chapter = parse_chapter_number(filename)
+    # If the volume is removed are there any numbers left? If not this is a volume only entity
+    is_volume = len(NON_NUMERIC.sub("", VOLUME.sub("", filename))) == 0
+    return ChapterFilename(
+        series=series,
+        chapter=chapter,
+        volume=str(int(volume.group(1))) if volume else None,
+        part=str(int(part.group(1))) if part else None,
+        decimal=chapter.split(".", 1)[1] if chapter is not None and "." in chapter else None,
+        is_volume=is_volume,
+    )
+
 
 class CbzEntity:
     def __init__(
@@ -29,22 +130,19 @@ class CbzEntity:
                 "Multiple file path depths found, please ensure files are in format: Series Name/Chapter Name.cbz"
             )
 
+    @property
+    def parsed_filename(self) -> ChapterFilename:
+        return parse_chapter_filename(self.filepath)
+
     @property
     def manga_name(self):
         self.check_path()
-        manga_name = os.path.split(self.filepath)[0]
-        return manga_name
+        return self.parsed_filename.series
 
     @property
     def chapter_is_volume(self):
         """If the volume is removed are there any numbers left? If not this is a volume only entity"""
-        filename = self.chapter_name.replace(".cbz", "")
-        filename = str.lower(filename)
-        filename = re.sub(r"volume \d+", "", filename)
-        filename_numeric_only = re.sub(r"[^0-9.]", "", filename)
-        if len(filename_numeric_only) == 0:
-            return True
-        return False
+        return self.parsed_filename.is_volume
 
     @property
     def chapter_name(self):
@@ -53,50 +151,14 @@ class CbzEntity:
 
     @staticmethod
     def convert_to_number(value):
-        try:
-            float(value)
-            return value
-        except ValueError:
-            # If the chapter number starts with a "." we should skip this first period
-            if value[0] == ".":
-                try:
-                    float(value[1:])
-                    return value[1:]
-                except ValueError:
-                    return None
-            return None
+        return convert_to_number(value)
 
     @property
     def chapter_number(self) -> str:
-        filename = self.chapter_name.replace(".cbz", "")
-        filename = str.lower(filename)
-
-        # Check if formatting with chapter title, if so remove the word title
-        if filename.find("-") != filename.rfind("-") and filename.find("-") != -1 and filename.rfind("-") != -1:
-            chapter_pos = filename.find("ch")
-            if filename.find("-") < chapter_pos < filename.rfind("-"):
-                filename = filename[: filename.rfind("-")]
-
-        filename = re.sub(r"\.\.+", "", filename)
-        filename = re.sub(r"\(.*\)", "", filename)
-        filename = re.sub(r"volume \d+ ", "", filename)
-        filename = re.sub(r"part \d+", "", filename)
-        filename_numeric_only = re.sub(r"[^0-9.]", " ", filename)
-        valid_parts = [p for p in filename_numeric_only.split(" ") if len(p) > 0]
-        valid_parts = [self.convert_to_number(p) for p in valid_parts if self.convert_to_number(p) is not None]
-        valid_number = valid_parts[-1]
-        # If the chapter number starts with a "." we should skip this first period
-        if valid_number[0] == ".":
-            valid_number = valid_number[1:]
-
-        try:
-            chapter_number = float(valid_number)
-            if chapter_number.is_integer():
-                chapter_number = int(chapter_number)
-        except ValueError:
-            chapter_number = valid_number
-
-        return str(chapter_number)
+        chapter_number = self.parsed_filename.chapter
+        if chapter_number is None:
+            raise ValueError(f"Could not find a chapter number in {self.filepath}")
+        return chapter_number
 
     def get_name_and_chapter(self):
         return self.manga_name, self.chapter_number
@@ -129,28 +191,35 @@ class CbzEntity:
         return os.path.join(self.storage_path, entity_name, "series.json")
 
     def build(self, entity_name, entity_xml, entity_image_path, mylar_series_json, remove_on_write=True):
+        if self.build_archive(entity_name, entity_xml, entity_image_path, remove_on_write=remove_on_write):
+            self.write_mylar_series_json(entity_name, mylar_series_json)
+
+    def build_archive(self, entity_name, entity_xml, entity_image_path, remove_on_write=True) -> bool:
+        """Write the tagged archive to storage, returns False if the destination is already present."""
         read_path = self.get_entity_read_path()
         write_path = self.get_entity_write_path(entity_name, self.chapter_number)
         cover_image_path = self.get_entity_cover_image_path(entity_image_path)
 
         if os.path.exists(write_path):
             logger.error("ERROR >> Destination file already present!")
-            return
+            return False
 
         with ZipFile(read_path, "r") as zip_read:
             with ZipFile(write_path, "w", ZIP_DEFLATED) as zip_write:
                 for item in zip_read.infolist():
                     if "ComicInfo" not in item.filename and "000_cover.jpg" not in item.filename:
-                        zip_write.writestr(item, zip_read.read(item.filename))
-                zip_write.writestr("ComicInfo.xml", entity_xml)
-                zip_write.write(cover_image_path, "000_cover.jpg")
+                        copy_member(zip_read, item, zip_write)
+                zip_write.writestr("ComicInfo.xml", entity_xml, compress_type=get_compress_type("ComicInfo.xml"))
+                zip_write.write(cover_image_path, "000_cover.jpg", compress_type=get_compress_type("000_cover.jpg"))
 
         if remove_on_write:
             os.remove(read_path)
 
         # Set the ownership of the file
         set_file_ownership(write_path)
+        return True
 
+    def write_mylar_series_json(self, entity_name, mylar_series_json):
         mylar_series_json_path = self.get_mylar_series_json_path(entity_name)
         with open(mylar_series_json_path, "w", encoding="utf-8") as json_file:
             json_file.write(mylar_series_json)
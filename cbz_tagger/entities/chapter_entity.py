@@ -1,4 +1,5 @@
 import logging
+from collections.abc import Collection
 from typing import Any
 
 # Import plugins to trigger registration
@@ -23,11 +24,13 @@ class ChapterEntity(ChapterPluginEntity):
 
             entity_id = kwargs["plugin_id"]
         plugin_cls = Plugins.get_plugin(plugin_type)
-        response = plugin_cls.fetch_chapters(entity_id)
+        response = plugin_cls.fetch_chapters(
+            entity_id, updated_since=kwargs.get("updated_since"), known_ids=kwargs.get("known_ids", frozenset())
+        )
         return [cls(data) for data in response]
 
     @classmethod
-    def parse_info_feed(cls, entity_id: str) -> list[Any]:
+    def parse_info_feed(cls, entity_id: str, known_ids: Collection[str] = frozenset()) -> list[Any]:
         raise NotImplementedError("ChapterEntity fetches via from_server_url")
 
     @property
@@ -5,6 +5,82 @@ from cbz_tagger.common.enums import IgnoredTags
 from cbz_tagger.entities.base_entity import BaseEntity
 
 
+class MetadataView:
+    """The fields tagging reads from a metadata entity, parsed once when the entity is built.
+
+    Fields missing from the content are left as None so partial responses can still be built.
+    """
+
+    __slots__ = (
+        "title",
+        "alt_title",
+        "all_titles",
+        "description",
+        "status",
+        "last_chapter",
+        "age_rating",
+        "relationship_ids",
+        "created_at",
+        "language",
+        "demographic",
+        "genres",
+    )
+
+    def __init__(self, attributes: dict, relationships: list[dict[str, str]]):
+        titles = attributes.get("title") or {}
+        alt_titles = attributes.get("altTitles") or []
+        self.title: str | None = next(iter(titles.values()), None)
+        self.alt_title: str | None = next((item["en"] for item in alt_titles if "en" in item), None)
+        all_titles = [self.title] + [next(iter(item.values())) for item in alt_titles]
+        self.all_titles: tuple[str, ...] = tuple(title for title in all_titles if title is not None)
+        self.description: str | None = (attributes.get("description") or {}).get("en")
+        self.status: str | None = attributes.get("status")
+
+        last_chapter_value = attributes.get("lastChapter")
+        if last_chapter_value is None or len(last_chapter_value) == 0:
+            self.last_chapter = "-1"
+        else:
+            self.last_chapter = str(int(math.floor(float(last_chapter_value))))
+
+        content_rating = attributes.get("contentRating")
+        if content_rating == "suggestive":
+            self.age_rating = "Teen"
+        elif content_rating == "erotica":
+            self.age_rating = "Mature 17+"
+        else:
+            self.age_rating = "Everyone"
+
+        # First id of each relationship type
+        self.relationship_ids: dict[str, str] = {}
+        for item in relationships:
+            self.relationship_ids.setdefault(item["type"], item["id"])
+
+        created_at = attributes.get("createdAt")
+        self.created_at: datetime | None = None
+        if created_at is not None:
+            self.created_at = datetime.strptime(created_at.split("+")[0], "%Y-%m-%dT%H:%M:%S")
+
+        language_iso = attributes.get("originalLanguage", "en")
+        if language_iso is None or len(language_iso) > 2:
+            language_iso = "en"
+        self.language: str = language_iso.lower()
+
+        demographic = attributes.get("publicationDemographic")
+        self.demographic: str | None = demographic.title() if demographic else None
+
+        tags = (
+            attr.get("attributes", {}).get("name", {}).get("en")
+            for attr in attributes.get("tags", [])
+            if attr.get("id") not in IgnoredTags
+        )
+        genre_tags = sorted(set(tag for tag in tags if tag))
+        if len(genre_tags) == 0:
+            genre_tags = ["Unknown"]
+        if self.demographic and self.demographic not in genre_tags:
+            genre_tags = [self.demographic] + genre_tags
+        self.genres: tuple[str, ...] = tuple(genre_tags)
+
+
 class MetadataEntity(BaseEntity):
     entity_url: str = f"{BaseEntity.base_url}/manga"
     paginated: bool = True
@@ -15,23 +91,24 @@ class MetadataEntity(BaseEntity):
         # We only need the English description, so drop the rest
         if "description" in self.content.get("attributes", {}):
             self.content["attributes"]["description"] = {"en": self.content["attributes"]["description"].get("en", "")}
+        # Updates replace the entity, so the content is only parsed here
+        self.view = MetadataView(self.attributes, self.relationships or [])
 
     @property
     def title(self) -> str | None:
-        return next((item for item in self.attributes["title"].values()), None)
+        return self.view.title
 
     @property
     def alt_title(self) -> str | None:
-        return next((item["en"] for item in self.attributes["altTitles"] if "en" in item), None)
+        return self.view.alt_title
 
     @property
     def all_titles(self) -> list[str]:
-        titles = [self.title] + list(list(item.values())[0] for item in self.attributes["altTitles"])
-        return [title for title in titles if title is not None]
+        return list(self.view.all_titles)
 
     @property
     def description(self) -> str | None:
-        return self.attributes["description"].get("en")
+        return self.view.description
 
     @property
     def updated(self) -> str | None:
@@ -43,10 +120,7 @@ class MetadataEntity(BaseEntity):
 
     @property
     def last_chapter(self) -> str | None:
-        last_chapter_value = self.attributes.get("lastChapter")
-        if last_chapter_value is None or len(last_chapter_value) == 0:
-            return "-1"
-        return str(int(math.floor(float(last_chapter_value))))
+        return self.view.last_chapter
 
     @property
     def last_volume(self) -> str | None:
@@ -54,7 +128,7 @@ class MetadataEntity(BaseEntity):
 
     @property
     def completed(self) -> bool:
-        return self.attributes["status"] == "completed"
+        return self.view.status == "completed"
 
     @property
     def status(self) -> str:
@@ -68,11 +142,7 @@ class MetadataEntity(BaseEntity):
 
     @property
     def age_rating(self) -> str:
-        if self.attributes["contentRating"] == "suggestive":
-            return "Teen"
-        if self.attributes["contentRating"] == "erotica":
-            return "Mature 17+"
-        return "Everyone"
+        return self.view.age_rating
 
     @property
     def author_entities(self) -> list[str]:
@@ -80,49 +150,34 @@ class MetadataEntity(BaseEntity):
 
     @property
     def author_id(self) -> str | None:
-        return next((item["id"] for item in self.relationships if item["type"] == "author"), None)
+        return self.view.relationship_ids.get("author")
 
     @property
     def artist_id(self) -> str | None:
-        return next((item["id"] for item in self.relationships if item["type"] == "artist"), None)
+        return self.view.relationship_ids.get("artist")
 
     @property
     def creator_id(self) -> str | None:
-        return next((item["id"] for item in self.relationships if item["type"] == "creator"), None)
+        return self.view.relationship_ids.get("creator")
 
     @property
     def cover_art_id(self) -> str | None:
-        return next((item["id"] for item in self.relationships if item["type"] == "cover_art"), None)
+        return self.view.relationship_ids.get("cover_art")
 
     @property
     def created_at(self) -> datetime:
-        return datetime.strptime(self.attributes["createdAt"].split("+")[0], "%Y-%m-%dT%H:%M:%S")
+        if self.view.created_at is None:
+            raise KeyError("createdAt")
+        return self.view.created_at
 
     @property
     def language(self) -> str:
-        language_iso = self.attributes.get("originalLanguage", "en")
-        if language_iso is None or len(language_iso) > 2:
-            return "en"
-        language_iso = language_iso.lower()
-        return language_iso
+        return self.view.language
 
     @property
     def genres(self) -> list[str]:
-        tags = list(
-            attr.get("attributes", {}).get("name", {}).get("en")
-            for attr in self.attributes["tags"]
-            if attr.get("id") not in IgnoredTags
-        )
-        genre_tags = sorted(set(tag for tag in tags if tag))
-        if len(genre_tags) == 0:
-            genre_tags = ["Unknown"]
-        if self.demographic and self.demographic not in genre_tags:
-            genre_tags = [self.demographic] + genre_tags
-        return genre_tags  # type: ignore[invalid-return-type]
+        return list(self.view.genres)
 
     @property
     def demographic(self) -> str | None:
-        demo = self.attributes.get("publicationDemographic")
-        if demo:
-            return demo.title()
-        return None
+        return self.view.demographic
@@ -1,6 +1,7 @@
 import base64
 import logging
 import time
+from collections.abc import Collection
 from typing import Any
 
 from cbz_tagger.common.plugins import Plugins
@@ -16,7 +17,8 @@ class ChapterPluginCMK(ChapterPluginEntity):
     entity_url = f"https://{BASE_URL}/"
 
     @classmethod
-    def get_chapter_page_items(cls, page_url: str) -> tuple[list[Any], int]:
+    def get_chapter_page_items(cls, page_url: str, known_hids: Collection[str] = frozenset()) -> tuple[list[Any], int]:
+        """Page through the chapters, newest first, stopping at the first chapter in known_hids."""
         items = []
         total = None
         page = 1
@@ -25,7 +27,11 @@ class ChapterPluginCMK(ChapterPluginEntity):
             data = response.json()
             if total is None:
                 total = data["total"]
-            items.extend(data["chapters"])
+            for item in data["chapters"]:
+                if item["hid"] in known_hids:
+                    # Nothing older is read, the chapters read so far are all that is expected
+                    return items, len(items)
+                items.append(item)
             if len(items) < total:
                 page += 1
             else:
@@ -34,20 +40,21 @@ class ChapterPluginCMK(ChapterPluginEntity):
         return items, total
 
     @classmethod
-    def parse_info_feed(cls, entity_id: str) -> list[Any]:
+    def parse_info_feed(cls, entity_id: str, known_ids: Collection[str] = frozenset()) -> list[Any]:
         url = f"{cls.entity_url}comic/{entity_id}?tachiyomi=true"
         response = cls.request_with_retry(url)
         info = response.json()
 
         manga_id = info["comic"]["hid"]
         page_url = f"{cls.entity_url}comic/{manga_id}/chapters?lang=en&page="
+        known_hids = {chapter_id.removeprefix(f"{manga_id}-") for chapter_id in known_ids}
 
         items = []
         total = 0
         max_retries = 3
         for attempt in range(max_retries + 1):
             try:
-                items, total = cls.get_chapter_page_items(page_url)
+                items, total = cls.get_chapter_page_items(page_url, known_hids)
                 if len(set(r["id"] for r in items)) != total:
                     raise EnvironmentError("Paginated response contains duplicate entries")
                 break  # Success, exit retry loop
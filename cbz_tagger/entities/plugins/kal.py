@@ -1,5 +1,6 @@
 import base64
 import re
+from collections.abc import Collection
 from datetime import datetime
 from datetime import timedelta
 from typing import Any
@@ -40,7 +41,7 @@ class ChapterPluginKAL(ChapterPluginEntity):
         return approx_date.isoformat()
 
     @classmethod
-    def parse_info_feed(cls, entity_id: str) -> list[Any]:
+    def parse_info_feed(cls, entity_id: str, known_ids: Collection[str] = frozenset()) -> list[Any]:
         url = f"{cls.entity_url}/manga/{entity_id}"
         scraper = cls.fetch_and_parse(url)
 
@@ -58,7 +59,9 @@ class ChapterPluginKAL(ChapterPluginEntity):
 
             href = item_content.get("href")
             assert isinstance(href, str), f"Expected str for href, got {type(href)}"
-            chapter_id = href.split("manga/")[-1].replace("/", "-")
+            chapter_id = f"{entity_id}-{href.split('manga/')[-1].replace('/', '-')}".lower()
+            if chapter_id in known_ids:
+                break
             link = f"{cls.entity_url}{href}"
 
             chapter_title_list = item_content.find_all("strong", {"class": "chapter-title"})
@@ -77,7 +80,7 @@ class ChapterPluginKAL(ChapterPluginEntity):
             content.append(
                 cls.ResponseBuilder.build(
                     cls.build_chapter_data(
-                        chapter_id=f"{entity_id}-{chapter_id}".lower(),
+                        chapter_id=chapter_id,
                         entity_id=entity_id,
                         title=chapter_title,
                         url=link,
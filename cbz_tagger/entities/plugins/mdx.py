@@ -1,5 +1,9 @@
 import logging
 import time
+from collections.abc import Collection
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from typing import Any
 
 from cbz_tagger.common.enums import Urls
@@ -22,9 +26,15 @@ class ChapterPluginMDX(ChapterPluginEntity):
     entity_url: str = f"https://api.{BASE_URL}/manga"
     download_url: str = f"https://api.{BASE_URL}/at-home/server"
     chapter_url: str = f"https://uploads.{BASE_URL}"
+    chapter_workers = 2
+    feed_overlap = timedelta(days=1)  # Chapters can show up in the feed a while after their last update
 
     @classmethod
-    def fetch_chapters(cls, entity_id: str) -> list:
+    def fetch_chapters(
+        cls, entity_id: str, updated_since: datetime | None = None, known_ids: Collection[str] = frozenset()
+    ) -> list:
+        """Fetch the chapter feed, only the chapters updated since updated_since when it is given."""
+        _ = known_ids
         order = {
             "createdAt": "asc",
             "updatedAt": "asc",
@@ -34,6 +44,9 @@ class ChapterPluginMDX(ChapterPluginEntity):
             "chapter": "asc",
         }
         params = "&".join([f"order%5B{key}%5D={value}" for key, value in order.items()])
+        if updated_since is not None:
+            since = (updated_since - cls.feed_overlap).astimezone(timezone.utc)
+            params += f"&updatedAtSince={since.strftime('%Y-%m-%dT%H:%M:%S')}"
         return cls.unpaginate_request(f"{cls.entity_url}/{entity_id}/feed?{params}")
 
     def get_chapter_url(self):
@@ -41,7 +54,7 @@ class ChapterPluginMDX(ChapterPluginEntity):
         return url
 
     @classmethod
-    def parse_info_feed(cls, entity_id: str) -> list[Any]:
+    def parse_info_feed(cls, entity_id: str, known_ids: Collection[str] = frozenset()) -> list[Any]:
         return []
 
     def parse_chapter_download_links(self, url: str) -> list[str]:
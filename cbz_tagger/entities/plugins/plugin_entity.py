@@ -1,16 +1,16 @@
 import logging
-import os
 from abc import abstractmethod
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from io import BytesIO
 from typing import Any
 
-from PIL import Image
-from PIL import ImageFile
-
+from cbz_tagger.common.cbz_writer import CbzWriter
 from cbz_tagger.common.enums import ChapterData
 from cbz_tagger.common.enums import ChapterResponseBuilder
+from cbz_tagger.common.env import AppEnv
 from cbz_tagger.common.html_scraper import HtmlScraper
+from cbz_tagger.common.images import ImageTranscoder
 from cbz_tagger.entities.base_entity import BaseEntity
 
 logger = logging.getLogger()
@@ -32,10 +32,21 @@ class ChapterPluginEntity(BaseEntity):
     TITLE_URL: str = ""  # Must be set by subclasses; used to construct entity links
     ResponseBuilder = ChapterResponseBuilder
     quality = "data"  # Default quality for chapter images; can be overridden by subclasses if needed
+    page_workers = 4  # Number of chapter pages downloaded in parallel
+    chapter_workers = 1  # Number of chapters from this source downloaded in parallel
+    transcoder = ImageTranscoder(AppEnv.TRANSCODE_WORKERS)  # Shared by every plugin to convert non-JPEG pages
 
     @classmethod
-    def fetch_chapters(cls, entity_id: str) -> list[Any]:
-        return cls.parse_info_feed(entity_id)
+    def fetch_chapters(
+        cls, entity_id: str, updated_since: datetime | None = None, known_ids: Collection[str] = frozenset()
+    ) -> list[Any]:
+        """Fetch the chapter listing of an entity.
+
+        Scraped listings have no reliable update dates, so updated_since is only used by feeds that can filter on it.
+        They do list the newest chapters first, parsing stops at the first chapter already in known_ids.
+        """
+        _ = updated_since
+        return cls.parse_info_feed(entity_id, known_ids=known_ids)
 
     @classmethod
     def fetch_and_parse(cls, url: str) -> HtmlScraper:
@@ -133,11 +144,12 @@ class ChapterPluginEntity(BaseEntity):
 
     @classmethod
     @abstractmethod
-    def parse_info_feed(cls, entity_id: str) -> list[Any]:
+    def parse_info_feed(cls, entity_id: str, known_ids: Collection[str] = frozenset()) -> list[Any]:
         """Fetch and parse chapter listings for an entity.
 
         Args:
             entity_id: The unique identifier for the manga/series
+            known_ids: Chapter ids that are already stored, listings stop at the first one they reach
 
         Returns:
             List of chapter response dicts. Use build_chapter_data() and
@@ -192,27 +204,35 @@ class ChapterPluginEntity(BaseEntity):
             scanlation_group=scanlation_group,
         )
 
-    def download_chapter(self, filepath) -> list[str]:
+    def download_page(self, image_url: str) -> bytes:
+        image = self.download_file(image_url)
+        return self.transcoder.to_jpeg(image)
+
+    def download_page_to_cbz(self, cbz_writer: CbzWriter, index: int, image_url: str) -> None:
+        cbz_writer.add_page(index, self.download_page(image_url))
+
+    def download_chapter(self, cbz_writer: CbzWriter) -> list[str]:
         # Get chapter image urls
         url = self.get_chapter_url()
         download_links = self.parse_chapter_download_links(url)
 
-        # Download the images for the chapter
-        cached_images = []
-        for index, image_url in enumerate(download_links):
-            image_path = os.path.join(filepath, f"{index + 1:03}.jpg")
-            cached_images.append(image_path)
-            if not os.path.exists(image_path):
-                image = self.download_file(image_url)
-                in_memory_image = Image.open(BytesIO(image))
-                if in_memory_image.format != "JPEG":
-                    in_memory_image = in_memory_image.convert("RGB")
-                try:
-                    in_memory_image.save(image_path, quality=95, optimize=True)
-                except OSError:
-                    ImageFile.LOAD_TRUNCATED_IMAGES = True  # type: ignore[misc]
-                    in_memory_image.save(image_path, quality=95, optimize=True)
-
+        # Download the images for the chapter straight into the CBZ, the writer keeps them in page order and the host
+        # rate limiter still paces the parallel requests
+        with ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+            futures = [
+                executor.submit(self.download_page_to_cbz, cbz_writer, index, image_url)
+                for index, image_url in enumerate(download_links)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Stop queued pages from starting, the pages already in flight finish before the error is raised
+                for future in futures:
+                    future.cancel()
+                raise
+
+        cached_images = [cbz_writer.page_name(index) for index in range(cbz_writer.page_count)]
         if self.pages != -1 and len(cached_images) != self.pages:
             logger.error("Failed to download chapter %s, not enough pages saved from server", self.entity_id)
             raise EnvironmentError(f"Failed to download chapter {self.entity_id}, not enough pages saved from server")
@@ -1,5 +1,6 @@
 import base64
 import re
+from collections.abc import Collection
 from typing import Any
 
 from bs4.element import Tag
@@ -15,7 +16,7 @@ class ChapterPluginWBC(ChapterPluginEntity):
     entity_url = f"https://{BASE_URL}/"
 
     @classmethod
-    def parse_info_feed(cls, entity_id: str) -> list[Any]:
+    def parse_info_feed(cls, entity_id: str, known_ids: Collection[str] = frozenset()) -> list[Any]:
         url = f"{cls.entity_url}series/{entity_id}/full-chapter-list"
         scraper = cls.fetch_and_parse(url)
 
@@ -32,6 +33,8 @@ class ChapterPluginWBC(ChapterPluginEntity):
             href = item_content.get("href")
             assert isinstance(href, str), f"Expected str for href, got {type(href)}"
             chapter_id = href.split("chapters/")[-1]
+            if f"{entity_id}-{chapter_id}".lower() in known_ids:
+                break
             link = f"{cls.entity_url}chapters/{chapter_id}"
 
             item_x_data = item.get("x-data")
@@ -1,12 +1,57 @@
+import bisect
+import functools
 import math
 
 from cbz_tagger.entities.base_entity import BaseEntity
 
 
+class VolumeIndex:
+    """Chapter to volume lookup over the chapter ranges of a volume map.
+
+    The ranges are flattened once into sorted, contiguous segments so a chapter is found with a bisect rather than
+    a scan of the map. Where ranges overlap, the segment belongs to the range listed first in the map.
+    """
+
+    __slots__ = ("volume_map", "starts", "end", "segment_volumes", "max_volume_step")
+
+    def __init__(self, volume_map: list[tuple[str, float, float]]):
+        self.volume_map = tuple(volume_map)
+        points = sorted({point for _, start, end in self.volume_map for point in (start, end)})
+        self.starts: list[float] = []
+        self.segment_volumes: list[str | None] = []
+        for start in points[:-1]:
+            volume = next((key for key, low, high in self.volume_map if low <= start < high), None)
+            if self.segment_volumes and self.segment_volumes[-1] == volume:
+                continue
+            self.starts.append(start)
+            self.segment_volumes.append(volume)
+        self.end = points[-1] if points else 0.0
+        self.max_volume_step = float(max((end - start for _, start, end in self.volume_map), default=0.0))
+
+    def find(self, chapter: float) -> str | None:
+        position = bisect.bisect_right(self.starts, chapter) - 1
+        if position < 0 or chapter >= self.end:
+            return None
+        return self.segment_volumes[position]
+
+    @property
+    def last_volume(self) -> str:
+        return self.volume_map[-1][0]
+
+    @property
+    def last_volume_chapter(self) -> float:
+        return float(self.volume_map[-1][2])
+
+
 class VolumeEntity(BaseEntity):
     entity_url: str = f"{BaseEntity.base_url}/manga"
     paginated: bool = False
 
+    def __init__(self, content):
+        super().__init__(content)
+        # Synthetic volume indexes built from the cover volumes, keyed by the chapter count and volumes used
+        self.synthetic_indexes: dict[tuple[int | float, tuple[float, ...]], VolumeIndex] = {}
+
     @classmethod
     def from_server_url(cls, query_params: dict | None = None, **kwargs):
         if query_params is None:
@@ -24,22 +69,26 @@ class VolumeEntity(BaseEntity):
             return {}
         return volumes
 
-    @property
-    def volumes(self):
-        volumes = {}
+    @functools.cached_property
+    def valid_volumes(self) -> tuple[tuple[str, tuple[str, ...]], ...]:
+        """Chapters listed per volume in the aggregate response, computed once per response."""
+        volumes = []
         for volume_key, volume in self.aggregate.items():
             volume_chapters = volume["chapters"]
             if isinstance(volume_chapters, dict):
-                chapters = list(volume_chapters.keys())
                 # If a chapter appears in an incorrect volume remove it
-                chapters = [chapter for chapter in chapters if self.chapter_is_valid(volume_key, chapter)]
-                volumes[volume_key] = chapters
-        return volumes
+                chapters = tuple(chapter for chapter in volume_chapters if self.chapter_is_valid(volume_key, chapter))
+                volumes.append((volume_key, chapters))
+        return tuple(volumes)
 
     @property
-    def volume_map(self) -> list[tuple[str, float, float]]:
+    def volumes(self):
+        return {volume_key: list(chapters) for volume_key, chapters in self.valid_volumes}
+
+    @functools.cached_property
+    def volume_index(self) -> VolumeIndex:
         volume_list = []
-        for volume_key, volume in self.volumes.items():
+        for volume_key, volume in self.valid_volumes:
             # Volume may be defined with no keys
             if volume_key == "none":
                 continue
@@ -51,7 +100,7 @@ class VolumeEntity(BaseEntity):
 
         volume_list = sorted(volume_list, key=lambda x: float(x[0]))
         if len(volume_list) == 0:
-            return [("-1", 0.0, 0.0)]
+            return VolumeIndex([("-1", 0.0, 0.0)])
 
         final_volume_chapter = volume_list[-1][2] + 1.0
         volume_ends = [item[1] for item in volume_list][1:] + [final_volume_chapter]
@@ -62,15 +111,19 @@ class VolumeEntity(BaseEntity):
                 volume_start = 0.0
             volume_map.append((volume_key, volume_start, volume_end))
 
-        return volume_map
+        return VolumeIndex(volume_map)
 
     @property
+    def volume_map(self) -> list[tuple[str, float, float]]:
+        return list(self.volume_index.volume_map)
+
+    @functools.cached_property
     def last_volume(self):
         # Check if there are any volumes
-        if len(self.volumes) == 0:
+        if len(self.valid_volumes) == 0:
             return -1
         # Check if there are any chapters
-        valid_keys = [float(key) for key in self.volumes if key != "none"]
+        valid_keys = [float(key) for key, _ in self.valid_volumes if key != "none"]
         if len(valid_keys) == 0:
             # No volumes with any valid keys
             return -1
@@ -80,8 +133,8 @@ class VolumeEntity(BaseEntity):
     @property
     def chapters(self) -> set[str]:
         chapters = set()
-        for volume_chapters in self.volumes.values():
-            chapters.update(set(volume_chapters))
+        for _, volume_chapters in self.valid_volumes:
+            chapters.update(volume_chapters)
         return chapters
 
     @staticmethod
@@ -105,37 +158,43 @@ class VolumeEntity(BaseEntity):
         max_chapter_number: int | float | None = None,
         cover_volumes: list[float] | None = None,
     ) -> str:
-        volume_map = self.volume_map
-        if len(volume_map) == 0:
-            return "-1"
-
-        if len(volume_map) == 1 and volume_map[0][0] == "-1":
+        volume_index = self.volume_index
+        if len(volume_index.volume_map) == 1 and volume_index.last_volume == "-1":
             if max_chapter_number is not None and cover_volumes is not None and len(cover_volumes) > 1:
-                # Create a synthetic volume map
-                volume_map = []
-                chapters_per_volume = max_chapter_number / len(cover_volumes)
-                for idx, volume in enumerate(cover_volumes):
-                    volume_start = idx * chapters_per_volume
-                    volume_end = (idx + 1) * chapters_per_volume
-                    volume_map.append((str(int(volume)), math.ceil(volume_start), math.ceil(volume_end)))
+                volume_index = self.get_synthetic_volume_index(max_chapter_number, tuple(cover_volumes))
             else:
                 return "-1"
 
-        for volume_number, volume_start, volume_end in volume_map:
-            if volume_start <= math.floor(float(chapter_number)) < volume_end:
-                return volume_number
+        volume = volume_index.find(math.floor(float(chapter_number)))
+        if volume is not None:
+            return volume
 
         # Attempt to allocate a synthetic volume
         chapter_num = float(chapter_number)
         if chapter_num > self.last_volume:
-            # Determine the maximum chapters in a known volume
-            max_volume_step = float(max(end - start for _, start, end in volume_map))
-            last_volume = int(volume_map[-1][0])
-            last_volume_chapter = float(volume_map[-1][2])
+            last_volume = int(volume_index.last_volume)
             # Determine the number of synthetic volumes
-            synthetic_volumes = math.ceil((chapter_num - last_volume_chapter) / max_volume_step)
+            synthetic_volumes = math.ceil(
+                (chapter_num - volume_index.last_volume_chapter) / volume_index.max_volume_step
+            )
             if synthetic_volumes == 0:
                 synthetic_volumes += 1
             return str(int(last_volume + synthetic_volumes))
 
         return "-1"
+
+    def get_synthetic_volume_index(
+        self, max_chapter_number: int | float, cover_volumes: tuple[float, ...]
+    ) -> VolumeIndex:
+        """Spread the chapters evenly over the cover volumes when the aggregate has no volume data."""
+        key = (max_chapter_number, cover_volumes)
+        if key in self.synthetic_indexes:
+            return self.synthetic_indexes[key]
+        volume_map = []
+        chapters_per_volume = max_chapter_number / len(cover_volumes)
+        for idx, volume in enumerate(cover_volumes):
+            volume_start = idx * chapters_per_volume
+            volume_end = (idx + 1) * chapters_per_volume
+            volume_map.append((str(int(volume)), math.ceil(volume_start), math.ceil(volume_end)))
+        self.synthetic_indexes[key] = VolumeIndex(volume_map)
+        return self.synthetic_indexes[key]
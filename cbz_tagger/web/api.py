@@ -14,6 +14,7 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from cbz_tagger.common.env import AppEnv
+from cbz_tagger.common.file_watcher import FileWatcher
 from cbz_tagger.common.plugins import Plugins
 from cbz_tagger.database.file_scanner import FileScanner
 from cbz_tagger.entities.base_entity import BaseEntity
@@ -41,6 +42,7 @@ _proxy_state: dict[str, str | None] = {"status": "unknown", "external_ip": None}
 PROXY_CHECK_URL = "https://ifconfig.me"
 PROXY_CHECK_INTERVAL_GOOD = 1800  # 30 minutes
 PROXY_CHECK_INTERVAL_BAD = 300  # 5 minutes
+WATCH_READ_TIMEOUT = 5
 
 
 # Lifespan context manager for startup/shutdown events
@@ -74,6 +76,27 @@ async def lifespan(_: FastAPI):
         asyncio.create_task(background_refresh())
         logger.info("Background scanner timer started successfully")
 
+    if env.WATCH_SCAN_PATH:
+
+        async def background_watch():
+            """Background task that processes new files in the scan path as they land."""
+            loop = asyncio.get_event_loop()
+            watcher = await loop.run_in_executor(None, FileWatcher, scanner.scan_path, env.WATCH_POLL_INTERVAL)
+            pending: set[str] = set()
+            while True:
+                try:
+                    pending.update(await loop.run_in_executor(None, watcher.read, WATCH_READ_TIMEOUT))
+                    # Files that land during a refresh wait for it to finish, the refresh may already take them
+                    if pending and not is_scanner_busy():
+                        filepaths, pending = sorted(pending), set()
+                        await run_scanner_operation(watch_scan_path_operation, filepaths)
+                except Exception as e:
+                    logger.error("Error in scan path watcher: %s", e)
+                    await asyncio.sleep(WATCH_READ_TIMEOUT)
+
+        asyncio.create_task(background_watch())
+        logger.info("Scan path watcher started successfully")
+
     if env.PROXY_URL is not None:
 
         async def background_proxy_check():
@@ -236,18 +259,29 @@ async def run_scanner_operation(operation, *args, **kwargs):
     lock_scanner()
     try:
         loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, operation, *args, **kwargs)
+        result = await loop.run_in_executor(None, run_locked_operation, operation, *args, **kwargs)
         return result
     finally:
         unlock_scanner()
 
 
+def run_locked_operation(operation, *args, **kwargs):
+    """Run an operation while holding the scanner lock, so the database it works on can't be reloaded under it."""
+    with scanner.lock:
+        return operation(*args, **kwargs)
+
+
 # Scanner operation functions
 def refresh_scanner_operation():
     """Refresh the scanner by running a full scan."""
     scanner.run()
 
 
+def watch_scan_path_operation(filepaths: list[str]):
+    """Process new files reported by the scan path watcher."""
+    scanner.run_watch(filepaths)
+
+
 def add_series_operation(
     entity_name: str, entity_id: str, backend: dict | None, enable_tracking: bool, mark_all_tracked: bool
 ):
@@ -278,6 +312,11 @@ def clean_orphaned_files_operation():
     scanner.entity_database.remove_orphaned_covers()
 
 
+def retag_chapters_operation() -> int:
+    """Retag every chapter in storage with the current metadata."""
+    return scanner.entity_database.retag_chapters(scanner.storage_path)
+
+
 def reload_scanner_operation():
     """Reload the scanner to refresh its internal state."""
     scanner.reload_scanner()
@@ -297,7 +336,6 @@ def clear_logs_operation() -> None:
 
 def get_scanner_state_operation():
     """Get the current state of the scanner."""
-    scanner.reload_scanner()
     return scanner.to_state()
 
 
@@ -319,15 +357,14 @@ def check_proxy_status_operation() -> tuple[str, str]:
 
 def get_series_list_operation():
     """Get the list of all series in the database."""
-    scanner.reload_scanner()
-    return list(scanner.entity_database.entity_map.items())
+    return list(scanner.read_database().entity_map.items())
 
 
 def get_chapters_operation(entity_id: str):
     """Get chapters for a specific series."""
-    scanner.reload_scanner()
-    chapters = scanner.entity_database.chapters.database.get(entity_id, [])
-    entity_downloads = scanner.entity_database.entity_downloads
+    entity_database = scanner.read_database()
+    chapters = entity_database.chapters.database.get(entity_id, [])
+    entity_downloads = entity_database.entity_downloads
     return [
         {
             "entity_id": chapter.entity_id,
@@ -453,6 +490,13 @@ async def clean_orphaned_files():
     return {"message": "Orphaned files cleaned successfully"}
 
 
+@app.post("/api/scanner/retag", response_model=MessageResponse)
+async def retag_chapters():
+    """Retag every chapter in storage with the current metadata."""
+    retagged = await run_scanner_operation(retag_chapters_operation)
+    return {"message": f"Retagged {retagged} chapters successfully"}
+
+
 @app.get("/api/logs", response_model=LogsResponse)
 async def get_logs(max_lines: int = 1000):
     """Get the last N lines of the log file."""
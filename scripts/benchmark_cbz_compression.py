@@ -0,0 +1,66 @@
+"""Compare building a CBZ with every member deflated against the image aware compression policy.
+
+Usage: uv run python -m scripts.benchmark_cbz_compression [pages] [repeats]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from zipfile import ZIP_DEFLATED
+from zipfile import ZipFile
+
+from cbz_tagger.common.cbz_writer import get_compress_type
+
+PAGE_PATH = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "page.jpg"
+COMIC_INFO = "<?xml version='1.0' encoding='utf-8'?><ComicInfo>" + "<Summary>Lorem ipsum</Summary>" * 50 + "</ComicInfo>"
+
+
+def build(path: str, page: bytes, pages: int, policy) -> None:
+    with ZipFile(path, "w", ZIP_DEFLATED) as zip_write:
+        zip_write.writestr("ComicInfo.xml", COMIC_INFO, compress_type=policy("ComicInfo.xml"))
+        for index in range(pages):
+            name = f"{index + 1:03}.jpg"
+            zip_write.writestr(name, page, compress_type=policy(name))
+
+
+def read_all(path: str) -> None:
+    with ZipFile(path, "r") as zip_read:
+        for item in zip_read.infolist():
+            zip_read.read(item.filename)
+
+
+def measure(page: bytes, pages: int, repeats: int, policy) -> tuple[float, float, int]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "chapter.cbz")
+        build_times, read_times = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            build(path, page, pages, policy)
+            build_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            read_all(path)
+            read_times.append(time.perf_counter() - start)
+        return min(build_times), min(read_times), os.path.getsize(path)
+
+
+def main() -> None:
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    page = PAGE_PATH.read_bytes()
+
+    results = {
+        "deflate everything": measure(page, pages, repeats, lambda name: ZIP_DEFLATED),
+        "store images": measure(page, pages, repeats, get_compress_type),
+    }
+
+    print(f"{pages} pages of {len(page) / 1024:.0f} KiB, best of {repeats}")
+    print(f"{'policy':<20}{'build (ms)':>12}{'read (ms)':>12}{'size (KiB)':>14}")
+    for name, (build_time, read_time, size) in results.items():
+        print(f"{name:<20}{build_time * 1000:>12.1f}{read_time * 1000:>12.1f}{size / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
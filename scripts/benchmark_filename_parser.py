@@ -0,0 +1,81 @@
+"""Measure chapter filename parsing throughput, with and without the parse cache.
+
+Usage: uv run python -m scripts.benchmark_filename_parser [series] [repeats]
+"""
+
+import sys
+import time
+
+from cbz_tagger.entities.cbz_entity import CbzEntity
+from cbz_tagger.entities.cbz_entity import parse_chapter_filename
+
+# Chapter names in the shapes seen in real scan folders, each is expanded to a range of chapter numbers
+TEMPLATES = [
+    "{series} - {number}.cbz",
+    "{series} - {number:03}.cbz",
+    "{series} - {number:03}.5.cbz",
+    "{series} - Chapter {number}.cbz",
+    "{series} - Chapter {number:03}.1.cbz",
+    "{series} - Ch. {number:03}.cbz",
+    "{series} - Ch.{number:03}.cbz",
+    "{series} - Vol. 02 Ch. {number:03} - Some Title.cbz",
+    "{series} - Volume 3 - Chapter {number}.cbz",
+    "{series} - Volume {number}.cbz",
+    "{series} - extra part - Chapter {number:03}.cbz",
+    "{series} v01 c{number:03} (2021) (Digital) (Group).cbz",
+    "{series} - Chapter {number} Part 2.cbz",
+    "{series} #{number}.cbz",
+]
+
+
+def build_corpus(series_count: int) -> list[str]:
+    return [
+        f"Series {series}/{template.format(series=f'Series {series}', number=number)}"
+        for series in range(series_count)
+        for template in TEMPLATES
+        for number in range(1, 21)
+    ]
+
+
+def access_like_build(filepath: str) -> None:
+    # A scanned file is looked up several times on its way through the scanner and CbzEntity.build
+    cbz_entity = CbzEntity(filepath)
+    _ = cbz_entity.get_name_and_chapter()
+    _ = cbz_entity.chapter_is_volume, cbz_entity.chapter_number, cbz_entity.chapter_is_volume
+    _ = cbz_entity.chapter_number
+
+
+def measure(corpus: list[str], repeats: int, function) -> float:
+    times = []
+    for _ in range(repeats):
+        parse_chapter_filename.cache_clear()
+        start = time.perf_counter()
+        for filepath in corpus:
+            function(filepath)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    series_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    corpus = build_corpus(series_count)
+
+    uncached = parse_chapter_filename.__wrapped__
+    results = {
+        "parse (uncached)": measure(corpus, repeats, uncached),
+        "parse (cached)": measure(corpus, repeats, parse_chapter_filename),
+        "scanner accesses (uncached)": measure(
+            corpus, repeats, lambda filepath: [uncached(filepath) for _ in range(6)]
+        ),
+        "scanner accesses (cached)": measure(corpus, repeats, access_like_build),
+    }
+
+    print(f"{len(corpus)} filenames, best of {repeats}")
+    print(f"{'case':<30}{'total (ms)':>12}{'files/s':>14}")
+    for name, elapsed in results.items():
+        print(f"{name:<30}{elapsed * 1000:>12.1f}{len(corpus) / elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
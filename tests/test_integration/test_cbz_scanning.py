@@ -53,6 +53,6 @@ def test_process_cbz_files(mock_get_input, integration_scanner, build_test_cbz):
 
 def test_process_cbz_files_with_no_files(integration_scanner):
     """This test will process the full scanner when no outputs are present. It should do nothing."""
-    integration_scanner.process = mock.MagicMock()
+    integration_scanner.process_files = mock.MagicMock()
     integration_scanner.run_scan()
-    integration_scanner.process.assert_not_called()
+    integration_scanner.process_files.assert_not_called()
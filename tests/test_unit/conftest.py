@@ -1,5 +1,27 @@
+from unittest import mock
+
 import pytest
 
+from cbz_tagger.common.images import ImageTranscoder
+from cbz_tagger.common.rate_limiter import HostLimit
+from cbz_tagger.common.rate_limiter import RateLimiter
+from cbz_tagger.entities.base_entity import BaseEntity
+from cbz_tagger.entities.plugins.plugin_entity import ChapterPluginEntity
+
+
+@pytest.fixture(autouse=True)
+def unlimited_rate_limiter():
+    # Requests are mocked in unit tests, pacing them would only add sleeps to the assertions
+    with mock.patch.object(BaseEntity, "rate_limiter", RateLimiter({}, HostLimit(rate=0))):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def inline_image_transcoder():
+    # Convert pages on the test thread so mocked images don't have to cross into worker processes
+    with mock.patch.object(ChapterPluginEntity, "transcoder", ImageTranscoder(0)):
+        yield
+
 
 @pytest.fixture
 def manga_name():
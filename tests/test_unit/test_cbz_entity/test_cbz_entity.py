@@ -1,9 +1,14 @@
 import os
+import shutil
 from unittest import mock
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_STORED
+from zipfile import ZipFile
 
 import pytest
 
 from cbz_tagger.entities.cbz_entity import CbzEntity
+from cbz_tagger.entities.cbz_entity import parse_chapter_filename
 
 
 @pytest.fixture
@@ -211,6 +216,86 @@ def test_one_off_chapter_number_parsing(template_name, expected_chapter):
     assert entity.chapter_number == expected_chapter
 
 
+@pytest.mark.parametrize(
+    "filepath, expected",
+    [
+        ("Series/Series - Chapter 001.cbz", ("Series", "1", None, None, None, False)),
+        ("Series/Series - Chapter 012.5.cbz", ("Series", "12.5", None, None, "5", False)),
+        ("Series/Series - Volume 03 - Chapter 7 Part 2.cbz", ("Series", "7", "3", "2", None, False)),
+        ("Series/Series - Volume 04.cbz", ("Series", "4", "4", None, None, True)),
+        ("Series/Series - Extra.cbz", ("Series", None, None, None, None, True)),
+    ],
+)
+def test_parse_chapter_filename(filepath, expected):
+    parsed = parse_chapter_filename(filepath)
+    assert (parsed.series, parsed.chapter, parsed.volume, parsed.part, parsed.decimal, parsed.is_volume) == expected
+
+
+def test_chapter_filename_is_parsed_once():
+    parse_chapter_filename.cache_clear()
+    entity = CbzEntity("Series/Series - Chapter 001.cbz")
+    for _ in range(3):
+        assert entity.get_name_and_chapter() == ("Series", "1")
+        assert not entity.chapter_is_volume
+    assert parse_chapter_filename.cache_info().misses == 1
+
+    with pytest.raises(ValueError):
+        _ = CbzEntity("Series/Series - Extra.cbz").chapter_number
+
+
 def test_get_name_and_chapter():
     entity = CbzEntity("Simple Name/Simple name - 001.cbz")
     assert entity.get_name_and_chapter() == ("Simple Name", "1")
+
+
+@pytest.fixture
+def scanned_cbz_entity(temp_dir, tests_fixtures_path):
+    scan_path = os.path.join(temp_dir, "scan")
+    config_path = os.path.join(temp_dir, "config")
+    os.makedirs(os.path.join(scan_path, "series name"))
+    os.makedirs(os.path.join(config_path, "images"))
+    shutil.copy(os.path.join(tests_fixtures_path, "page.jpg"), os.path.join(config_path, "images", "cover.jpg"))
+
+    cbz_entity = CbzEntity(
+        "series name/series name - chapter 1.cbz", config_path, scan_path, os.path.join(temp_dir, "storage")
+    )
+    with ZipFile(cbz_entity.get_entity_read_path(), "w", ZIP_DEFLATED) as zip_write:
+        zip_write.write(os.path.join(tests_fixtures_path, "page.jpg"), "001.jpg")
+        zip_write.write(os.path.join(tests_fixtures_path, "page.jpg"), "002.jpg")
+        zip_write.writestr("ComicInfo.xml", "<ComicInfo>old</ComicInfo>")
+    return cbz_entity
+
+
+@mock.patch("cbz_tagger.entities.cbz_entity.set_file_ownership")
+@mock.patch(
+    "cbz_tagger.entities.cbz_entity.make_directory_with_ownership",
+    side_effect=lambda path: os.makedirs(path, exist_ok=True),
+)
+def test_build_copies_pages_raw_and_writes_new_metadata(mock_make_directory, mock_set_ownership, scanned_cbz_entity):
+    _ = mock_make_directory, mock_set_ownership
+    with ZipFile(scanned_cbz_entity.get_entity_read_path()) as zip_read:
+        source_pages = {
+            item.filename: (item.compress_type, item.CRC, item.compress_size)
+            for item in zip_read.infolist()
+            if item.filename.endswith(".jpg")
+        }
+
+    with mock.patch("zipfile.ZipFile.read") as mock_read:
+        scanned_cbz_entity.build("Series Name", "<ComicInfo>new</ComicInfo>", "cover.jpg", "{}")
+        # Pages are never inflated on the way through
+        mock_read.assert_not_called()
+
+    write_path = scanned_cbz_entity.get_entity_write_path("Series Name", "1")
+    with ZipFile(write_path) as zip_read:
+        assert zip_read.testzip() is None
+        assert zip_read.namelist() == ["001.jpg", "002.jpg", "ComicInfo.xml", "000_cover.jpg"]
+        pages = {
+            item.filename: (item.compress_type, item.CRC, item.compress_size)
+            for item in zip_read.infolist()
+            if item.filename in source_pages
+        }
+        assert pages == source_pages
+        assert zip_read.getinfo("ComicInfo.xml").compress_type == ZIP_DEFLATED
+        assert zip_read.getinfo("000_cover.jpg").compress_type == ZIP_STORED
+        assert zip_read.read("ComicInfo.xml") == b"<ComicInfo>new</ComicInfo>"
+    assert not os.path.exists(scanned_cbz_entity.get_entity_read_path())
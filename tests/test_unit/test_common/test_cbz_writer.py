@@ -0,0 +1,159 @@
+import io
+import os
+from unittest import mock
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_STORED
+from zipfile import ZipFile
+
+import pytest
+
+from cbz_tagger.common.cbz_writer import CbzWriter
+from cbz_tagger.common.cbz_writer import copy_member
+from cbz_tagger.common.cbz_writer import get_compress_type
+from cbz_tagger.common.cbz_writer import replace_members
+from cbz_tagger.common.cbz_writer import supports_raw_copy
+
+
+def test_cbz_writer_writes_pages_in_order(temp_dir):
+    cbz_writer = CbzWriter(os.path.join(temp_dir, "chapter.cbz"))
+    cbz_writer.write("ComicInfo.xml", "<ComicInfo/>")
+    cbz_writer.add_page(2, b"page 3")
+    cbz_writer.add_page(0, b"page 1")
+    assert cbz_writer.page_count == 1
+    cbz_writer.add_page(1, b"page 2")
+    assert cbz_writer.page_count == 3
+
+    # Nothing is visible at the destination until the archive is committed
+    assert not os.path.exists(cbz_writer.filepath)
+    cbz_writer.commit()
+    assert not os.path.exists(cbz_writer.temp_path)
+
+    with ZipFile(cbz_writer.filepath) as zip_read:
+        # Metadata is written after the pages
+        assert zip_read.namelist() == ["001.jpg", "002.jpg", "003.jpg", "ComicInfo.xml"]
+        assert zip_read.read("003.jpg") == b"page 3"
+        # Pages are stored as is, only text members are deflated
+        assert zip_read.getinfo("001.jpg").compress_type == ZIP_STORED
+        assert zip_read.getinfo("ComicInfo.xml").compress_type == ZIP_DEFLATED
+
+    # Discarding after a commit leaves the archive in place
+    cbz_writer.discard()
+    assert os.path.exists(cbz_writer.filepath)
+
+
+def test_cbz_writer_commit_fails_with_missing_page(temp_dir):
+    cbz_writer = CbzWriter(os.path.join(temp_dir, "chapter.cbz"))
+    cbz_writer.add_page(1, b"page 2")
+
+    with pytest.raises(EnvironmentError, match="Missing page 1"):
+        cbz_writer.commit()
+    assert not os.path.exists(cbz_writer.filepath)
+
+
+def test_cbz_writer_discard_removes_partial_archive(temp_dir):
+    cbz_writer = CbzWriter(os.path.join(temp_dir, "chapter.cbz"))
+    cbz_writer.add_page(0, b"page 1")
+    assert os.path.exists(cbz_writer.temp_path)
+
+    cbz_writer.discard()
+    assert not os.path.exists(cbz_writer.temp_path)
+    assert not os.path.exists(cbz_writer.filepath)
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("001.jpg", ZIP_STORED),
+        ("cover.JPEG", ZIP_STORED),
+        ("page.png", ZIP_STORED),
+        ("page.webp", ZIP_STORED),
+        ("ComicInfo.xml", ZIP_DEFLATED),
+        ("notes.txt", ZIP_DEFLATED),
+    ],
+)
+def test_get_compress_type(name, expected):
+    assert get_compress_type(name) == expected
+
+
+def test_supports_raw_copy_on_supported_python():
+    # CI runs the supported Python, so the raw copy below is checked against that zipfile module
+    with ZipFile(io.BytesIO(), "w") as zip_write:
+        assert supports_raw_copy(zip_write)
+        with mock.patch("cbz_tagger.common.cbz_writer.RAW_COPY_VERSIONS", ((3, 0), (3, 1))):
+            assert not supports_raw_copy(zip_write)
+
+
+@pytest.mark.parametrize("raw_copy", [True, False])
+def test_copy_member_keeps_compressed_data(temp_dir, raw_copy):
+    # Writing to a stream that cannot seek puts the sizes in a data descriptor after each member
+    source = io.BytesIO()
+    with ZipFile(_UnseekableWriter(source), "w", ZIP_DEFLATED) as zip_write:
+        zip_write.writestr("001.jpg", b"page 1" * 1000)
+        zip_write.writestr("002.jpg", b"page 2", compress_type=ZIP_STORED)
+    source.seek(0)
+
+    copy_path = os.path.join(temp_dir, "copy.cbz")
+    with ZipFile(source, "r") as zip_read:
+        with ZipFile(copy_path, "w", ZIP_DEFLATED) as zip_write:
+            with mock.patch("cbz_tagger.common.cbz_writer.supports_raw_copy", return_value=raw_copy):
+                for item in zip_read.infolist():
+                    copy_member(zip_read, item, zip_write)
+            zip_write.writestr("ComicInfo.xml", "<ComicInfo/>")
+        source_items = [(i.filename, i.compress_type, i.CRC, i.compress_size) for i in zip_read.infolist()]
+
+    with ZipFile(copy_path, "r") as zip_read:
+        assert zip_read.testzip() is None
+        copied_items = [(i.filename, i.compress_type, i.CRC, i.compress_size) for i in zip_read.infolist()]
+        assert copied_items[:2] == source_items
+        assert zip_read.read("001.jpg") == b"page 1" * 1000
+        assert zip_read.read("002.jpg") == b"page 2"
+        assert zip_read.read("ComicInfo.xml") == b"<ComicInfo/>"
+
+
+class _UnseekableWriter(io.RawIOBase):
+    def __init__(self, buffer: io.BytesIO):
+        self.buffer = buffer
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self.buffer.write(b)
+
+
+@pytest.fixture
+def tagged_cbz(temp_dir):
+    filepath = os.path.join(temp_dir, "chapter.cbz")
+    with ZipFile(filepath, "w", ZIP_DEFLATED) as zip_write:
+        zip_write.writestr("001.jpg", os.urandom(64 * 1024), compress_type=ZIP_STORED)
+        zip_write.writestr("ComicInfo.xml", "<ComicInfo>old</ComicInfo>")
+        zip_write.writestr("000_cover.jpg", b"cover", compress_type=ZIP_STORED)
+    return filepath
+
+
+def test_replace_members_keeps_other_members(tagged_cbz):
+    with ZipFile(tagged_cbz) as zip_read:
+        page = zip_read.getinfo("001.jpg")
+
+    replace_members(tagged_cbz, {"ComicInfo.xml": "<ComicInfo>new</ComicInfo>"})
+    assert not os.path.exists(f"{tagged_cbz}.part")
+
+    with ZipFile(tagged_cbz) as zip_read:
+        assert zip_read.testzip() is None
+        assert zip_read.namelist() == ["001.jpg", "000_cover.jpg", "ComicInfo.xml"]
+        assert zip_read.getinfo("001.jpg").CRC == page.CRC
+        assert zip_read.read("ComicInfo.xml") == b"<ComicInfo>new</ComicInfo>"
+        assert zip_read.read("000_cover.jpg") == b"cover"
+
+
+def test_replace_members_leaves_archive_when_interrupted(tagged_cbz):
+    with open(tagged_cbz, "rb") as cbz_file:
+        original = cbz_file.read()
+
+    with mock.patch("cbz_tagger.common.cbz_writer.os.replace", side_effect=OSError("interrupted")):
+        with pytest.raises(OSError):
+            replace_members(tagged_cbz, {"ComicInfo.xml": "<ComicInfo>new</ComicInfo>"})
+
+    assert not os.path.exists(f"{tagged_cbz}.part")
+    with open(tagged_cbz, "rb") as cbz_file:
+        assert cbz_file.read() == original
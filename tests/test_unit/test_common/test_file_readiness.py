@@ -0,0 +1,65 @@
+import os
+import time
+from zipfile import ZipFile
+
+import pytest
+
+from cbz_tagger.common.file_readiness import FileReadiness
+from cbz_tagger.common.file_readiness import FileState
+from cbz_tagger.common.file_readiness import has_end_of_central_directory
+
+
+@pytest.fixture
+def cbz_path(temp_dir):
+    path = os.path.join(temp_dir, "chapter.cbz")
+    with ZipFile(path, "w") as zip_write:
+        zip_write.writestr("001.jpg", os.urandom(4096))
+        zip_write.writestr("ComicInfo.xml", "<ComicInfo/>")
+    return path
+
+
+def set_age(path, seconds):
+    timestamp = time.time() - seconds
+    os.utime(path, (timestamp, timestamp))
+
+
+def test_has_end_of_central_directory(cbz_path):
+    assert has_end_of_central_directory(cbz_path)
+
+    with open(cbz_path, "rb") as cbz_file:
+        data = cbz_file.read()
+    for truncated in (data[:-10], data[:-30], data[: len(data) // 2], b""):
+        with open(cbz_path, "wb") as cbz_file:
+            cbz_file.write(truncated)
+        assert not has_end_of_central_directory(cbz_path)
+
+
+def test_file_readiness_waits_for_file_to_settle(cbz_path):
+    readiness = FileReadiness()
+    assert readiness.check(cbz_path) == FileState.PENDING
+
+    set_age(cbz_path, readiness.settle_time)
+    assert readiness.check(cbz_path) == FileState.PENDING
+    assert readiness.check(cbz_path) == FileState.READY
+
+    # Any change after the last check means the file is being written again
+    with open(cbz_path, "ab") as cbz_file:
+        cbz_file.write(b"more")
+    set_age(cbz_path, readiness.settle_time)
+    assert readiness.check(cbz_path) == FileState.PENDING
+
+
+def test_file_readiness_flags_abandoned_partial_files(cbz_path):
+    readiness = FileReadiness()
+    with open(cbz_path, "r+b") as cbz_file:
+        cbz_file.truncate(100)
+
+    set_age(cbz_path, readiness.settle_time)
+    assert readiness.check(cbz_path) == FileState.PENDING
+    set_age(cbz_path, readiness.abandon_time)
+    readiness.forget(cbz_path)
+    assert readiness.check(cbz_path) == FileState.INVALID
+
+
+def test_file_readiness_missing_file_is_pending(temp_dir):
+    assert FileReadiness().check(os.path.join(temp_dir, "missing.cbz")) == FileState.PENDING
@@ -0,0 +1,92 @@
+import os
+from unittest import mock
+
+import pytest
+
+from cbz_tagger.common.file_watcher import FileWatcher
+from cbz_tagger.common.file_watcher import InotifyWatcher
+from cbz_tagger.common.file_watcher import PollingWatcher
+
+
+def write_file(path, data=b"data"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def create_inotify_watcher(path):
+    try:
+        return InotifyWatcher(path)
+    except OSError:
+        pytest.skip("inotify is not available")
+
+
+@pytest.fixture
+def inotify_watcher(temp_dir):
+    watcher = create_inotify_watcher(temp_dir)
+    try:
+        yield watcher
+    finally:
+        watcher.close()
+
+
+def test_inotify_watcher_reports_existing_and_new_files(temp_dir):
+    existing_path = os.path.join(temp_dir, "series", "chapter 1.cbz")
+    write_file(existing_path)
+    watcher = create_inotify_watcher(temp_dir)
+    try:
+        # Files written before the watch started come from the initial walk
+        assert watcher.read(0) == [existing_path]
+
+        new_path = os.path.join(temp_dir, "series", "chapter 2.cbz")
+        write_file(new_path)
+        write_file(os.path.join(temp_dir, "series", "notes.txt"))
+        assert watcher.read(1) == [new_path]
+    finally:
+        watcher.close()
+
+
+def test_inotify_watcher_follows_new_folders(inotify_watcher, temp_dir):
+    new_path = os.path.join(temp_dir, "new series", "chapter 1.cbz")
+    write_file(new_path)
+
+    cbz_files = []
+    for _ in range(5):
+        cbz_files.extend(inotify_watcher.read(0.2))
+    assert cbz_files == [new_path]
+    assert os.path.join(temp_dir, "new series") in inotify_watcher.watches.values()
+
+
+def test_polling_watcher_reports_new_and_changed_files(temp_dir):
+    first_path = os.path.join(temp_dir, "series", "chapter 1.cbz")
+    write_file(first_path)
+    watcher = PollingWatcher(temp_dir, interval=0)
+    assert watcher.read(0) == [first_path]
+    assert watcher.read(0) == []
+
+    second_path = os.path.join(temp_dir, "series", "chapter 2.cbz")
+    write_file(second_path)
+    write_file(first_path, b"more data")
+    assert sorted(watcher.read(0)) == [first_path, second_path]
+
+
+def test_polling_watcher_waits_for_interval(temp_dir):
+    watcher = PollingWatcher(temp_dir, interval=60)
+    watcher.read(0)
+    write_file(os.path.join(temp_dir, "series", "chapter 1.cbz"))
+    with mock.patch("cbz_tagger.common.file_watcher.time.sleep") as mock_sleep:
+        assert watcher.read(5) == []
+    mock_sleep.assert_called_once_with(5)
+
+
+@mock.patch("cbz_tagger.common.file_watcher.InotifyWatcher", side_effect=OSError("unavailable"))
+def test_file_watcher_batches_relative_paths(mock_inotify, temp_dir):
+    _ = mock_inotify
+    file_watcher = FileWatcher(temp_dir, poll_interval=0)
+    assert isinstance(file_watcher.watcher, PollingWatcher)
+    file_watcher.quiet_period = 0
+    assert file_watcher.read(0) == []
+
+    write_file(os.path.join(temp_dir, "series", "chapter 2.cbz"))
+    write_file(os.path.join(temp_dir, "series", "chapter 1.cbz"))
+    assert file_watcher.read(1) == [os.path.join("series", "chapter 1.cbz"), os.path.join("series", "chapter 2.cbz")]
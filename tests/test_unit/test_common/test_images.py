@@ -0,0 +1,86 @@
+import os
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from cbz_tagger.common.images import ImageTranscoder
+from cbz_tagger.common.images import is_complete_jpeg
+from cbz_tagger.common.images import write_jpeg
+
+
+@pytest.fixture
+def jpeg_bytes(tests_fixtures_path):
+    with open(os.path.join(tests_fixtures_path, "page.jpg"), "rb") as image_file:
+        return image_file.read()
+
+
+@pytest.fixture
+def png_bytes():
+    buffer = BytesIO()
+    Image.new("RGBA", (8, 8), (255, 0, 0, 128)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_is_complete_jpeg(jpeg_bytes, png_bytes):
+    assert is_complete_jpeg(jpeg_bytes)
+    assert is_complete_jpeg(jpeg_bytes + b"\x00\x00")
+    assert not is_complete_jpeg(jpeg_bytes[: len(jpeg_bytes) // 2])
+    assert not is_complete_jpeg(jpeg_bytes[:3] + b"not a jpeg" + jpeg_bytes[-2:])
+    assert not is_complete_jpeg(png_bytes)
+    assert not is_complete_jpeg(b"")
+
+
+def test_write_jpeg_passes_jpeg_through(jpeg_bytes, temp_dir):
+    image_path = os.path.join(temp_dir, "001.jpg")
+    with patch("cbz_tagger.common.images.convert_to_jpeg") as mock_convert:
+        write_jpeg(jpeg_bytes, image_path)
+        mock_convert.assert_not_called()
+
+    with open(image_path, "rb") as image_file:
+        assert image_file.read() == jpeg_bytes
+
+
+def test_write_jpeg_converts_other_formats(png_bytes, temp_dir):
+    image_path = os.path.join(temp_dir, "001.jpg")
+    write_jpeg(png_bytes, image_path)
+
+    with Image.open(image_path) as image:
+        assert image.format == "JPEG"
+        assert image.mode == "RGB"
+        assert image.size == (8, 8)
+
+
+def test_write_jpeg_reencodes_truncated_jpeg(jpeg_bytes, temp_dir):
+    image_path = os.path.join(temp_dir, "001.jpg")
+    write_jpeg(jpeg_bytes[: len(jpeg_bytes) - 1024], image_path)
+
+    with open(image_path, "rb") as image_file:
+        assert is_complete_jpeg(image_file.read())
+
+
+def test_image_transcoder_converts_on_worker_processes(jpeg_bytes, png_bytes):
+    transcoder = ImageTranscoder(1)
+    try:
+        # JPEG pages are returned without starting the pool
+        assert transcoder.to_jpeg(jpeg_bytes) is jpeg_bytes
+        assert transcoder._executor is None
+
+        converted = transcoder.to_jpeg(png_bytes)
+        assert transcoder._executor is not None
+    finally:
+        transcoder.shutdown()
+
+    with Image.open(BytesIO(converted)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (8, 8)
+
+
+@patch("cbz_tagger.common.images.encode_jpeg", return_value=b"converted")
+def test_image_transcoder_without_workers_converts_inline(mock_encode, png_bytes):
+    transcoder = ImageTranscoder(0)
+
+    assert transcoder.to_jpeg(png_bytes) == b"converted"
+    mock_encode.assert_called_once_with(png_bytes)
+    assert transcoder._executor is None
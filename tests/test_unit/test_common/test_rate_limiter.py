@@ -0,0 +1,94 @@
+import threading
+from unittest import mock
+
+from cbz_tagger.common.enums import Urls
+from cbz_tagger.common.env import AppEnv
+from cbz_tagger.common.rate_limiter import HostLimit
+from cbz_tagger.common.rate_limiter import RateLimiter
+from cbz_tagger.common.rate_limiter import TokenBucket
+
+
+@mock.patch("cbz_tagger.common.rate_limiter.time.monotonic", return_value=100.0)
+def test_token_bucket_allows_burst_then_paces(mock_monotonic):
+    bucket = TokenBucket(HostLimit(rate=2, burst=3))
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Each caller past the burst waits for its own slot
+    assert bucket.reserve() == 0.5
+    assert bucket.reserve() == 1.0
+
+    # Tokens refill with time, up to the burst size
+    mock_monotonic.return_value = 110.0
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == 0.5
+
+
+def test_token_bucket_unlimited_rate():
+    bucket = TokenBucket(HostLimit(rate=0))
+    assert all(bucket.reserve() == 0.0 for _ in range(100))
+
+
+@mock.patch("cbz_tagger.common.rate_limiter.time.sleep")
+@mock.patch("cbz_tagger.common.rate_limiter.time.monotonic", return_value=100.0)
+def test_token_bucket_acquire_sleeps_for_reservation(mock_monotonic, mock_sleep):
+    _ = mock_monotonic
+    bucket = TokenBucket(HostLimit(rate=4, burst=1))
+
+    with bucket.acquire():
+        pass
+    mock_sleep.assert_not_called()
+
+    with bucket.acquire():
+        pass
+    mock_sleep.assert_called_once_with(0.25)
+
+
+def test_token_bucket_limits_concurrency():
+    bucket = TokenBucket(HostLimit(rate=0, concurrency=1))
+    entered = threading.Event()
+
+    def worker():
+        with bucket.acquire():
+            entered.set()
+
+    with bucket.acquire():
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not entered.wait(0.1)
+    thread.join(timeout=1)
+    assert entered.is_set()
+
+
+def test_rate_limiter_uses_a_bucket_per_host():
+    limiter = RateLimiter()
+
+    api_bucket = limiter.get_bucket(f"https://api.{Urls.MDX}/manga?limit=100")
+    assert api_bucket is limiter.get_bucket(f"https://API.{Urls.MDX}/chapter")
+    assert api_bucket.limit.rate == 5
+    assert limiter.get_bucket(f"https://uploads.{Urls.MDX}/covers/a.jpg").limit.rate == 20
+
+    other_bucket = limiter.get_bucket("https://example.com/page")
+    assert other_bucket is not api_bucket
+    assert other_bucket.limit is limiter.default_limit
+
+
+def test_rate_limiter_parse_limits():
+    limits = RateLimiter.parse_limits("example.com=2:4:1, Other.com=0.5,bad=entry,:,")
+
+    assert set(limits) == {"example.com", "other.com"}
+    assert (limits["example.com"].rate, limits["example.com"].burst, limits["example.com"].concurrency) == (2, 4, 1)
+    assert (limits["other.com"].rate, limits["other.com"].burst, limits["other.com"].concurrency) == (0.5, 1, 0)
+    assert RateLimiter.parse_limits(None) == {}
+
+
+def test_rate_limiter_from_env():
+    with (
+        mock.patch.object(AppEnv, "RATE_LIMITS", f"uploads.{Urls.MDX}=50:50"),
+        mock.patch.object(AppEnv, "DELAY_PER_REQUEST", 0.25),
+    ):
+        limiter = RateLimiter.from_env()
+
+    assert limiter.limits[f"uploads.{Urls.MDX}"].rate == 50
+    assert limiter.limits[f"api.{Urls.MDX}"].rate == 5
+    assert limiter.default_limit.rate == 4
+    assert RateLimiter.host_limits[f"uploads.{Urls.MDX}"].rate == 20
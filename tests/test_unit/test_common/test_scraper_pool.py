@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import requests_mock
+
+from cbz_tagger.common.scraper_pool import ScraperPool
+from cbz_tagger.entities.base_entity import BaseEntity
+
+
+def test_scraper_pool_reuses_sessions_per_host_and_browser():
+    pool = ScraperPool()
+    scraper = pool.get("https://api.example.com/manga", "chrome", "windows")
+
+    assert pool.get("https://api.example.com/chapter?limit=100", "chrome", "windows") is scraper
+    assert pool.get("https://uploads.example.com/data/1.png", "chrome", "windows") is not scraper
+    assert pool.get("https://api.example.com/manga", "firefox", "windows") is not scraper
+    assert len(pool) == 3
+
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_scraper_pool_bounds_connection_pools():
+    pool = ScraperPool()
+    scraper = pool.get("https://api.example.com/manga", "chrome", "windows")
+
+    for adapter in scraper.adapters.values():
+        assert adapter.poolmanager.connection_pool_kw["maxsize"] == ScraperPool.pool_maxsize
+        assert adapter.poolmanager.connection_pool_kw["block"] is True
+
+
+def test_scraper_pool_discard_creates_a_new_session():
+    pool = ScraperPool()
+    scraper = pool.get("https://api.example.com/manga", "chrome", "windows")
+
+    with patch.object(scraper, "close") as mock_close:
+        pool.discard("https://api.example.com/manga", "chrome", "windows", scraper)
+        # Other threads may still be using the session, it is left for them to finish with
+        mock_close.assert_not_called()
+    assert len(pool) == 0
+    replacement = pool.get("https://api.example.com/manga", "chrome", "windows")
+    assert replacement is not scraper
+    # A late failure on the old session doesn't drop its replacement
+    pool.discard("https://api.example.com/manga", "chrome", "windows", scraper)
+    assert pool.get("https://api.example.com/manga", "chrome", "windows") is replacement
+    # Discarding a session that was never created is a no-op
+    pool.discard("https://missing.example.com", "chrome", "windows")
+
+
+@patch("cbz_tagger.entities.base_entity.time.sleep")
+def test_request_with_retry_reuses_pooled_session(mock_sleep):
+    _ = mock_sleep
+    with patch.object(BaseEntity, "scraper_pool", ScraperPool()) as pool, requests_mock.Mocker() as rm:
+        rm.get("http://example.com/file", content=b"file content")
+
+        BaseEntity.download_file("http://example.com/file")
+        BaseEntity.download_file("http://example.com/file")
+
+        assert rm.call_count == 2
+        assert len(pool) == 1
+
+
+@patch("cbz_tagger.entities.base_entity.time.sleep")
+def test_request_with_retry_discards_session_after_forbidden(mock_sleep):
+    _ = mock_sleep
+    with patch.object(BaseEntity, "scraper_pool", ScraperPool()) as pool, requests_mock.Mocker() as rm:
+        rm.get("http://example.com/file", [{"status_code": 403}, {"content": b"file content"}])
+
+        BaseEntity.download_file("http://example.com/file")
+
+        # Only the session for the browser config that succeeded is kept
+        assert len(pool) == 1
@@ -6,9 +6,8 @@ import requests
 from cbz_tagger.entities.base_entity import BaseEntity
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_unpaginate_request_success(mock_sleep, mock_random, requests_mock):
+def test_unpaginate_request_success(mock_sleep, requests_mock):
     url = "https://api.example.com/data"
     data = [{"id": 1}, {"id": 2}]
     requests_mock.get(url, json={"data": data, "total": 2})
@@ -17,9 +16,8 @@ def test_unpaginate_request_success(mock_sleep, mock_random, requests_mock):
     assert result == data
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_unpaginate_request_multiple_pages(mock_sleep, mock_random, requests_mock):
+def test_unpaginate_request_multiple_pages(mock_sleep, requests_mock):
     url = "https://api.example.com/data"
     data_page_1 = [{"id": 1}, {"id": 2}]
     data_page_2 = [{"id": 3}, {"id": 4}]
@@ -29,9 +27,8 @@ def test_unpaginate_request_multiple_pages(mock_sleep, mock_random, requests_moc
     assert result == data_page_1 + data_page_2
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_unpaginate_request_api_down(mock_sleep, mock_random, requests_mock):
+def test_unpaginate_request_api_down(mock_sleep, requests_mock):
     url = "https://api.example.com/data"
     requests_mock.get(url, exc=requests.exceptions.JSONDecodeError("Expecting value", "", 0))
 
@@ -41,9 +38,8 @@ def test_unpaginate_request_api_down(mock_sleep, mock_random, requests_mock):
         BaseEntity.unpaginate_request(url)
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_unpaginate_request_with_duplicates_single_page(mock_sleep, mock_random, requests_mock, caplog):
+def test_unpaginate_request_with_duplicates_single_page(mock_sleep, requests_mock, caplog):
     """Test that duplicates in a single page response are detected and removed."""
     url = "https://api.example.com/data"
     # Response contains duplicates - id 1 appears twice, but total says 2 (which should match unique count)
@@ -65,9 +61,8 @@ def test_unpaginate_request_with_duplicates_single_page(mock_sleep, mock_random,
         assert result == expected_result
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_unpaginate_request_with_duplicates_multiple_pages(mock_sleep, mock_random, requests_mock):
+def test_unpaginate_request_with_duplicates_multiple_pages(mock_sleep, requests_mock):
     """Test that duplicates across multiple pages are detected and removed."""
     url = "https://api.example.com/data"
     # Page 1 has ids 1, 2
@@ -91,9 +86,8 @@ def test_unpaginate_request_with_duplicates_multiple_pages(mock_sleep, mock_rand
         assert result == expected_result
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_unpaginate_request_no_duplicates_no_warning(mock_sleep, mock_random, requests_mock):
+def test_unpaginate_request_no_duplicates_no_warning(mock_sleep, requests_mock):
     """Test that no warning is logged when there are no duplicates."""
     url = "https://api.example.com/data"
     data = [{"id": 1, "name": "first"}, {"id": 2, "name": "second"}]
@@ -109,9 +103,8 @@ def test_unpaginate_request_no_duplicates_no_warning(mock_sleep, mock_random, re
         assert result == data
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_unpaginate_request_preserves_order_when_deduplicating(mock_sleep, mock_random, requests_mock):
+def test_unpaginate_request_preserves_order_when_deduplicating(mock_sleep, requests_mock):
     """Test that the original order is preserved when removing duplicates."""
     url = "https://api.example.com/data"
     # Complex case with multiple duplicates in different positions
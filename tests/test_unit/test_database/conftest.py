@@ -8,6 +8,7 @@ import pytest
 from cbz_tagger.common.enums import Urls
 from cbz_tagger.database.author_entity_db import AuthorEntityDB
 from cbz_tagger.database.chapter_entity_db import ChapterEntityDB
+from cbz_tagger.database.chapter_table import ChapterTable
 from cbz_tagger.database.cover_entity_db import CoverEntityDB
 from cbz_tagger.database.entity_db import EntityDB
 from cbz_tagger.database.metadata_entity_db import MetadataEntityDB
@@ -55,7 +56,7 @@ def mock_volume_db(volume_request_response, manga_request_id):
 def mock_chapter_db(chapter_request_response, manga_request_id):
     entities = [ChapterEntity(data) for data in chapter_request_response["data"]]
     entity_db = ChapterEntityDB()
-    entity_db.database[manga_request_id] = entities
+    entity_db.database[manga_request_id] = ChapterTable.from_entities(entities)
     return entity_db
 
 
@@ -0,0 +1,103 @@
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from cbz_tagger.database.chapter_download_scheduler import ChapterDownloadScheduler
+
+
+@pytest.fixture
+def mock_entity_db_pipeline(mock_entity_db, manga_request_id):
+    mock_entity_db.entity_tracked.add(manga_request_id)
+    mock_entity_db.build_chapter_metadata = mock.MagicMock()
+    mock_entity_db.fetch_chapter_pages = mock.MagicMock()
+    mock_entity_db.build_chapter_cbz = mock.MagicMock()
+    mock_entity_db.complete_chapter_download = mock.MagicMock()
+    mock_entity_db.abort_chapter_download = mock.MagicMock()
+    yield mock_entity_db
+
+
+def test_scheduler_runs_every_stage_for_missing_chapters(mock_entity_db_pipeline, manga_request_id, temp_dir):
+    missing_chapters = mock_entity_db_pipeline.get_missing_chapters()
+    chapter_ids = [chapter_item.entity_id for _, chapter_item in missing_chapters]
+    main_thread = threading.current_thread()
+    completed_threads = []
+    mock_entity_db_pipeline.complete_chapter_download.side_effect = lambda *args: completed_threads.append(
+        threading.current_thread()
+    )
+    prepared_threads = []
+    mock_entity_db_pipeline.build_chapter_metadata.side_effect = lambda *args: prepared_threads.append(
+        threading.current_thread()
+    )
+
+    ChapterDownloadScheduler(mock_entity_db_pipeline, temp_dir).run(missing_chapters)
+
+    fetched = [call.args[0].entity_id for call in mock_entity_db_pipeline.fetch_chapter_pages.call_args_list]
+    completed = [call.args[1].entity_id for call in mock_entity_db_pipeline.complete_chapter_download.call_args_list]
+    assert sorted(fetched) == sorted(chapter_ids)
+    assert sorted(completed) == sorted(chapter_ids)
+    assert mock_entity_db_pipeline.build_chapter_cbz.call_count == len(chapter_ids)
+    # The database is only used from the calling thread
+    assert prepared_threads == [main_thread] * len(chapter_ids)
+    assert completed_threads == [main_thread] * len(chapter_ids)
+    mock_entity_db_pipeline.abort_chapter_download.assert_not_called()
+    for call in mock_entity_db_pipeline.complete_chapter_download.call_args_list:
+        assert call.args[0] == manga_request_id
+        assert call.args[2] == temp_dir
+
+
+def test_scheduler_skips_downloaded_chapters(mock_entity_db_pipeline, manga_request_id, temp_dir):
+    missing_chapters = mock_entity_db_pipeline.get_missing_chapters()
+    mock_entity_db_pipeline.entity_downloads.add((manga_request_id, missing_chapters[0][1].entity_id))
+
+    ChapterDownloadScheduler(mock_entity_db_pipeline, temp_dir).run(missing_chapters)
+
+    assert mock_entity_db_pipeline.fetch_chapter_pages.call_count == len(missing_chapters) - 1
+
+
+def test_scheduler_aborts_failed_chapters_only(mock_entity_db_pipeline, temp_dir):
+    missing_chapters = mock_entity_db_pipeline.get_missing_chapters()
+    failed_chapter = missing_chapters[1][1]
+
+    def fetch_chapter_pages(chapter_item, cbz_writer):
+        os.makedirs(os.path.dirname(cbz_writer.filepath), exist_ok=True)
+        cbz_writer.write("ComicInfo.xml", "<ComicInfo/>")
+        if chapter_item is failed_chapter:
+            raise EnvironmentError("Failed to download chapter")
+
+    mock_entity_db_pipeline.fetch_chapter_pages.side_effect = fetch_chapter_pages
+
+    ChapterDownloadScheduler(mock_entity_db_pipeline, temp_dir).run(missing_chapters)
+
+    mock_entity_db_pipeline.abort_chapter_download.assert_called_once()
+    assert mock_entity_db_pipeline.abort_chapter_download.call_args.args[1] is failed_chapter
+    assert mock_entity_db_pipeline.build_chapter_cbz.call_count == len(missing_chapters) - 1
+    assert mock_entity_db_pipeline.complete_chapter_download.call_count == len(missing_chapters) - 1
+    # Partially written archives are removed once a chapter is finished or has failed
+    for entity_id, chapter_item in missing_chapters:
+        _, chapter_filepath = mock_entity_db_pipeline.get_chapter_filepath(entity_id, chapter_item, temp_dir)
+        assert not os.path.exists(f"{chapter_filepath}.cbz.part")
+
+
+def test_scheduler_raises_unexpected_errors(mock_entity_db_pipeline, temp_dir):
+    missing_chapters = mock_entity_db_pipeline.get_missing_chapters()
+    mock_entity_db_pipeline.build_chapter_cbz.side_effect = RuntimeError("Unexpected")
+
+    with pytest.raises(RuntimeError, match="Unexpected"):
+        ChapterDownloadScheduler(mock_entity_db_pipeline, temp_dir).run(missing_chapters)
+
+    mock_entity_db_pipeline.complete_chapter_download.assert_not_called()
+
+
+def test_scheduler_aborts_chapters_without_metadata(mock_entity_db_pipeline, temp_dir):
+    missing_chapters = mock_entity_db_pipeline.get_missing_chapters()
+    mock_entity_db_pipeline.build_chapter_metadata.side_effect = [EnvironmentError("Missing cover")] + [None] * (
+        len(missing_chapters) - 1
+    )
+
+    ChapterDownloadScheduler(mock_entity_db_pipeline, temp_dir).run(missing_chapters)
+
+    mock_entity_db_pipeline.abort_chapter_download.assert_called_once()
+    assert mock_entity_db_pipeline.abort_chapter_download.call_args.args[1] is missing_chapters[0][1]
+    assert mock_entity_db_pipeline.fetch_chapter_pages.call_count == len(missing_chapters) - 1
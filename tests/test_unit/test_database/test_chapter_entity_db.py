@@ -4,9 +4,24 @@ from unittest.mock import MagicMock
 import pytest
 
 from cbz_tagger.database.chapter_entity_db import ChapterEntityDB
+from cbz_tagger.database.chapter_table import ChapterTable
 from cbz_tagger.entities.chapter_entity import ChapterEntity
 
 
+def chapter_fields(chapter):
+    return (
+        chapter.entity_id,
+        chapter.entity_type,
+        chapter.chapter_string,
+        chapter.volume_number,
+        chapter.translated_language,
+        chapter.pages,
+        chapter.scanlation_group,
+        chapter.updated_date,
+        chapter.get_chapter_url(),
+    )
+
+
 def test_chapter_entity_db(chapter_request_response, manga_request_id):
     with mock.patch.object(ChapterEntity, "from_server_url") as mock_from_server_url:
         mock_from_server_url.return_value = [ChapterEntity(data) for data in chapter_request_response["data"]]
@@ -15,11 +30,32 @@ def test_chapter_entity_db(chapter_request_response, manga_request_id):
         mock_from_server_url.assert_called_once_with(query_params={"ids[]": [manga_request_id]})
 
         assert len(entity_db) == 1
-        assert isinstance(entity_db[manga_request_id], list)
+        assert isinstance(entity_db[manga_request_id], ChapterTable)
         # 2 responses are not english. We should have only 2 real chapters.
         assert len(entity_db[manga_request_id]) == 2
         for i in range(len(entity_db)):
-            assert entity_db[manga_request_id][i].content == chapter_request_response["data"][i]
+            expected = ChapterEntity(chapter_request_response["data"][i])
+            assert chapter_fields(entity_db[manga_request_id][i]) == chapter_fields(expected)
+
+
+def test_chapter_entity_db_update_fetches_from_stored_cursor(chapter_request_response, manga_request_id):
+    chapters = [ChapterEntity(data) for data in chapter_request_response["data"]]
+    with mock.patch.object(ChapterEntity, "from_server_url") as mock_from_server_url:
+        mock_from_server_url.return_value = chapters[:1]
+        entity_db = ChapterEntityDB()
+        entity_db.update(manga_request_id)
+        stored = entity_db[manga_request_id]
+
+        mock_from_server_url.return_value = chapters[1:]
+        entity_db.update(manga_request_id)
+        mock_from_server_url.assert_called_with(
+            query_params={"ids[]": [manga_request_id]},
+            updated_since=chapters[0].updated_date,
+            known_ids=frozenset(stored.ids),
+        )
+
+    expected = ChapterEntityDB.remove_chapter_duplicate_entries(chapters[1:] + chapters[:1])
+    assert [chapter.entity_id for chapter in entity_db[manga_request_id]] == [chapter.entity_id for chapter in expected]
 
 
 def test_chapter_entity_db_return_list_if_only_one_chapter(chapter_request_response, manga_request_id):
@@ -29,8 +65,9 @@ def test_chapter_entity_db_return_list_if_only_one_chapter(chapter_request_respo
         entity_db.update(manga_request_id)
 
         assert len(entity_db) == 1
-        assert isinstance(entity_db[manga_request_id], list)
-        assert entity_db[manga_request_id][0].content == chapter_request_response["data"][0]
+        assert isinstance(entity_db[manga_request_id], ChapterTable)
+        expected = ChapterEntity(chapter_request_response["data"][0])
+        assert chapter_fields(entity_db[manga_request_id][0]) == chapter_fields(expected)
 
 
 def test_chapter_entity_db_can_store_and_load(chapter_request_response, manga_request_id):
@@ -38,17 +75,45 @@ def test_chapter_entity_db_can_store_and_load(chapter_request_response, manga_re
         mock_from_server_url.return_value = [ChapterEntity(data) for data in chapter_request_response["data"]]
         entity_db = ChapterEntityDB()
         entity_db.update(manga_request_id)
-        assert isinstance(entity_db[manga_request_id], list)
+        assert isinstance(entity_db[manga_request_id], ChapterTable)
 
         json_str = entity_db.to_json()
         new_entity_db = ChapterEntityDB.from_json(json_str)
-        assert isinstance(new_entity_db[manga_request_id], list)
-        assert entity_db[manga_request_id][0].content == new_entity_db[manga_request_id][0].content
+        assert isinstance(new_entity_db[manga_request_id], ChapterTable)
+        assert chapter_fields(entity_db[manga_request_id][0]) == chapter_fields(new_entity_db[manga_request_id][0])
 
         new_json_str = new_entity_db.to_json()
         assert json_str == new_json_str
 
 
+def test_chapter_entity_db_loads_chapter_lists(chapter_request_response, manga_request_id):
+    chapters = [ChapterEntity(data) for data in chapter_request_response["data"]]
+    entity_db = ChapterEntityDB.from_content({manga_request_id: [chapter.to_json() for chapter in chapters]})
+
+    # Never decoded, so the stored list is written back unchanged
+    assert entity_db.entity_to_json(manga_request_id) == [chapter.to_json() for chapter in chapters]
+
+    table = entity_db[manga_request_id]
+    assert isinstance(table, ChapterTable)
+    assert [chapter_fields(chapter) for chapter in table] == [chapter_fields(chapter) for chapter in chapters]
+    assert entity_db.entity_to_json(manga_request_id) == [table.to_json()]
+
+
+def test_chapter_entity_db_latest_and_max_chapter(mock_chapter_db, manga_request_id):
+    assert mock_chapter_db.get_latest_chapter(manga_request_id).chapter_string == "11"
+    assert mock_chapter_db.get_max_chapter_number(manga_request_id) == 11.0
+    assert mock_chapter_db.get_latest_chapter("missing") is None
+    assert mock_chapter_db.get_max_chapter_number("missing") == 0.0
+
+
+def test_chapter_entity_db_get_missing_chapters(mock_chapter_db, manga_request_id):
+    chapter_ids = mock_chapter_db.get_chapter_ids(manga_request_id)
+    downloads = {(manga_request_id, chapter_id) for chapter_id in chapter_ids[1:]}
+
+    missing = mock_chapter_db.get_missing_chapters(manga_request_id, downloads)
+    assert [chapter.entity_id for chapter in missing] == chapter_ids[:1]
+
+
 def test_group_chapters_individually():
     chapter_a = ChapterEntity(
         content={
@@ -192,3 +257,37 @@ mock_chapter_group3 = MagicMock(scanlation_group="group3")
 def test_filter_chapters_by_priority_scanlation_groups(grouped_chapters, priority_groups, expected_filtered_chapters):
     result = ChapterEntityDB.filter_chapters_by_priority_scanlation_groups(grouped_chapters, priority_groups)
     assert result == expected_filtered_chapters
+
+
+def build_chapter(chapter, group, chapter_id=None):
+    return ChapterEntity(
+        content={
+            "id": chapter_id or f"{chapter}-{group}",
+            "attributes": {"chapter": chapter, "translatedLanguage": "en"},
+            "relationships": [{"type": "scanlation_group", "id": group}],
+        }
+    )
+
+
+def test_merge_chapters_matches_full_dedupe():
+    stored = [build_chapter("1", "group1"), build_chapter("2", "group2"), build_chapter("3", "group2")]
+    existing = ChapterTable.from_entities(stored)
+    fetched = [build_chapter("2", "group1"), build_chapter("3", "group3"), build_chapter("4", "group1")]
+
+    merged = ChapterEntityDB.merge_chapters(existing, list(fetched))
+    expected = ChapterEntityDB.remove_chapter_duplicate_entries(fetched + stored)
+    assert [chapter.entity_id for chapter in merged] == [chapter.entity_id for chapter in expected]
+    assert [chapter.entity_id for chapter in merged] == ["1-group1", "2-group1", "3-group2", "4-group1"]
+
+
+def test_merge_chapters_only_builds_updated_chapter_numbers():
+    existing = ChapterTable.from_entities(build_chapter(f"{number}", "group1") for number in range(1, 101))
+    fetched = [build_chapter("50", "group2"), build_chapter("101", "group1")]
+
+    with mock.patch.object(ChapterTable, "chapter", side_effect=ChapterTable.chapter, autospec=True) as mock_chapter:
+        merged = ChapterEntityDB.merge_chapters(existing, fetched)
+
+    assert mock_chapter.call_count == 1
+    assert len(merged) == 101
+    assert merged.ids[49] == "50-group1"
+    assert merged.ids[100] == "101-group1"
@@ -0,0 +1,103 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import pytest
+
+from cbz_tagger.common.enums import ChapterData
+from cbz_tagger.common.enums import ChapterResponseBuilder
+from cbz_tagger.database.chapter_table import ChapterTable
+from cbz_tagger.entities.chapter_entity import ChapterEntity
+
+
+def build_chapter(chapter="1", updated_at=None, pages=-1, scanlation_group=None, plugin_type="kal"):
+    return ChapterEntity(
+        ChapterResponseBuilder.build(
+            ChapterData(
+                chapter_id=f"chapter-{chapter}",
+                entity_id="series",
+                plugin_type=plugin_type,
+                title=f"Chapter {chapter}",
+                url=f"https://example.com/{chapter}",
+                chapter=chapter,
+                pages=pages,
+                volume="2",
+                created_at=updated_at,
+                updated_at=updated_at,
+                scanlation_group=scanlation_group,
+            )
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "updated_at, expected",
+    [
+        ("2024-10-15T20:55:38+02:00", datetime(2024, 10, 15, 20, 55, 38, tzinfo=timezone(timedelta(hours=2)))),
+        ("2024-10-15T20:55:38", datetime(2024, 10, 15, 20, 55, 38)),
+        ("Tue, 15 Oct 2024 20:55:38 +0000", datetime(2024, 10, 15, 20, 55, 38, tzinfo=timezone.utc)),
+        (None, None),
+    ],
+)
+def test_chapter_table_keeps_updated_date(updated_at, expected):
+    table = ChapterTable.from_json(ChapterTable.from_entities([build_chapter(updated_at=updated_at)]).to_json())
+    updated_date = table[0].updated_date
+    assert updated_date == expected
+    assert (updated_date is None or updated_date.utcoffset()) == (expected is None or expected.utcoffset())
+
+
+def test_chapter_table_keeps_chapter_fields():
+    chapters = [
+        build_chapter("12.5", pages=20, scanlation_group="Group-A"),
+        build_chapter("3", scanlation_group="Group-A"),
+        build_chapter("1.1.1", plugin_type="wbc"),
+    ]
+    table = ChapterTable.from_json(ChapterTable.from_entities(chapters).to_json())
+
+    assert len(table) == 3
+    assert table.labels.count("group-a") == 1
+    for expected, actual in zip(chapters, table, strict=True):
+        assert actual.entity_id == expected.entity_id
+        assert actual.entity_type == expected.entity_type
+        assert actual.chapter_number == expected.chapter_number
+        assert actual.padded_chapter_string == expected.padded_chapter_string
+        assert actual.volume_number == expected.volume_number
+        assert actual.pages == expected.pages
+        assert actual.scanlation_group == expected.scanlation_group
+        assert actual.get_chapter_url() == expected.get_chapter_url()
+
+
+def test_chapter_table_slices_and_finds_chapters():
+    table = ChapterTable.from_entities(build_chapter(f"{number}") for number in range(1, 6))
+
+    assert [chapter.chapter_string for chapter in table[1:3]] == ["2", "3"]
+    assert table[-1].chapter_string == "5"
+    assert table.position_of("chapter-4") == 3
+    assert table.position_of("chapter-9") is None
+    with pytest.raises(IndexError):
+        _ = table[5]
+
+
+def test_chapter_table_hash_follows_content():
+    table = ChapterTable.from_entities([build_chapter("1"), build_chapter("2")])
+    same = ChapterTable.from_entities([build_chapter("1"), build_chapter("2")])
+    different = ChapterTable.from_entities([build_chapter("1"), build_chapter("3")])
+
+    assert table.to_hash() == same.to_hash()
+    assert table.to_hash() != different.to_hash()
+
+
+def test_chapter_table_last_updated_per_plugin():
+    table = ChapterTable.from_entities(
+        [
+            build_chapter("1", updated_at="2024-10-15T20:55:38+02:00"),
+            build_chapter("2", updated_at="2024-10-16T20:55:38+02:00"),
+            build_chapter("3"),
+            build_chapter("4", updated_at="2024-10-20T20:55:38+02:00", plugin_type="wbc"),
+        ]
+    )
+
+    assert table.last_updated("kal") == datetime(2024, 10, 16, 18, 55, 38, tzinfo=timezone.utc)
+    assert table.last_updated("wbc") == datetime(2024, 10, 20, 18, 55, 38, tzinfo=timezone.utc)
+    assert table.last_updated("mdx") is None
+    assert ChapterTable.from_entities([build_chapter("1")]).last_updated("kal") is None
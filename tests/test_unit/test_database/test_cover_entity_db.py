@@ -80,8 +80,8 @@ def test_format_content_for_entity(content, expected_locale):
 
 @patch("cbz_tagger.database.cover_entity_db.os.makedirs")
 @patch("cbz_tagger.database.cover_entity_db.path.exists")
-@patch("cbz_tagger.database.cover_entity_db.Image.open")
-@patch("cbz_tagger.database.cover_entity_db.BytesIO")
+@patch("cbz_tagger.common.images.Image.open")
+@patch("cbz_tagger.common.images.BytesIO")
 def test_download(mock_bytes_io, mock_image_open, mock_path_exists, mock_os_makedirs):
     mock_cover = MagicMock(spec=CoverEntity)
     mock_cover.local_filename = "cover1.jpg"
@@ -1,6 +1,7 @@
 import os
 import shutil
 from unittest import mock
+from zipfile import ZipFile
 
 import pytest
 
@@ -61,3 +62,28 @@ def test_download_chapter_fails_with_missing_cbz_file_failure(
     manga_name = next(iter(name for name, id in mock_entity_db_downloader.entity_map.items() if id == manga_request_id))
     chapter_name = f"{manga_name} - Chapter {chapter_item.padded_chapter_string}"
     assert not os.path.exists(os.path.join(storage_path, manga_name, chapter_name))
+
+
+def test_download_chapter_streams_pages_into_cbz(
+    mock_entity_db_downloader, manga_request_id, chapter_request_response, storage_path
+):
+    chapter_item = [ChapterEntity(data) for data in chapter_request_response["data"]][0]
+
+    def download(entity_id, chapter_id, cbz_writer):
+        _ = entity_id, chapter_id
+        cbz_writer.add_page(1, b"page 2")
+        cbz_writer.add_page(0, b"page 1")
+
+    mock_entity_db_downloader.chapters.download = mock.MagicMock(side_effect=download)
+    del mock_entity_db_downloader.build_chapter_cbz
+    mock_entity_db_downloader.to_mylar_series_json = mock.MagicMock(return_value="{}")
+    mock_entity_db_downloader.download_chapter(manga_request_id, chapter_item, storage_path)
+
+    mock_entity_db_downloader.entity_downloads.add.assert_called_once_with((manga_request_id, chapter_item.entity_id))
+
+    manga_name = next(iter(name for name, id in mock_entity_db_downloader.entity_map.items() if id == manga_request_id))
+    chapter_name = f"{manga_name} - Chapter {chapter_item.padded_chapter_string}"
+    # Pages go straight into the CBZ, no chapter folder is created
+    assert sorted(os.listdir(os.path.join(storage_path, manga_name))) == [f"{chapter_name}.cbz", "series.json"]
+    with ZipFile(os.path.join(storage_path, manga_name, f"{chapter_name}.cbz")) as zip_read:
+        assert zip_read.namelist() == ["001.jpg", "002.jpg"]
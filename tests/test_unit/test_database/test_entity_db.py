@@ -1,14 +1,18 @@
 import json
 import os
+import threading
 from datetime import datetime
 from datetime import timezone
 from unittest import mock
+from zipfile import ZipFile
 
 import pytest
 
 from cbz_tagger.common.enums import Urls
 from cbz_tagger.common.input import InputEntity
+from cbz_tagger.database.chapter_table import ChapterTable
 from cbz_tagger.database.entity_db import EntityDB
+from cbz_tagger.entities.chapter_entity import ChapterEntity
 from cbz_tagger.entities.cover_entity import CoverEntity
 from cbz_tagger.entities.metadata_entity import MetadataEntity
 
@@ -20,6 +24,21 @@ def simple_mock_entity_db():
     return entity_db
 
 
+def test_entity_db_deferred_saves_write_once():
+    entity_db = EntityDB("mock")
+    entity_db.compact = mock.MagicMock()
+    with entity_db.deferred_saves():
+        entity_db.save()
+        with entity_db.deferred_saves():
+            entity_db.save()
+        entity_db.compact.assert_not_called()
+    entity_db.compact.assert_called_once()
+
+    with entity_db.deferred_saves():
+        pass
+    entity_db.compact.assert_called_once()
+
+
 def test_entity_db_can_store_and_load(mock_entity_db, manga_request_id):
     assert mock_entity_db.entity_map == {"Kanojyo to Himitsu to Koimoyou": manga_request_id}
     assert mock_entity_db.entity_names == {manga_request_id: "Oshimai"}
@@ -191,6 +210,13 @@ def test_entity_db_to_local_image_file_if_not_found(mock_entity_db, manga_reques
     assert "a2b7bbe2-3a79-46a4-8960-e0e65a666194.jpg" == actual
 
 
+def update_metadata_attributes(entity_db, entity_id, attributes):
+    # Metadata is parsed when the entity is built, so updates replace the entity like a refresh does
+    content = entity_db.metadata.database[entity_id].content
+    content["attributes"].update(attributes)
+    entity_db.metadata.database[entity_id] = MetadataEntity(content)
+
+
 def test_entity_db_to_xml_str_chapter_1(mock_entity_db, manga_name, mock_chapter_1_xml):
     actual = mock_entity_db.to_xml_string(manga_name, "1")
     assert mock_chapter_1_xml == actual
@@ -204,7 +230,7 @@ def test_entity_db_to_xml_str_chapter_10(mock_entity_db, manga_name, mock_chapte
 def test_entity_db_to_xml_str_chapter_1_with_ended_and_no_last_chapter(
     mock_entity_db, manga_request_id, manga_name, mock_chapter_1_xml
 ):
-    mock_entity_db.metadata.database[manga_request_id].content["attributes"]["status"] = "completed"
+    update_metadata_attributes(mock_entity_db, manga_request_id, {"status": "completed"})
     actual = mock_entity_db.to_xml_string(manga_name, "1")
     assert mock_chapter_1_xml == actual
 
@@ -212,12 +238,26 @@ def test_entity_db_to_xml_str_chapter_1_with_ended_and_no_last_chapter(
 def test_entity_db_to_xml_str_chapter_1_with_ended_and_last_chapter(
     mock_entity_db, manga_request_id, manga_name, mock_chapter_1_xml_with_count_3
 ):
-    mock_entity_db.metadata.database[manga_request_id].content["attributes"]["status"] = "completed"
-    mock_entity_db.metadata.database[manga_request_id].content["attributes"]["lastChapter"] = "3"
+    update_metadata_attributes(mock_entity_db, manga_request_id, {"status": "completed", "lastChapter": "3"})
     actual = mock_entity_db.to_xml_string(manga_name, "1")
     assert mock_chapter_1_xml_with_count_3 == actual
 
 
+def test_entity_db_to_xml_str_reuses_series_template(mock_entity_db, manga_request_id, manga_name, mock_chapter_1_xml):
+    mock_entity_db.to_xml_string(manga_name, "10")
+    template = mock_entity_db.xml_templates[manga_request_id]
+    actual = mock_entity_db.to_xml_string(manga_name, "1")
+    assert mock_chapter_1_xml == actual
+    assert mock_entity_db.xml_templates[manga_request_id] is template
+
+
+def test_entity_db_to_xml_str_rebuilds_template_on_metadata_change(mock_entity_db, manga_request_id, manga_name):
+    mock_entity_db.to_xml_string(manga_name, "1")
+    update_metadata_attributes(mock_entity_db, manga_request_id, {"title": {"en": "Fish & Chips"}})
+    actual = mock_entity_db.to_xml_string(manga_name, "1")
+    assert "\t<Series>Fish &amp; Chips</Series>\n" in actual
+
+
 def test_entity_db_to_mylar_json_with_continuing(mock_entity_db, manga_name):
     actual = mock_entity_db.to_mylar_series_json(manga_name)
     assert actual == (
@@ -246,8 +286,7 @@ def test_entity_db_to_mylar_json_with_continuing(mock_entity_db, manga_name):
 
 
 def test_entity_db_to_mylar_json_with_ended(mock_entity_db, manga_request_id, manga_name):
-    mock_entity_db.metadata.database[manga_request_id].content["attributes"]["status"] = "completed"
-    mock_entity_db.metadata.database[manga_request_id].content["attributes"]["lastChapter"] = "3"
+    update_metadata_attributes(mock_entity_db, manga_request_id, {"status": "completed", "lastChapter": "3"})
     actual = mock_entity_db.to_mylar_series_json(manga_name)
     assert actual == (
         "{\n"
@@ -687,6 +726,61 @@ def test_entity_db_refresh_calls_all_entities(mock_entity_db_with_mock_updates,
     mock_entity_db_with_mock_updates.covers.remove_orphaned_covers.assert_called_once()
 
 
+@pytest.fixture
+def mock_entity_db_with_mock_fetches(mock_entity_db_with_mock_updates):
+    entity_db = mock_entity_db_with_mock_updates
+    stored_from = []
+    for entity_db_collection in (entity_db.chapters, entity_db.volumes, entity_db.covers, entity_db.authors):
+        entity_db_collection.fetch = mock.MagicMock(return_value=[])
+        entity_db_collection.store = mock.MagicMock(
+            side_effect=lambda *_: stored_from.append(threading.current_thread())
+        )
+    entity_db.stored_from = stored_from
+    return entity_db
+
+
+def test_entity_db_prefetch_manga_names_batches_metadata(mock_entity_db_with_mock_fetches, manga_request_id):
+    entity_db = mock_entity_db_with_mock_fetches
+    manga_name = next(iter(entity_db.entity_map))
+    # A second series by the same authors
+    entity_db.entity_map["another series"] = "another-id"
+    entity_db.metadata.database["another-id"] = entity_db.metadata[manga_request_id]
+    author_ids = entity_db.metadata[manga_request_id].author_entities
+
+    assert entity_db.prefetch_manga_names([manga_name, "another series", "unknown series"]) == [
+        manga_name,
+        "another series",
+    ]
+
+    entity_db.metadata.update.assert_called_once_with(sorted(["another-id", manga_request_id]), batch_response=True)
+    assert sorted(call.args[0] for call in entity_db.chapters.fetch.call_args_list) == sorted(
+        ["another-id", manga_request_id]
+    )
+    assert entity_db.volumes.fetch.call_count == 2
+    assert entity_db.covers.fetch.call_count == 2
+    assert sorted(call.args[0] for call in entity_db.authors.fetch.call_args_list) == sorted(set(author_ids))
+    assert entity_db.covers.download.call_count == 2
+    # Requests run on the pool, the results are only stored from the calling thread
+    assert set(entity_db.stored_from) == {threading.current_thread()}
+    entity_db.save.assert_called_once()
+
+
+def test_entity_db_prefetch_manga_names_skips_failed_series(mock_entity_db_with_mock_fetches):
+    entity_db = mock_entity_db_with_mock_fetches
+    manga_name = next(iter(entity_db.entity_map))
+    entity_db.chapters.fetch.side_effect = EnvironmentError("API Down")
+    assert entity_db.prefetch_manga_names([manga_name]) == []
+    entity_db.chapters.store.assert_not_called()
+
+    entity_db.chapters.fetch.side_effect = None
+    entity_db.authors.fetch.side_effect = EnvironmentError("API Down")
+    assert entity_db.prefetch_manga_names([manga_name]) == []
+
+    entity_db.metadata.update.side_effect = EnvironmentError("API Down")
+    assert entity_db.prefetch_manga_names([manga_name]) == []
+    assert entity_db.prefetch_manga_names(["unknown series"]) == []
+
+
 def test_entity_db_update_does_nothing_with_unknown():
     entity_db = EntityDB("mock")
     entity_db.update_manga_entity_name("unknown")
@@ -734,6 +828,126 @@ def test_entity_database_can_save_and_load(mock_entity_db_with_saving, temp_dir)
     assert mock_entity_db_with_saving.to_json() == entity_database.to_json()
 
 
+def test_entity_database_save_appends_changes_to_journal(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    with open(os.path.join(temp_dir, "entity_db.json"), "r", encoding="UTF-8") as read_file:
+        snapshot = read_file.read()
+
+    mock_entity_db_with_saving.entity_downloads.add((manga_request_id, "chapter-1"))
+    mock_entity_db_with_saving.entity_tracked.add(manga_request_id)
+    mock_entity_db_with_saving.entity_chapter_plugin[manga_request_id] = {"plugin_type": "mdx"}
+    mock_entity_db_with_saving.save()
+    mock_entity_db_with_saving.covers.database.pop(manga_request_id)
+    mock_entity_db_with_saving.save()
+
+    # The snapshot is untouched, only the journal grows
+    with open(os.path.join(temp_dir, "entity_db.json"), "r", encoding="UTF-8") as read_file:
+        assert snapshot == read_file.read()
+    assert len(mock_entity_db_with_saving.storage.read_records()) == 2
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert entity_database.entity_downloads == {(manga_request_id, "chapter-1")}
+    assert entity_database.entity_tracked == {manga_request_id}
+    assert entity_database.entity_chapter_plugin == {manga_request_id: {"plugin_type": "mdx"}}
+    assert len(entity_database.covers) == 0
+    assert mock_entity_db_with_saving.to_json() == entity_database.to_json()
+
+
+def test_entity_database_save_without_changes_does_not_write_journal(mock_entity_db_with_saving):
+    mock_entity_db_with_saving.save()
+    mock_entity_db_with_saving.save()
+    assert mock_entity_db_with_saving.storage.read_records() == []
+
+
+def test_entity_database_save_journals_replaced_entities(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    chapters = mock_entity_db_with_saving.chapters[manga_request_id]
+    mock_entity_db_with_saving.chapters.database[manga_request_id] = chapters[:2]
+    mock_entity_db_with_saving.save()
+
+    records = mock_entity_db_with_saving.storage.read_records()
+    assert list(records[0].keys()) == ["chapters"]
+    assert list(records[0]["chapters"]["updated"].keys()) == [manga_request_id]
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert len(entity_database.chapters[manga_request_id]) == 2
+
+
+def test_entity_database_save_compacts_journal(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    mock_entity_db_with_saving.storage.compaction_min_bytes = 0
+    mock_entity_db_with_saving.storage.compaction_ratio = 0.0
+    mock_entity_db_with_saving.entity_downloads.add((manga_request_id, "chapter-1"))
+    mock_entity_db_with_saving.save()
+    assert os.path.exists(os.path.join(temp_dir, "entity_db.journal"))
+
+    mock_entity_db_with_saving.entity_downloads.add((manga_request_id, "chapter-2"))
+    mock_entity_db_with_saving.save()
+    assert not os.path.exists(os.path.join(temp_dir, "entity_db.journal"))
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert entity_database.entity_downloads == {(manga_request_id, "chapter-1"), (manga_request_id, "chapter-2")}
+
+
+def test_entity_database_is_stale_only_after_external_changes(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert not entity_database.is_stale
+    assert not mock_entity_db_with_saving.is_stale
+
+    # Saving through an instance keeps that instance current, other instances see the change
+    mock_entity_db_with_saving.entity_tracked.add(manga_request_id)
+    mock_entity_db_with_saving.save()
+    assert not mock_entity_db_with_saving.is_stale
+    assert entity_database.is_stale
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert not entity_database.is_stale
+
+
+def test_entity_database_load_ignores_partial_journal_record(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    mock_entity_db_with_saving.entity_tracked.add(manga_request_id)
+    mock_entity_db_with_saving.save()
+    with open(os.path.join(temp_dir, "entity_db.journal"), "a", encoding="UTF-8") as write_file:
+        write_file.write('{"entity_tracked": {"added": ["trunc')
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert entity_database.entity_tracked == {manga_request_id}
+
+
+def test_entity_database_appends_after_interrupted_save(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    mock_entity_db_with_saving.entity_tracked.add(manga_request_id)
+    mock_entity_db_with_saving.save()
+    # A save that crashed part way through its record
+    with open(os.path.join(temp_dir, "entity_db.journal"), "a", encoding="UTF-8") as write_file:
+        write_file.write('{"entity_tracked": {"added": ["trunc')
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    entity_database.entity_downloads.add((manga_request_id, "chapter-1"))
+    entity_database.save()
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert entity_database.entity_tracked == {manga_request_id}
+    assert entity_database.entity_downloads == {(manga_request_id, "chapter-1")}
+    assert len(entity_database.storage.read_records()) == 2
+
+
+def test_entity_database_read_only_load_leaves_journal(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    mock_entity_db_with_saving.entity_tracked.add(manga_request_id)
+    mock_entity_db_with_saving.save()
+    # A record another instance is still writing
+    with open(os.path.join(temp_dir, "entity_db.journal"), "a", encoding="UTF-8") as write_file:
+        write_file.write('{"entity_tracked": {"added": ["trunc')
+    journal_size = os.path.getsize(os.path.join(temp_dir, "entity_db.journal"))
+
+    entity_database = EntityDB.load(root_path=temp_dir, read_only=True)
+    assert entity_database.entity_tracked == {manga_request_id}
+    assert os.path.getsize(os.path.join(temp_dir, "entity_db.journal")) == journal_size
+
+
 def test_entity_database_no_missing_chapters_with_no_tracked_entities(mock_entity_db):
     missing_chapters = mock_entity_db.get_missing_chapters()
     assert missing_chapters == []
@@ -752,9 +966,13 @@ def test_entity_database_has_missing_chapters_with_tracked_entities(mock_entity_
 
 def test_entity_database_calls_downloads_for_missing_chapters(mock_entity_db, manga_request_id):
     mock_entity_db.entity_tracked.add(manga_request_id)
-    mock_entity_db.download_chapter = mock.MagicMock()
+    mock_entity_db.fetch_chapter_files = mock.MagicMock()
+    mock_entity_db.build_chapter_cbz = mock.MagicMock()
+    mock_entity_db.complete_chapter_download = mock.MagicMock()
     mock_entity_db.download_missing_chapters("storage_path")
-    assert mock_entity_db.download_chapter.call_count == 4
+    assert mock_entity_db.fetch_chapter_files.call_count == 4
+    assert mock_entity_db.build_chapter_cbz.call_count == 4
+    assert mock_entity_db.complete_chapter_download.call_count == 4
 
 
 @mock.patch("cbz_tagger.database.entity_db.EntityDB.update_manga_entity_id_metadata_and_find_updated_ids")
@@ -762,7 +980,9 @@ def test_entity_database_calls_downloads_for_missing_chapters(mock_entity_db, ma
 @mock.patch("cbz_tagger.database.entity_db.EntityDB.download_missing_covers")
 @mock.patch("cbz_tagger.database.entity_db.EntityDB.remove_orphaned_covers")
 @mock.patch("cbz_tagger.database.entity_db.EntityDB.download_missing_chapters")
+@mock.patch("cbz_tagger.database.entity_db.EntityDB.retag_chapters")
 def test_refresh(
+    mock_retag_chapters,
     mock_download_missing_chapters,
     mock_remove_orphaned_covers,
     mock_download_missing_covers,
@@ -784,6 +1004,7 @@ def test_refresh(
     mock_update_manga_entity_id.assert_any_call("entity2", update_metadata=False)
     mock_download_missing_covers.assert_called_once()
     mock_remove_orphaned_covers.assert_called_once()
+    mock_retag_chapters.assert_called_once_with(storage_path, ["entity1", "entity2"])
     mock_download_missing_chapters.assert_called_once_with(storage_path)
 
 
@@ -1091,10 +1312,9 @@ def test_entity_db_add_chapter_entity_id_to_downloaded_chapters_idempotent(simpl
 
 def test_entity_db_set_downloaded_chapters_add_and_remove(simple_mock_entity_db, manga_request_id):
     """Test set_downloaded_chapters reconciles the downloaded set to match the desired chapters"""
-    chapter_1 = mock.MagicMock(entity_id="chapter-1")
-    chapter_2 = mock.MagicMock(entity_id="chapter-2")
-    chapter_3 = mock.MagicMock(entity_id="chapter-3")
-    simple_mock_entity_db.chapters.database[manga_request_id] = [chapter_1, chapter_2, chapter_3]
+    simple_mock_entity_db.chapters.database[manga_request_id] = ChapterTable.from_entities(
+        ChapterEntity({"id": f"chapter-{number}", "attributes": {"chapter": f"{number}"}}) for number in (1, 2, 3)
+    )
 
     # Chapter 1 is currently downloaded, chapter 2 and 3 are not
     simple_mock_entity_db.entity_downloads.add((manga_request_id, "chapter-1"))
@@ -1110,8 +1330,9 @@ def test_entity_db_set_downloaded_chapters_add_and_remove(simple_mock_entity_db,
 
 def test_entity_db_set_downloaded_chapters_ignores_unknown_chapters(simple_mock_entity_db, manga_request_id):
     """Test set_downloaded_chapters leaves downloads for chapters outside the known list untouched"""
-    chapter_1 = mock.MagicMock(entity_id="chapter-1")
-    simple_mock_entity_db.chapters.database[manga_request_id] = [chapter_1]
+    simple_mock_entity_db.chapters.database[manga_request_id] = ChapterTable.from_entities(
+        [ChapterEntity({"id": "chapter-1", "attributes": {"chapter": "1"}})]
+    )
 
     # A chapter that is downloaded but no longer present in the known chapter list (e.g. a race)
     simple_mock_entity_db.entity_downloads.add((manga_request_id, "unknown-chapter"))
@@ -1120,3 +1341,57 @@ def test_entity_db_set_downloaded_chapters_ignores_unknown_chapters(simple_mock_
 
     assert (manga_request_id, "unknown-chapter") in simple_mock_entity_db.entity_downloads
     simple_mock_entity_db.save.assert_called_once()
+
+
+@mock.patch("cbz_tagger.database.entity_db.set_file_ownership")
+def test_retag_chapters_updates_only_changed_archives(mock_set_ownership, mock_entity_db, manga_name, temp_dir):
+    mock_entity_db.root_path = temp_dir
+    cover_filename = mock_entity_db.to_local_image_file(manga_name, "1")
+    os.makedirs(mock_entity_db.image_db_path)
+    with open(os.path.join(mock_entity_db.image_db_path, cover_filename), "wb") as image_file:
+        image_file.write(b"new cover")
+
+    series_path = os.path.join(temp_dir, "storage", manga_name)
+    os.makedirs(series_path)
+    stale_path = os.path.join(series_path, f"{manga_name} - Chapter 001.cbz")
+    with ZipFile(stale_path, "w") as zip_write:
+        zip_write.writestr("001.jpg", b"page 1")
+        zip_write.writestr("ComicInfo.xml", "<ComicInfo>old</ComicInfo>")
+        zip_write.writestr("000_cover.jpg", b"old cover")
+    current_path = os.path.join(series_path, f"{manga_name} - Chapter 010.cbz")
+    with ZipFile(current_path, "w") as zip_write:
+        zip_write.writestr("001.jpg", b"page 1")
+        zip_write.writestr("ComicInfo.xml", mock_entity_db.to_xml_string(manga_name, "10"))
+        zip_write.writestr("000_cover.jpg", b"new cover")
+    current_mtime = os.path.getmtime(current_path)
+
+    assert mock_entity_db.retag_chapters(os.path.join(temp_dir, "storage")) == 1
+
+    with ZipFile(stale_path) as zip_read:
+        assert zip_read.testzip() is None
+        assert zip_read.read("ComicInfo.xml").decode() == mock_entity_db.to_xml_string(manga_name, "1")
+        assert zip_read.read("000_cover.jpg") == b"new cover"
+        assert zip_read.read("001.jpg") == b"page 1"
+    assert os.path.getmtime(current_path) == current_mtime
+    assert os.path.exists(os.path.join(series_path, "series.json"))
+
+    # Nothing left to change on the next pass, series.json is left alone as well
+    mock_set_ownership.reset_mock()
+    assert mock_entity_db.retag_chapters(os.path.join(temp_dir, "storage")) == 0
+    mock_set_ownership.assert_not_called()
+
+
+@mock.patch("cbz_tagger.database.entity_db.set_file_ownership")
+def test_retag_chapters_visits_each_series_folder_once(mock_set_ownership, mock_entity_db, manga_name, temp_dir):
+    _ = mock_set_ownership
+    entity_id = mock_entity_db.entity_map[manga_name]
+    mock_entity_db.entity_map["another name"] = entity_id
+    mock_entity_db.entity_names[entity_id] = manga_name
+    series_path = os.path.join(temp_dir, "storage", manga_name)
+    os.makedirs(series_path)
+    with ZipFile(os.path.join(series_path, f"{manga_name} - Chapter 001.cbz"), "w") as zip_write:
+        zip_write.writestr("001.jpg", b"page 1")
+    mock_entity_db.retag_chapter = mock.MagicMock(return_value=True)
+
+    assert mock_entity_db.retag_chapters(os.path.join(temp_dir, "storage")) == 1
+    mock_entity_db.retag_chapter.assert_called_once()
@@ -0,0 +1,108 @@
+import os
+from unittest import mock
+
+import pytest
+
+from cbz_tagger.common.env import AppEnv
+from cbz_tagger.database.entity_db import EntityDB
+from cbz_tagger.database.entity_journal import EntityJournal
+from cbz_tagger.database.entity_sqlite import EntitySqliteStore
+
+
+@pytest.fixture
+def sqlite_backend():
+    with mock.patch.object(AppEnv, "DATABASE_BACKEND", "sqlite"):
+        yield
+
+
+@pytest.fixture
+def mock_sqlite_entity_db(mock_entity_db_with_saving, temp_dir):
+    mock_entity_db_with_saving.storage = EntitySqliteStore(temp_dir)
+    return mock_entity_db_with_saving
+
+
+def test_entity_sqlite_can_save_and_load(sqlite_backend, mock_sqlite_entity_db, temp_dir):
+    mock_sqlite_entity_db.save()
+    assert os.path.exists(os.path.join(temp_dir, "entity_db.sqlite"))
+    assert not os.path.exists(os.path.join(temp_dir, "entity_db.json"))
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert isinstance(entity_database.storage, EntitySqliteStore)
+    assert mock_sqlite_entity_db.to_json() == entity_database.to_json()
+
+
+def test_entity_sqlite_saves_changes(sqlite_backend, mock_sqlite_entity_db, temp_dir, manga_request_id):
+    mock_sqlite_entity_db.save()
+    mock_sqlite_entity_db.entity_downloads.add((manga_request_id, "chapter-1"))
+    mock_sqlite_entity_db.entity_tracked.add(manga_request_id)
+    mock_sqlite_entity_db.entity_chapter_plugin[manga_request_id] = {"plugin_type": "mdx"}
+    chapters = mock_sqlite_entity_db.chapters[manga_request_id]
+    mock_sqlite_entity_db.chapters.database[manga_request_id] = chapters[:2]
+    mock_sqlite_entity_db.covers.database.pop(manga_request_id)
+    mock_sqlite_entity_db.save()
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert entity_database.entity_downloads == {(manga_request_id, "chapter-1")}
+    assert entity_database.entity_tracked == {manga_request_id}
+    assert entity_database.entity_chapter_plugin == {manga_request_id: {"plugin_type": "mdx"}}
+    assert [c.entity_id for c in entity_database.chapters[manga_request_id]] == [c.entity_id for c in chapters[:2]]
+    assert len(entity_database.covers) == 0
+    assert mock_sqlite_entity_db.to_json() == entity_database.to_json()
+
+
+def test_entity_sqlite_read_entity(mock_sqlite_entity_db, temp_dir, manga_request_id):
+    mock_sqlite_entity_db.save()
+    store = EntitySqliteStore(temp_dir)
+
+    assert store.read_entity("metadata", manga_request_id) == mock_sqlite_entity_db.metadata.entity_to_json(
+        manga_request_id
+    )
+    assert store.read_entity("chapters", manga_request_id) == mock_sqlite_entity_db.chapters.entity_to_json(
+        manga_request_id
+    )
+    assert store.read_entity("chapters", "missing") is None
+    assert store.read_entity("entity_map", manga_request_id) is None
+
+
+def test_entity_sqlite_load_reads_series_when_used(sqlite_backend, mock_sqlite_entity_db, temp_dir, manga_request_id):
+    mock_sqlite_entity_db.save()
+
+    with mock.patch.object(
+        EntitySqliteStore, "read_entity", autospec=True, side_effect=EntitySqliteStore.read_entity
+    ) as mock_read:
+        entity_database = EntityDB.load(root_path=temp_dir)
+        assert manga_request_id in entity_database.covers.database
+        mock_read.assert_not_called()
+
+        chapters = entity_database.chapters[manga_request_id]
+        assert mock_read.call_count == 1
+        assert mock_read.call_args.args[1:] == ("chapters", manga_request_id)
+    assert chapters.ids == mock_sqlite_entity_db.chapters[manga_request_id].ids
+    assert mock_sqlite_entity_db.to_json() == entity_database.to_json()
+
+
+def test_entity_sqlite_creates_schema_once(temp_dir):
+    store = EntitySqliteStore(temp_dir)
+    store.connect().close()
+
+    with mock.patch.object(EntitySqliteStore, "schema", ("NOT VALID SQL",)):
+        store.connect().close()
+        EntitySqliteStore(temp_dir).connect().close()
+
+
+def test_entity_sqlite_migrates_from_json(sqlite_backend, mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.storage = EntityJournal(temp_dir)
+    mock_entity_db_with_saving.save()
+    mock_entity_db_with_saving.entity_tracked.add(manga_request_id)
+    mock_entity_db_with_saving.save()
+
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert isinstance(entity_database.storage, EntitySqliteStore)
+    assert os.path.exists(os.path.join(temp_dir, "entity_db.sqlite"))
+    assert entity_database.entity_tracked == {manga_request_id}
+    assert mock_entity_db_with_saving.to_json() == entity_database.to_json()
+
+    # The migration only runs once, later loads read from sqlite
+    with mock.patch.object(EntityDB, "migrate_to_sqlite") as mock_migrate:
+        EntityDB.load(root_path=temp_dir)
+        mock_migrate.assert_not_called()
@@ -1,8 +1,11 @@
+import os
 from unittest import mock
 from unittest.mock import patch
+from zipfile import BadZipFile
 
 import pytest
 
+from cbz_tagger.common.file_readiness import FileState
 from cbz_tagger.database.file_scanner import FileScanner
 from cbz_tagger.entities.cbz_entity import CbzEntity
 
@@ -63,16 +66,157 @@ def test_run_with_tracked_entities(scanner):
     scanner.entity_database.refresh.assert_called_once_with(scanner.storage_path)
 
 
+def test_reload_scanner_if_stale_skips_unchanged_database(scanner):
+    scanner.entity_database.storage.version = mock.MagicMock(return_value=scanner.entity_database.storage_version)
+    with patch("cbz_tagger.database.entity_db.EntityDB.load") as mock_load:
+        scanner.reload_scanner_if_stale()
+    mock_load.assert_not_called()
+
+
+def test_reload_scanner_if_stale_reloads_changed_database(scanner):
+    scanner.entity_database.storage.version = mock.MagicMock(return_value=("changed",))
+    with patch("cbz_tagger.database.entity_db.EntityDB.load") as mock_load:
+        scanner.reload_scanner_if_stale()
+    mock_load.assert_called_once_with(root_path=scanner.config_path)
+
+
+def test_read_database_is_reloaded_only_when_storage_changes(scanner):
+    read_database = mock.MagicMock(is_stale=False)
+    with patch("cbz_tagger.database.entity_db.EntityDB.load", return_value=read_database) as mock_load:
+        assert scanner.read_database() is read_database
+        assert scanner.read_database() is read_database
+        mock_load.assert_called_once_with(root_path=scanner.config_path, read_only=True)
+
+        read_database.is_stale = True
+        scanner.read_database()
+        assert mock_load.call_count == 2
+    # The database operations work on is never replaced by a read
+    assert scanner.entity_database is not read_database
+
+
 def test_run_scan(scanner):
     with (
-        patch.object(scanner, "scan", side_effect=[False, True]) as mock_scan,
+        patch.object(scanner, "scan", side_effect=[["series/chapter 2.cbz"], []]) as mock_scan,
         patch("cbz_tagger.database.entity_db.EntityDB.load", return_value=scanner.entity_database),
         patch("time.sleep") as mock_sleep,
     ):
         scanner.run_scan()
 
-        assert mock_scan.call_count == 2
-        mock_sleep.assert_called_once_with(120)
+        # Only the file that was still being written is scanned again
+        assert mock_scan.call_args_list == [mock.call(None), mock.call(["series/chapter 2.cbz"])]
+        mock_sleep.assert_called_once_with(scanner.retry_delay)
+
+
+def test_run_scan_gives_up_on_files_that_never_settle(scanner):
+    scanner.max_retries = 2
+    with (
+        patch.object(scanner, "scan", return_value=["series/chapter 2.cbz"]) as mock_scan,
+        patch("cbz_tagger.database.entity_db.EntityDB.load", return_value=scanner.entity_database),
+        patch("time.sleep") as mock_sleep,
+    ):
+        scanner.run_scan()
+
+        assert mock_scan.call_count == 3
+        assert mock_sleep.call_count == 2
+
+
+def test_scan_defers_only_files_that_are_not_ready(scanner, temp_dir):
+    scanner.scan_path = temp_dir
+    os.makedirs(os.path.join(temp_dir, "series"))
+    filepaths = [os.path.join("series", f"chapter {number}.cbz") for number in range(1, 4)]
+    for filepath in filepaths:
+        with open(os.path.join(temp_dir, filepath), "wb") as cbz_file:
+            cbz_file.write(b"")
+    states = {
+        os.path.join(temp_dir, filepaths[0]): FileState.READY,
+        os.path.join(temp_dir, filepaths[1]): FileState.PENDING,
+        os.path.join(temp_dir, filepaths[2]): FileState.INVALID,
+    }
+    scanner.readiness.check = mock.MagicMock(side_effect=states.get)
+    scanner.process_files = mock.MagicMock()
+
+    assert scanner.scan(filepaths) == [filepaths[1]]
+    # An incomplete file is reported without holding up the rest of the scan
+    scanner.process_files.assert_called_once_with([filepaths[0]])
+
+
+def test_process_files_builds_concurrently_and_writes_series_json_once(scanner):
+    filepaths = [
+        "series a/series a - chapter 1.cbz",
+        "series a/series a - chapter 2.cbz",
+        "series a/series a - chapter 3.cbz",
+        "series b/series b - chapter 1.cbz",
+        "series b/series b - chapter 001.cbz",
+        "unknown/unknown - chapter 1.cbz",
+    ]
+
+    def get_cbz_comicinfo_and_image(cbz_entity):
+        if cbz_entity.manga_name == "unknown":
+            return None, None, None, None
+        return cbz_entity.manga_name.title(), "<ComicInfo/>", "cover.jpg", f"{cbz_entity.manga_name} json"
+
+    def build_archive(cbz_entity, entity_name, entity_xml, entity_image_path):
+        _ = entity_name, entity_xml, entity_image_path
+        if cbz_entity.chapter_number == "3":
+            raise BadZipFile
+        return True
+
+    scanner.scan_workers = 3
+    scanner.recently_updated = ["series b"]
+    scanner.entity_database.prefetch_manga_names = mock.MagicMock(return_value=["series a"])
+    scanner.get_cbz_comicinfo_and_image = mock.MagicMock(side_effect=get_cbz_comicinfo_and_image)
+    with (
+        patch("cbz_tagger.entities.cbz_entity.make_directory_with_ownership"),
+        patch.object(CbzEntity, "build_archive", autospec=True, side_effect=build_archive) as mock_build_archive,
+        patch.object(CbzEntity, "write_mylar_series_json", autospec=True) as mock_write_json,
+    ):
+        scanner.process_files(filepaths)
+
+    # Series are prefetched together before any file is prepared
+    scanner.entity_database.prefetch_manga_names.assert_called_once_with(["series a", "unknown"])
+    assert scanner.recently_updated == ["series b", "series a"]
+    assert scanner.get_cbz_comicinfo_and_image.call_count == 6
+    # The second copy of series b chapter 1 is skipped rather than racing the first for the same destination
+    built = sorted(call.args[0].filepath for call in mock_build_archive.call_args_list)
+    assert built == filepaths[:4]
+    assert sorted(call.args[1:] for call in mock_write_json.call_args_list) == [
+        ("Series A", "series a json"),
+        ("Series B", "series b json"),
+    ]
+
+
+def test_scan_given_files_skips_missing_and_removes_empty_folders(scanner, temp_dir):
+    scanner.scan_path = temp_dir
+    os.makedirs(os.path.join(temp_dir, "series name"))
+    os.makedirs(os.path.join(temp_dir, "other series"))
+    with open(os.path.join(temp_dir, "series name", "series name - chapter 1.cbz"), "wb") as cbz_file:
+        cbz_file.write(b"")
+    filepaths = [
+        os.path.join("series name", "series name - chapter 1.cbz"),
+        os.path.join("series name", "series name - chapter 2.cbz"),
+    ]
+
+    def process(filepath):
+        os.remove(os.path.join(temp_dir, filepath))
+
+    scanner.get_files = mock.MagicMock()
+    scanner.readiness.check = mock.MagicMock(return_value=FileState.READY)
+    scanner.process_files = mock.MagicMock(side_effect=lambda ready: [process(filepath) for filepath in ready])
+    assert scanner.scan(filepaths) == []
+
+    scanner.get_files.assert_not_called()
+    scanner.process_files.assert_called_once_with([filepaths[0]])
+    # Only the folder emptied by processing is removed
+    assert os.listdir(temp_dir) == ["other series"]
+
+
+def test_run_watch_scans_only_watched_files(scanner):
+    scanner.reload_scanner_if_stale = mock.MagicMock()
+    scanner.scan = mock.MagicMock(return_value=[])
+    scanner.run_watch(["series name/series name - chapter 1.cbz"])
+
+    scanner.reload_scanner_if_stale.assert_called_once()
+    scanner.scan.assert_called_once_with(["series name/series name - chapter 1.cbz"])
 
 
 def test_get_cbz_files(scanner, mock_get_paths):
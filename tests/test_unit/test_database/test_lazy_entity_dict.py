@@ -0,0 +1,70 @@
+import json
+from unittest import mock
+
+from cbz_tagger.database.entity_db import EntityDB
+from cbz_tagger.database.lazy_entity_dict import LazyEntityDict
+from cbz_tagger.database.metadata_entity_db import MetadataEntityDB
+from cbz_tagger.entities.metadata_entity import MetadataEntity
+
+
+def test_lazy_entity_dict_decodes_on_first_access():
+    decoder = mock.MagicMock(side_effect=json.loads)
+    lazy_dict = LazyEntityDict(decoder, {"a": '{"id": "a"}', "b": '{"id": "b"}'})
+
+    assert len(lazy_dict) == 2
+    assert "a" in lazy_dict
+    assert list(lazy_dict) == ["a", "b"]
+    decoder.assert_not_called()
+
+    assert lazy_dict["a"] == {"id": "a"}
+    assert lazy_dict["a"] is lazy_dict["a"]
+    decoder.assert_called_once_with('{"id": "a"}')
+    assert lazy_dict.decoded_count == 1
+    assert lazy_dict.raw("a") is None
+    assert lazy_dict.raw("b") == '{"id": "b"}'
+    assert lazy_dict.get("missing") is None
+
+
+def test_lazy_entity_dict_tracks_changes_against_snapshot():
+    lazy_dict = LazyEntityDict(json.loads, {"a": '{"id": "a"}', "b": '{"id": "b"}'})
+    snapshot = lazy_dict.snapshot()
+
+    # Decoding an entity is not a change
+    _ = lazy_dict["a"]
+    assert lazy_dict.is_unchanged("a", snapshot["a"])
+    assert lazy_dict.is_unchanged("b", snapshot["b"])
+
+    lazy_dict["b"] = {"id": "c"}
+    assert not lazy_dict.is_unchanged("b", snapshot["b"])
+    assert not lazy_dict.is_unchanged("new", snapshot.get("new"))
+
+    del lazy_dict["a"]
+    assert list(lazy_dict) == ["b"]
+
+
+def test_entity_db_from_content_is_lazy(manga_request_content, manga_request_id):
+    entity_db = MetadataEntityDB.from_json(json.dumps({manga_request_id: json.dumps(manga_request_content)}))
+    assert isinstance(entity_db.database, LazyEntityDict)
+    assert entity_db.database.decoded_count == 0
+
+    # Writing an untouched database back out does not decode it
+    assert entity_db.to_json() == json.dumps({manga_request_id: json.dumps(manga_request_content)})
+    assert entity_db.database.decoded_count == 0
+
+    assert isinstance(entity_db[manga_request_id], MetadataEntity)
+    assert entity_db.database.decoded_count == 1
+
+
+def test_entity_db_load_only_decodes_accessed_entities(mock_entity_db_with_saving, temp_dir, manga_request_id):
+    mock_entity_db_with_saving.save()
+    entity_database = EntityDB.load(root_path=temp_dir)
+    assert entity_database.chapters.database.decoded_count == 0
+    assert entity_database.metadata.database.decoded_count == 0
+
+    assert entity_database.metadata[manga_request_id].title == "Oshimai"
+    assert entity_database.metadata.database.decoded_count == 1
+    assert entity_database.chapters.database.decoded_count == 0
+
+    # Reading entities does not produce journal records
+    entity_database.save()
+    assert entity_database.storage.read_records() == []
@@ -103,10 +103,9 @@ def test_request_configs_user_agents_match_declared_browser_and_are_not_flagged(
             assert marker not in user_agent
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_request_with_retry_rotates_through_configs(mock_sleep, mock_random):
-    _ = mock_sleep, mock_random
+def test_request_with_retry_rotates_through_configs(mock_sleep):
+    _ = mock_sleep
     configs = BaseEntity._get_request_configs()
 
     with requests_mock.Mocker() as rm:
@@ -121,9 +120,8 @@ def test_request_with_retry_rotates_through_configs(mock_sleep, mock_random):
             assert request.headers["User-Agent"] == expected_headers["User-Agent"]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_request_with_retry_success(mock_sleep, mock_random):
+def test_request_with_retry_success(mock_sleep):
     with requests_mock.Mocker() as rm:
         rm.get("http://example.com/file", json={"data": "file content"})
 
@@ -131,14 +129,12 @@ def test_request_with_retry_success(mock_sleep, mock_random):
 
         assert result.status_code == 200
         assert result.json() == {"data": "file content"}
-        # Should have jitter sleep and success sleep
-        mock_sleep.assert_has_calls([mock.call(1.0), mock.call(0.5)])
-        mock_random.assert_called_once_with(0.5, 2.0)
+        # Requests are paced by the rate limiter, a successful request doesn't sleep
+        mock_sleep.assert_not_called()
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_request_with_retry_retry_success(mock_sleep, mock_random):
+def test_request_with_retry_retry_success(mock_sleep):
     with requests_mock.Mocker() as rm:
         rm.get(
             "http://example.com/file",
@@ -151,21 +147,12 @@ def test_request_with_retry_retry_success(mock_sleep, mock_random):
         result = BaseEntity.request_with_retry("http://example.com/file")
 
         assert result.status_code == 200
-        # Should have jitter sleep (1.0), retry sleep (10), jitter sleep (1.0), success sleep (0.5)
-        mock_sleep.assert_has_calls(
-            [
-                mock.call(1.0),  # jitter before first attempt
-                mock.call(10),  # retry backoff
-                mock.call(1.0),  # jitter before second attempt
-                mock.call(0.5),  # success sleep
-            ]
-        )
-        assert mock_random.call_count == 2  # Called for both attempts
+        # Only the retry backoff sleeps
+        assert mock_sleep.call_args_list == [mock.call(10)]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_request_with_retry_timeout(mock_sleep, mock_random):
+def test_request_with_retry_timeout(mock_sleep):
     with requests_mock.Mocker() as rm:
         rm.get("http://example.com/file", exc=requests.exceptions.ConnectTimeout)
 
@@ -174,23 +161,12 @@ def test_request_with_retry_timeout(mock_sleep, mock_random):
         ):
             BaseEntity.request_with_retry("http://example.com/file")
 
-        # Assert has jitter sleeps before each attempt and retry sleeps after failures
-        mock_sleep.assert_has_calls(
-            [
-                mock.call(1.0),  # jitter before attempt 1
-                mock.call(10),  # retry backoff
-                mock.call(1.0),  # jitter before attempt 2
-                mock.call(20),  # retry backoff
-                mock.call(1.0),  # jitter before attempt 3
-                mock.call(30),  # retry backoff
-            ]
-        )
-        assert mock_random.call_count == 3  # Called for all 3 attempts
+        # Assert has retry sleeps after each failure
+        assert mock_sleep.call_args_list == [mock.call(10), mock.call(20), mock.call(30)]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_request_with_retry_failure(mock_sleep, mock_random):
+def test_request_with_retry_failure(mock_sleep):
     with requests_mock.Mocker() as rm:
         rm.get("http://example.com/file", json={"data": "file content"}, status_code=500)
 
@@ -199,24 +175,13 @@ def test_request_with_retry_failure(mock_sleep, mock_random):
         ):
             BaseEntity.request_with_retry("http://example.com/file")
 
-        # Assert has jitter sleeps before each attempt and retry sleeps after failures
-        mock_sleep.assert_has_calls(
-            [
-                mock.call(1.0),  # jitter before attempt 1
-                mock.call(10),  # retry backoff
-                mock.call(1.0),  # jitter before attempt 2
-                mock.call(20),  # retry backoff
-                mock.call(1.0),  # jitter before attempt 3
-                mock.call(30),  # retry backoff
-            ]
-        )
-        assert mock_random.call_count == 3  # Called for all 3 attempts
+        # Assert has retry sleeps after each failure
+        assert mock_sleep.call_args_list == [mock.call(10), mock.call(20), mock.call(30)]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
 @patch("cbz_tagger.entities.base_entity.AppEnv")
-def test_request_with_retry_with_proxy(mock_app_env, mock_sleep, mock_random):
+def test_request_with_retry_with_proxy(mock_app_env, mock_sleep):
     def verify_proxy_in_headers(request, content):
         _ = content
         assert request.proxies == {"http": "http://proxy.example.com", "https": "http://proxy.example.com"}
@@ -225,48 +190,41 @@ def test_request_with_retry_with_proxy(mock_app_env, mock_sleep, mock_random):
     with requests_mock.Mocker() as rm:
         rm.get("http://example.com/file", text=verify_proxy_in_headers)
         mock_app_env.return_value.PROXY_URL = "http://proxy.example.com"
-        mock_app_env.DELAY_PER_REQUEST = 0.5
 
         result = BaseEntity.request_with_retry("http://example.com/file")
 
         assert result.status_code == 200
         assert result.text == "passed"
-        # Should have jitter sleep and success sleep
-        mock_sleep.assert_has_calls([mock.call(1.0), mock.call(0.5)])
-        mock_random.assert_called_once_with(0.5, 2.0)
+        # Requests are paced by the rate limiter, a successful request doesn't sleep
+        mock_sleep.assert_not_called()
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_download_file_success(mock_sleep, mock_random):
+def test_download_file_success(mock_sleep):
     with requests_mock.Mocker() as rm:
         rm.get("http://example.com/file", content=b"file content")
 
         result = BaseEntity.download_file("http://example.com/file")
 
         assert result == b"file content"
-        # Should have jitter sleep and success sleep
-        mock_sleep.assert_has_calls([mock.call(1.0), mock.call(0.5)])
-        mock_random.assert_called_once_with(0.5, 2.0)
+        # Requests are paced by the rate limiter, a successful request doesn't sleep
+        mock_sleep.assert_not_called()
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_download_file_retry_success(mock_sleep, mock_random):
+def test_download_file_retry_success(mock_sleep):
     with requests_mock.Mocker() as rm:
         rm.get("http://example.com/file", [{"status_code": 500}, {"content": b"file content"}])
 
         result = BaseEntity.download_file("http://example.com/file")
 
         assert result == b"file content"
-        # Should have jitter sleep (1.0), retry sleep (10), jitter sleep (1.0), success sleep (0.5)
-        mock_sleep.assert_has_calls([mock.call(1.0), mock.call(10), mock.call(1.0), mock.call(0.5)])
-        assert mock_random.call_count == 2
+        # Only the retry backoff sleeps
+        assert mock_sleep.call_args_list == [mock.call(10)]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=1.0)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_download_file_failure(mock_sleep, mock_random):
+def test_download_file_failure(mock_sleep):
     with requests_mock.Mocker() as rm:
         rm.get("http://example.com/file", status_code=500)
 
@@ -275,16 +233,5 @@ def test_download_file_failure(mock_sleep, mock_random):
         ):
             BaseEntity.download_file("http://example.com/file")
 
-        # Should have 3 jitter sleeps and 3 retry sleeps = 6 total
-        assert mock_sleep.call_count == 6
-        mock_sleep.assert_has_calls(
-            [
-                mock.call(1.0),  # jitter before attempt 1
-                mock.call(10),  # retry backoff
-                mock.call(1.0),  # jitter before attempt 2
-                mock.call(20),  # retry backoff
-                mock.call(1.0),  # jitter before attempt 3
-                mock.call(30),  # retry backoff
-            ]
-        )
-        assert mock_random.call_count == 3
+        # Should have 3 retry sleeps
+        assert mock_sleep.call_args_list == [mock.call(10), mock.call(20), mock.call(30)]
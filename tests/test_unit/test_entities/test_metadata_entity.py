@@ -117,3 +117,22 @@ def test_demographic_none():
 def test_language_with_different_attributes(attributes, expected_language):
     entity = MetadataEntity(content={"attributes": attributes})
     assert entity.language == expected_language
+
+
+def test_metadata_view_is_parsed_when_built(manga_request_content):
+    entity = MetadataEntity(content=manga_request_content)
+    entity.content["relationships"] = []
+    assert entity.view.relationship_ids["author"] == entity.author_id
+    assert entity.author_id is not None
+    assert entity.genres == list(entity.view.genres)
+
+
+def test_metadata_view_with_partial_content():
+    entity = MetadataEntity(content={"attributes": {}})
+    assert entity.title is None
+    assert entity.all_titles == []
+    assert entity.author_id is None
+    assert entity.genres == ["Unknown"]
+    assert entity.last_chapter == "-1"
+    with pytest.raises(KeyError):
+        _ = entity.created_at
@@ -105,9 +105,8 @@ def test_from_server_url_no_plugin_id(chapter_entity):
         chapter_entity.from_server_url({"ids[]": ["example_manga"]}, plugin_type=ChapterPluginCMK.PLUGIN_TYPE)
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_from_server_url(mock_sleep, mock_random, chapter_entity):
+def test_from_server_url(mock_sleep, chapter_entity):
     result = chapter_entity.from_server_url(
         {"ids[]": ["example_manga"]}, plugin_type=ChapterPluginCMK.PLUGIN_TYPE, plugin_id="example_manga"
     )
@@ -121,9 +120,8 @@ def test_from_server_url(mock_sleep, mock_random, chapter_entity):
     assert result[2].get_chapter_url() == f"https://{ChapterPluginCMK.BASE_URL}/chapter/Ae82S7St?tachiyomi=true"
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_parse_info_feed(mock_sleep, mock_random, chapter_entity):
+def test_parse_info_feed(mock_sleep, chapter_entity):
     _ = chapter_entity
     result = ChapterPluginCMK.parse_info_feed("example_manga")
 
@@ -176,9 +174,16 @@ def test_parse_info_feed(mock_sleep, mock_random, chapter_entity):
     ]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_parse_chapter_download_links(mock_sleep, mock_random, chapter_entity):
+def test_parse_info_feed_stops_at_known_chapter(mock_sleep, chapter_entity):
+    _ = chapter_entity
+    result = ChapterPluginCMK.parse_info_feed("example_manga", known_ids={"ACprvUWn-Be82S7St"})
+
+    assert [chapter["id"] for chapter in result] == ["ACprvUWn-Ce82S7St"]
+
+
+@patch("cbz_tagger.entities.base_entity.time.sleep")
+def test_parse_chapter_download_links(mock_sleep, chapter_entity):
     result = chapter_entity.parse_chapter_download_links(f"https://{ChapterPluginCMK.BASE_URL}/chapter")
 
     assert result == [
@@ -97,9 +97,8 @@ def test_from_server_url_no_plugin_id(chapter_entity):
         chapter_entity.from_server_url({"ids[]": ["example_manga"]}, plugin_type=ChapterPluginKAL.PLUGIN_TYPE)
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_from_server_url(mock_sleep, mock_random, chapter_entity):
+def test_from_server_url(mock_sleep, chapter_entity):
     result = chapter_entity.from_server_url(
         {"ids[]": ["example_manga"]}, plugin_type=ChapterPluginKAL.PLUGIN_TYPE, plugin_id="example_manga"
     )
@@ -113,9 +112,8 @@ def test_from_server_url(mock_sleep, mock_random, chapter_entity):
     assert result[2].get_chapter_url() == f"https://{ChapterPluginKAL.BASE_URL}/manga/example/chapter-1"
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_parse_info_feed(mock_sleep, mock_random, chapter_entity):
+def test_parse_info_feed(mock_sleep, chapter_entity):
     _ = chapter_entity
     result = ChapterPluginKAL.parse_info_feed("example_manga")
 
@@ -151,9 +149,16 @@ def test_parse_info_feed(mock_sleep, mock_random, chapter_entity):
         assert chapter["relationships"] == [{"type": "scanlation_group", "id": None}]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_parse_chapter_download_links(mock_sleep, mock_random, chapter_entity):
+def test_parse_info_feed_stops_at_known_chapter(mock_sleep, chapter_entity):
+    _ = chapter_entity
+    result = ChapterPluginKAL.parse_info_feed("example_manga", known_ids={"example_manga-example-chapter-3.1"})
+
+    assert [chapter["id"] for chapter in result] == ["example_manga-example-chapter-5"]
+
+
+@patch("cbz_tagger.entities.base_entity.time.sleep")
+def test_parse_chapter_download_links(mock_sleep, chapter_entity):
     result = chapter_entity.parse_chapter_download_links("http://kal.example.com/chapter")
 
     assert result == [
@@ -1,9 +1,16 @@
+import os
+import time
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from unittest import mock
 from unittest.mock import MagicMock
 from unittest.mock import patch
+from zipfile import ZipFile
 
 import pytest
 
+from cbz_tagger.common.cbz_writer import CbzWriter
 from cbz_tagger.common.enums import Urls
 from cbz_tagger.common.plugins import Plugins
 from cbz_tagger.entities.base_entity import BaseEntity
@@ -11,6 +18,13 @@ from cbz_tagger.entities.chapter_entity import ChapterEntity
 from cbz_tagger.entities.cover_entity import CoverEntity
 
 
+@pytest.fixture
+def cbz_writer(temp_dir):
+    writer = CbzWriter(os.path.join(temp_dir, "chapter.cbz"))
+    yield writer
+    writer.discard()
+
+
 @pytest.fixture
 def chapter_entity():
     return ChapterEntity(
@@ -77,9 +91,8 @@ def test_chapter_entity_with_triple_decimal_chapter(chapter_request_content):
     assert entity.translated_language == "en"
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_chapter_from_url(mock_sleep, mock_random, chapter_request_response):
+def test_chapter_from_url(mock_sleep, chapter_request_response):
     with mock.patch("cbz_tagger.entities.plugins.mdx.ChapterPluginMDX.unpaginate_request") as mock_request:
         mock_request.return_value = chapter_request_response["data"]
         entities = ChapterEntity.from_server_url(query_params={"ids[]": ["1361d404-d03c-4fd9-97b4-2c297914b098"]})
@@ -96,17 +109,32 @@ def test_chapter_from_url(mock_sleep, mock_random, chapter_request_response):
         )
 
 
+@patch("cbz_tagger.entities.base_entity.time.sleep")
+def test_chapter_from_url_since_last_update(mock_sleep, chapter_request_response):
+    with mock.patch("cbz_tagger.entities.plugins.mdx.ChapterPluginMDX.unpaginate_request") as mock_request:
+        mock_request.return_value = chapter_request_response["data"][:1]
+        entities = ChapterEntity.from_server_url(
+            query_params={"ids[]": ["1361d404-d03c-4fd9-97b4-2c297914b098"]},
+            updated_since=datetime(2024, 10, 15, 20, 55, 38, tzinfo=timezone(timedelta(hours=2))),
+        )
+        assert len(entities) == 1
+        mock_request.assert_called_once_with(
+            f"{BaseEntity.base_url}/manga/1361d404-d03c-4fd9-97b4-2c297914b098/feed?"
+            f"order%5BcreatedAt%5D=asc&order%5BupdatedAt%5D=asc&order%5BpublishAt%5D=asc&"
+            f"order%5BreadableAt%5D=asc&order%5Bvolume%5D=asc&order%5Bchapter%5D=asc&"
+            f"updatedAtSince=2024-10-14T18:55:38"
+        )
+
+
 def test_cover_entity_can_store_and_load(cover_request_content, check_entity_for_save_and_load):
     entity = CoverEntity(content=cover_request_content)
     check_entity_for_save_and_load(entity)
 
 
 @patch("cbz_tagger.entities.plugins.mdx.ChapterPluginMDX.request_with_retry")
-@patch("cbz_tagger.entities.plugins.plugin_entity.Image.open")
-@patch("cbz_tagger.entities.plugins.plugin_entity.os.path.exists", return_value=False)
+@patch("cbz_tagger.common.images.Image.open")
 @patch("cbz_tagger.entities.chapter_entity.ChapterEntity.download_file")
-def test_download_chapter(mock_download_file, mock_path_exists, mock_image_open, mock_requests_get, chapter_entity):
-    _ = mock_path_exists
+def test_download_chapter(mock_download_file, mock_image_open, mock_requests_get, chapter_entity, cbz_writer):
     mock_requests_get.return_value.json.return_value = {
         "baseUrl": "http://example.com",
         "chapter": {"hash": "hash_value", "data": ["image1.jpg", "image2.jpg"]},
@@ -116,9 +144,9 @@ def test_download_chapter(mock_download_file, mock_path_exists, mock_image_open,
     mock_image.format = "JPEG"
     mock_image_open.return_value = mock_image
 
-    result = chapter_entity.download_chapter("/fake/filepath")
+    result = chapter_entity.download_chapter(cbz_writer)
 
-    assert result == ["/fake/filepath/001.jpg", "/fake/filepath/002.jpg"]
+    assert result == ["001.jpg", "002.jpg"]
     mock_requests_get.assert_called_once_with(f"https://api.{Urls.MDX}/at-home/server/chapter_id")
     mock_download_file.assert_any_call(f"https://uploads.{Urls.MDX}/data/hash_value/image1.jpg")
     mock_download_file.assert_any_call(f"https://uploads.{Urls.MDX}/data/hash_value/image2.jpg")
@@ -126,12 +154,8 @@ def test_download_chapter(mock_download_file, mock_path_exists, mock_image_open,
 
 
 @patch("cbz_tagger.entities.plugins.mdx.ChapterPluginMDX.request_with_retry")
-@patch("cbz_tagger.entities.plugins.plugin_entity.os.path.exists", return_value=False)
 @patch("cbz_tagger.entities.chapter_entity.ChapterEntity.download_file")
-def test_download_chapter_raises_environment_error(
-    mock_download_file, mock_path_exists, mock_requests_get, chapter_entity
-):
-    _ = mock_path_exists
+def test_download_chapter_raises_environment_error(mock_download_file, mock_requests_get, chapter_entity, cbz_writer):
     mock_requests_get.return_value.json.return_value = {
         "baseUrl": "http://example.com",
         "chapter": {"hash": "hash_value", "data": ["image1.jpg", "image2.jpg"]},
@@ -139,7 +163,7 @@ def test_download_chapter_raises_environment_error(
     mock_download_file.side_effect = EnvironmentError("Failed to download file")
 
     with pytest.raises(EnvironmentError, match="Failed to download file"):
-        chapter_entity.download_chapter("/fake/filepath")
+        chapter_entity.download_chapter(cbz_writer)
 
     mock_requests_get.assert_called_once_with(f"https://api.{Urls.MDX}/at-home/server/chapter_id")
 
@@ -165,3 +189,51 @@ def test_mdx_parse_chapter_download_links(mock_request_with_retry, chapter_entit
 def test_mdx_get_chapter_url(chapter_entity):
     result = chapter_entity.get_chapter_url()
     assert result == f"https://api.{Urls.MDX}/at-home/server/chapter_id"
+
+
+@patch("cbz_tagger.entities.plugins.mdx.ChapterPluginMDX.request_with_retry")
+def test_download_chapter_streams_pages_in_order(mock_requests_get, chapter_entity, cbz_writer):
+    chapter_entity.content["attributes"]["pages"] = 3
+    mock_requests_get.return_value.json.return_value = {
+        "chapter": {"hash": "hash_value", "data": ["image1.jpg", "image2.jpg", "image3.jpg"]},
+    }
+
+    def download_page(image_url):
+        # Earlier pages finish last
+        page = int(image_url[-5])
+        time.sleep(0.02 * (3 - page))
+        return f"page {page}".encode()
+
+    chapter_entity.download_page = MagicMock(side_effect=download_page)
+
+    result = chapter_entity.download_chapter(cbz_writer)
+    cbz_writer.commit()
+
+    assert result == ["001.jpg", "002.jpg", "003.jpg"]
+    with ZipFile(cbz_writer.filepath) as zip_read:
+        assert zip_read.namelist() == ["001.jpg", "002.jpg", "003.jpg"]
+        assert [zip_read.read(name) for name in zip_read.namelist()] == [b"page 1", b"page 2", b"page 3"]
+
+
+@patch("cbz_tagger.entities.plugins.mdx.ChapterPluginMDX.request_with_retry")
+def test_download_chapter_cancels_queued_pages_on_failure(mock_requests_get, chapter_entity, cbz_writer):
+    chapter_entity.page_workers = 1
+    chapter_entity.content["attributes"]["pages"] = 3
+    mock_requests_get.return_value.json.return_value = {
+        "chapter": {"hash": "hash_value", "data": ["image1.jpg", "image2.jpg", "image3.jpg"]},
+    }
+
+    def download_page(image_url):
+        if image_url.endswith("image1.jpg"):
+            raise EnvironmentError("Failed to download file")
+        time.sleep(0.05)
+        return b"page"
+
+    chapter_entity.download_page = MagicMock(side_effect=download_page)
+
+    with pytest.raises(EnvironmentError, match="Failed to download file"):
+        chapter_entity.download_chapter(cbz_writer)
+
+    # Queued pages are cancelled once a page fails
+    downloaded_urls = [call.args[0] for call in chapter_entity.download_page.call_args_list]
+    assert not any(url.endswith("image3.jpg") for url in downloaded_urls)
@@ -55,9 +55,8 @@ def test_from_server_url_no_plugin_id(chapter_entity):
         chapter_entity.from_server_url({"ids[]": ["example_manga"]}, plugin_type=ChapterPluginWBC.PLUGIN_TYPE)
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_from_server_url(mock_sleep, mock_random, chapter_entity):
+def test_from_server_url(mock_sleep, chapter_entity):
     result = chapter_entity.from_server_url(
         {"ids[]": ["example_manga"]}, plugin_type=ChapterPluginWBC.PLUGIN_TYPE, plugin_id="example_manga"
     )
@@ -80,9 +79,8 @@ def test_from_server_url(mock_sleep, mock_random, chapter_entity):
     )
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_parse_info_feed(mock_sleep, mock_random, chapter_entity):
+def test_parse_info_feed(mock_sleep, chapter_entity):
     _ = chapter_entity
     result = ChapterPluginWBC.parse_info_feed("example_manga")
     for chapter in result:
@@ -169,9 +167,19 @@ def test_parse_info_feed(mock_sleep, mock_random, chapter_entity):
     ]
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_parse_chapter_download_links(mock_sleep, mock_random, chapter_entity):
+def test_parse_info_feed_stops_at_known_chapter(mock_sleep, chapter_entity):
+    _ = chapter_entity
+    result = ChapterPluginWBC.parse_info_feed("example_manga", known_ids={"example_manga-01j76xz09ng81kb3c8x2v3p74y"})
+
+    assert [chapter["id"] for chapter in result] == [
+        "example_manga-01j76xz09nwpn7pmb237qvjyp2",
+        "example_manga-01j76xz09ndfnrrgap5tb15jea",
+    ]
+
+
+@patch("cbz_tagger.entities.base_entity.time.sleep")
+def test_parse_chapter_download_links(mock_sleep, chapter_entity):
     result = chapter_entity.parse_chapter_download_links("http://wbc.example.com/chapter")
 
     assert result == [
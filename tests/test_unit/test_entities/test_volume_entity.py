@@ -3,6 +3,7 @@ from unittest.mock import patch
 import pytest
 
 from cbz_tagger.entities.volume_entity import VolumeEntity
+from cbz_tagger.entities.volume_entity import VolumeIndex
 
 
 def test_volume_entity(volume_request_response):
@@ -126,9 +127,8 @@ def test_volume_entity_get_volume_for_chapter_with_no_volume_map():
     assert "-1" == entity.get_volume("10")
 
 
-@patch("cbz_tagger.entities.base_entity.random.uniform", return_value=0.1)
 @patch("cbz_tagger.entities.base_entity.time.sleep")
-def test_volume_entity_from_url(mock_sleep, mock_random, requests_mock, volume_request_response):
+def test_volume_entity_from_url(mock_sleep, requests_mock, volume_request_response):
     requests_mock.get(
         f"{VolumeEntity.base_url}/manga/831b12b8-2d0e-4397-8719-1efee4c32f40/aggregate",
         json=volume_request_response,
@@ -232,3 +232,29 @@ def test_last_volume_with_only_integer_and_decimal_keys():
     }
     entity = VolumeEntity(content)
     assert entity.last_volume == 3
+
+
+@pytest.mark.parametrize(
+    "chapter,expected_volume",
+    [(-1, None), (0, "1"), (4, "1"), (5, "1"), (9, "1"), (10, "3"), (11, "3"), (12, None), (20, "4"), (21, None)],
+)
+def test_volume_index_prefers_first_overlapping_range(chapter, expected_volume):
+    index = VolumeIndex([("1", 0.0, 10.0), ("2", 5.0, 8.0), ("3", 8.0, 12.0), ("4", 15.0, 21.0)])
+    assert index.find(chapter) == expected_volume
+
+
+def test_volume_entity_builds_index_once(volume_request_response):
+    entity = VolumeEntity(content=volume_request_response)
+    index = entity.volume_index
+    assert entity.get_volume("3") == "3"
+    assert entity.get_volume("100") == "12"
+    assert entity.volume_index is index
+
+
+def test_volume_entity_reuses_synthetic_volume_index():
+    entity = VolumeEntity(content={"result": "ok", "volumes": {}})
+    assert entity.get_volume("1", 30, [1.0, 2.0, 3.0]) == "1"
+    assert entity.get_volume("25", 30, [1.0, 2.0, 3.0]) == "3"
+    assert len(entity.synthetic_indexes) == 1
+    assert entity.get_volume("25", 60, [1.0, 2.0, 3.0]) == "2"
+    assert len(entity.synthetic_indexes) == 2
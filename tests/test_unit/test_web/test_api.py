@@ -1,6 +1,7 @@
 """Unit tests for web/api.py."""
 
 import asyncio
+import threading
 from datetime import datetime
 from unittest.mock import MagicMock
 from unittest.mock import patch
@@ -136,6 +137,18 @@ class TestRunScannerOperation:
         # Scanner should be unlocked after exception
         assert api.is_scanner_busy() is False
 
+    @pytest.mark.asyncio
+    @patch("cbz_tagger.web.api.scanner")
+    async def test_run_scanner_operation_holds_scanner_lock(self, mock_scanner, reset_app_state):
+        """Test that the operation runs while holding the scanner lock."""
+        mock_scanner.lock = threading.Lock()
+
+        def mock_operation():
+            return mock_scanner.lock.locked()
+
+        assert await api.run_scanner_operation(mock_operation) is True
+        assert mock_scanner.lock.locked() is False
+
 
 class TestScannerOperations:
     """Test scanner operation functions."""
@@ -146,6 +159,12 @@ class TestScannerOperations:
         api.refresh_scanner_operation()
         mock_scanner.run.assert_called_once()
 
+    @patch("cbz_tagger.web.api.scanner")
+    def test_watch_scan_path_operation(self, mock_scanner):
+        """Test watch scan path operation."""
+        api.watch_scan_path_operation(["series/chapter 1.cbz"])
+        mock_scanner.run_watch.assert_called_once_with(["series/chapter 1.cbz"])
+
     @patch("cbz_tagger.web.api.scanner")
     def test_add_series_operation(self, mock_scanner):
         """Test add series operation."""
@@ -186,6 +205,13 @@ class TestScannerOperations:
         api.clean_orphaned_files_operation()
         mock_scanner.entity_database.remove_orphaned_covers.assert_called_once()
 
+    @patch("cbz_tagger.web.api.scanner")
+    def test_retag_chapters_operation(self, mock_scanner):
+        """Test retag chapters operation."""
+        mock_scanner.entity_database.retag_chapters.return_value = 3
+        assert api.retag_chapters_operation() == 3
+        mock_scanner.entity_database.retag_chapters.assert_called_once_with(mock_scanner.storage_path)
+
     @patch("cbz_tagger.web.api.scanner")
     def test_reload_scanner_operation(self, mock_scanner):
         """Test reload scanner operation."""
@@ -246,16 +272,18 @@ class TestScannerOperations:
         """Test get scanner state operation."""
         mock_scanner.to_state.return_value = []
         result = api.get_scanner_state_operation()
-        mock_scanner.reload_scanner.assert_called_once()
+        mock_scanner.reload_scanner_if_stale.assert_not_called()
+        mock_scanner.reload_scanner.assert_not_called()
         mock_scanner.to_state.assert_called_once()
         assert result == []
 
     @patch("cbz_tagger.web.api.scanner")
     def test_get_series_list_operation(self, mock_scanner):
         """Test get series list operation."""
-        mock_scanner.entity_database.entity_map.items.return_value = [("Series1", "id1"), ("Series2", "id2")]
+        mock_scanner.read_database.return_value.entity_map.items.return_value = [("Series1", "id1"), ("Series2", "id2")]
         result = api.get_series_list_operation()
-        mock_scanner.reload_scanner.assert_called_once()
+        mock_scanner.reload_scanner_if_stale.assert_not_called()
+        mock_scanner.reload_scanner.assert_not_called()
         assert result == [("Series1", "id1"), ("Series2", "id2")]
 
     @patch("cbz_tagger.web.api.scanner")
@@ -269,12 +297,14 @@ class TestScannerOperations:
         mock_chapter2.entity_id = "entity2"
         mock_chapter2.chapter_string = "2"
 
-        mock_scanner.entity_database.chapters.database.get.return_value = [mock_chapter1, mock_chapter2]
-        mock_scanner.entity_database.entity_downloads = {("test_entity_id", "entity1")}
+        read_database = mock_scanner.read_database.return_value
+        read_database.chapters.database.get.return_value = [mock_chapter1, mock_chapter2]
+        read_database.entity_downloads = {("test_entity_id", "entity1")}
 
         result = api.get_chapters_operation("test_entity_id")
 
-        mock_scanner.reload_scanner.assert_called_once()
+        mock_scanner.reload_scanner_if_stale.assert_not_called()
+        mock_scanner.reload_scanner.assert_not_called()
         assert len(result) == 2
         assert result[0] == {"entity_id": "entity1", "chapter_number": "1", "downloaded": True}
         assert result[1] == {"entity_id": "entity2", "chapter_number": "2", "downloaded": False}
@@ -282,14 +312,14 @@ class TestScannerOperations:
     @patch("cbz_tagger.web.api.scanner")
     def test_get_chapters_operation_no_chapters(self, mock_scanner):
         """Test get chapters operation when no chapters exist."""
-        mock_scanner.entity_database.chapters.database.get.return_value = None
+        mock_scanner.read_database.return_value.chapters.database.get.return_value = None
         result = api.get_chapters_operation("test_entity_id")
         assert result == []
 
     @patch("cbz_tagger.web.api.scanner")
     def test_get_chapters_operation_empty_list(self, mock_scanner):
         """Test get chapters operation when chapters list is empty."""
-        mock_scanner.entity_database.chapters.database.get.return_value = []
+        mock_scanner.read_database.return_value.chapters.database.get.return_value = []
         result = api.get_chapters_operation("test_entity_id")
         assert result == []
 
@@ -328,6 +358,14 @@ class TestAPIEndpoints:
         assert "refresh completed successfully" in data["message"]
         mock_scanner.run.assert_called_once()
 
+    @patch("cbz_tagger.web.api.scanner")
+    def test_retag_chapters_endpoint(self, mock_scanner, reset_app_state, client):
+        """Test POST /api/scanner/retag endpoint."""
+        mock_scanner.entity_database.retag_chapters.return_value = 2
+        response = client.post("/api/scanner/retag")
+        assert response.status_code == 200
+        assert response.json()["message"] == "Retagged 2 chapters successfully"
+
     @patch("cbz_tagger.web.api.scanner")
     def test_reload_scanner_endpoint(self, mock_scanner, reset_app_state, client):
         """Test POST /api/scanner/reload endpoint."""
@@ -366,7 +404,7 @@ class TestAPIEndpoints:
     @patch("cbz_tagger.web.api.scanner")
     def test_get_series_list_endpoint(self, mock_scanner, reset_app_state, client):
         """Test GET /api/scanner/series endpoint."""
-        mock_scanner.entity_database.entity_map.items.return_value = [("Series1", "id1"), ("Series2", "id2")]
+        mock_scanner.read_database.return_value.entity_map.items.return_value = [("Series1", "id1"), ("Series2", "id2")]
         response = client.get("/api/scanner/series")
         assert response.status_code == 200
         data = response.json()
@@ -381,8 +419,8 @@ class TestAPIEndpoints:
         mock_chapter = MagicMock()
         mock_chapter.entity_id = "chapter1"
         mock_chapter.chapter_string = "1"
-        mock_scanner.entity_database.chapters.database.get.return_value = [mock_chapter]
-        mock_scanner.entity_database.entity_downloads = {("test_id", "chapter1")}
+        mock_scanner.read_database.return_value.chapters.database.get.return_value = [mock_chapter]
+        mock_scanner.read_database.return_value.entity_downloads = {("test_id", "chapter1")}
 
         response = client.get("/api/scanner/series/test_id/chapters")
         assert response.status_code == 200